@@ -1,16 +1,22 @@
 from __future__ import annotations
 
 import re
-from typing import List, Optional
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import yaml
 
-from config import get_agents_path, get_plan_path
+from config import get_agents_path, get_audit_concurrency, get_plan_path
 from llm_router import format_cursor_instructions
-from models import ActionRequest, AgentProfile
+from models import ActionRequest, AgentProfile, PermissionDecision
 from observability import log_event, timer
 from permission_judge import evaluate_action
-from state_store import add_permission_request, append_activity
+from policy_engine import Policy
+from scheduler import FlowHandle, Task, get_scheduler
+from state_store import add_permission_request, append_activity, transaction
 from workspace_execution import WorkspaceExecutor
 
 
@@ -21,8 +27,26 @@ def _extract_yaml_block(markdown: str) -> str:
     return match.group(1).strip()
 
 
-def load_agents() -> List[AgentProfile]:
-    raw = get_agents_path().read_text(encoding="utf-8")
+_file_cache: Dict[str, Tuple[Tuple[int, int], Any]] = {}
+_file_cache_lock = threading.Lock()
+
+
+def _load_cached(path: Path, parse: Callable[[str], Any]) -> Any:
+    # Reread and reparse a file only when its mtime or size changes.
+    stat = path.stat()
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    key = f"{parse.__name__}:{path}"
+    with _file_cache_lock:
+        cached = _file_cache.get(key)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+    value = parse(path.read_text(encoding="utf-8"))
+    with _file_cache_lock:
+        _file_cache[key] = (stamp, value)
+    return value
+
+
+def _parse_agents(raw: str) -> List[AgentProfile]:
     yaml_block = _extract_yaml_block(raw)
     payload = yaml.safe_load(yaml_block)
     agents = []
@@ -37,25 +61,46 @@ def load_agents() -> List[AgentProfile]:
     return agents
 
 
+def _parse_policy(raw: str) -> Policy:
+    return Policy(_parse_agents(raw))
+
+
+def _parse_plan(raw: str) -> str:
+    return raw
+
+
+def load_policy() -> Policy:
+    return _load_cached(get_agents_path(), _parse_policy)
+
+
+def load_agents() -> List[AgentProfile]:
+    return list(load_policy().agents)
+
+
 def load_plan() -> str:
-    return get_plan_path().read_text(encoding="utf-8")
+    return _load_cached(get_plan_path(), _parse_plan)
 
 
 class AgentManager:
-    def __init__(self) -> None:
-        self.agents = load_agents()
-        self.plan = load_plan()
-        self.executor = WorkspaceExecutor()
-
-    def _select_agent(self, permission_prefix: str) -> Optional[AgentProfile]:
-        for agent in self.agents:
-            for permission in agent.permissions:
-                if permission.startswith(permission_prefix):
-                    return agent
-        return None
+    # Long-lived: agents and plan are read through the mtime cache on each
+    # access, so edits to agents.md or plan.md apply without a new manager.
+    def __init__(self, executor: Optional[WorkspaceExecutor] = None) -> None:
+        self.executor = executor or WorkspaceExecutor()
+        self.last_audit_summary: Dict[str, Any] = {}
+
+    @property
+    def agents(self) -> List[AgentProfile]:
+        return load_agents()
+
+    @property
+    def plan(self) -> str:
+        return load_plan()
+
+    def _select_agent(self, scope: str) -> Optional[AgentProfile]:
+        return load_policy().select_agent(scope)
 
     def run_demo_flow(self) -> str:
-        with timer("demo_flow"):
+        with timer("demo_flow"), transaction():
             agent = self.agents[-1]
             append_activity(
                 f"{agent.name} reads plan.md",
@@ -72,26 +117,14 @@ class AgentManager:
                 payload={"repo": "demo-repo", "message": "demo commit"},
             )
             decision = evaluate_action(action, agent)
-            if decision.requires_approval:
-                request_id = add_permission_request(
-                    title="Git commit requested",
-                    action={
-                        "action_type": action.action_type,
-                        "description": action.description,
-                        "payload": action.payload,
-                    },
-                    agent={"name": agent.name, "role": agent.role},
-                    reason=decision.reason,
-                    origin={"component": "Inquisitor", "location": "permission_judge.py"},
-                )
-                append_activity(
-                    "Permission requested for git commit",
-                    {
-                        "component": "Inquisitor",
-                        "location": "permission_judge.py",
-                        "reason": decision.reason,
-                    },
-                )
+            request_id = self._request_permission(
+                agent,
+                action,
+                "Git commit requested",
+                "Permission requested for git commit",
+                decision=decision,
+            )
+            if request_id is not None:
                 log_event(
                     "demo_flow_paused",
                     {"request_id": request_id, "reason": decision.reason},
@@ -101,102 +134,267 @@ class AgentManager:
             log_event("demo_flow_auto_approved", {"reason": decision.reason})
             return "auto-approved"
 
-    def run_repo_test_audit(self, command: str = "pytest") -> List[str]:
-        with timer("repo_test_audit"):
-            agent = self._select_agent("tests:run")
-            if agent is None:
-                raise RuntimeError("No agent configured with tests:run permissions.")
+    def _request_permission(
+        self,
+        agent: AgentProfile,
+        action: ActionRequest,
+        title: str,
+        activity: str,
+        batch_id: Optional[str] = None,
+        decision: Optional[PermissionDecision] = None,
+    ) -> Optional[str]:
+        # Returns None when the agent may act without approval. Callers that
+        # already evaluated the action pass their decision along.
+        decision = decision or evaluate_action(action, agent)
+        if not decision.requires_approval:
+            return None
+        request_id = add_permission_request(
+            title=title,
+            action={
+                "action_type": action.action_type,
+                "description": action.description,
+                "payload": action.payload,
+            },
+            agent={"name": agent.name, "role": agent.role},
+            reason=decision.reason,
+            origin={"component": "Inquisitor", "location": "permission_judge.py"},
+            batch_id=batch_id,
+        )
+        append_activity(
+            activity,
+            {
+                "component": "Inquisitor",
+                "location": "permission_judge.py",
+                "reason": decision.reason,
+            },
+        )
+        return request_id
 
-            request_ids = []
-            for repo_path in self.executor.list_repos():
-                action = ActionRequest(
-                    action_type="run_tests",
-                    description=f"Run tests in {repo_path.name}",
-                    payload={
-                        "repo_path": str(repo_path),
-                        "command": command,
-                        "update_plan": True,
-                    },
-                )
-                decision = evaluate_action(action, agent)
-                if decision.requires_approval:
-                    request_id = add_permission_request(
-                        title=f"Run tests for {repo_path.name}",
-                        action={
-                            "action_type": action.action_type,
-                            "description": action.description,
-                            "payload": action.payload,
-                        },
-                        agent={"name": agent.name, "role": agent.role},
-                        reason=decision.reason,
-                        origin={"component": "Inquisitor", "location": "permission_judge.py"},
-                    )
-                    request_ids.append(request_id)
-                    append_activity(
-                        f"Permission requested for tests in {repo_path.name}",
-                        {
-                            "component": "Inquisitor",
-                            "location": "permission_judge.py",
-                            "reason": decision.reason,
-                        },
-                    )
-                else:
-                    self.executor.execute_action(action)
-                    append_activity(
-                        f"Tests executed for {repo_path.name}",
-                        {"component": "Final Order", "location": "workspace_execution.py"},
+    def _audit_tasks(
+        self, agent: AgentProfile, repo_path: Path, command: str, mode: str, batch_id: str
+    ) -> List[Task]:
+        action = ActionRequest(
+            action_type="run_tests",
+            description=f"Run tests in {repo_path.name}",
+            payload={
+                "repo_path": str(repo_path),
+                "command": command,
+                "mode": mode,
+                "update_plan": True,
+            },
+        )
+        permission = f"permission:{repo_path.name}"
+
+        def request(_: Dict[str, Any]) -> Dict[str, Any]:
+            start = time.perf_counter()
+            request_id = self._request_permission(
+                agent,
+                action,
+                f"Run tests for {repo_path.name}",
+                f"Permission requested for tests in {repo_path.name}",
+                batch_id,
+            )
+            return {"request_id": request_id, "start": start}
+
+        def execute(deps: Dict[str, Any]) -> Dict[str, Any]:
+            request_id, start = deps[permission]["request_id"], deps[permission]["start"]
+            if request_id is not None:
+                outcome = "pending_approval"
+            else:
+                try:
+                    outcome = self.executor.execute_action(action)
+                except Exception as exc:
+                    log_event(
+                        "repo_test_audit_error",
+                        {"repo_path": str(repo_path), "error": str(exc)},
                     )
+                    return {"request_id": None, "status": "error", "wall_ms": None}
+                append_activity(
+                    f"Tests executed for {repo_path.name}",
+                    {"component": "Final Order", "location": "workspace_execution.py"},
+                )
+            wall_ms = round((time.perf_counter() - start) * 1000, 2)
+            return {"request_id": request_id, "status": outcome, "wall_ms": wall_ms}
+
+        return [
+            Task(permission, request, commit_group="permissions"),
+            Task(
+                f"execute:{repo_path.name}",
+                execute,
+                deps=[permission],
+                action_type="run_tests",
+            ),
+        ]
+
+    def submit_repo_test_audit(
+        self,
+        command: str = "pytest",
+        concurrency: Optional[int] = None,
+        mode: str = "full",
+        priority: int = 0,
+    ) -> FlowHandle:
+        # Per repo: permission check, then test execution (which updates the
+        # repo plan); a final summary task waits for every repo. The flow's
+        # state writes land in two commits: all permission requests once the
+        # checks have run, then everything else when the flow finishes.
+        agent = self._select_agent("tests:run")
+        if agent is None:
+            raise RuntimeError("No agent configured with tests:run permissions.")
+
+        repos = self.executor.list_repos()
+        workers = max(1, min(concurrency or get_audit_concurrency(), len(repos) or 1))
+        start = time.perf_counter()
+        batch_id = uuid.uuid4().hex[:12]
+        tasks: List[Task] = []
+        for repo_path in repos:
+            tasks.extend(self._audit_tasks(agent, repo_path, command, mode, batch_id))
+
+        def summarize(results: Dict[str, Any]) -> List[str]:
+            total_ms = (time.perf_counter() - start) * 1000
+            per_repo = {}
+            request_ids = []
+            for repo_path in repos:
+                result = results[f"execute:{repo_path.name}"]
+                if result["request_id"] is not None:
+                    request_ids.append(result["request_id"])
+                per_repo[repo_path.name] = {
+                    "status": result["status"],
+                    "wall_ms": result["wall_ms"],
+                }
+            repo_ms = sum(item["wall_ms"] or 0 for item in per_repo.values())
+            self.last_audit_summary = {
+                "repos": len(repos),
+                "concurrency": workers,
+                "total_wall_ms": round(total_ms, 2),
+                "sum_repo_wall_ms": round(repo_ms, 2),
+                "per_repo": per_repo,
+            }
+            log_event("repo_test_audit_summary", self.last_audit_summary)
+            append_activity(
+                f"Audit of {len(repos)} repos finished in {total_ms:.0f} ms "
+                f"({repo_ms:.0f} ms of per-repo work, concurrency {workers})",
+                {"component": "Cloning Vats", "location": "agent_manager.py"},
+            )
             return request_ids
 
-    def run_cursor_prompt_flow(self) -> List[str]:
-        with timer("cursor_prompt_flow"):
-            agent = self._select_agent("cursor:prompt")
+        tasks.append(
+            Task("summary", summarize, deps=[f"execute:{repo_path.name}" for repo_path in repos])
+        )
+        return get_scheduler().submit(
+            "repo_test_audit",
+            tasks,
+            priority=priority,
+            max_parallel=workers,
+            data={"batch_id": batch_id},
+        )
+
+    def run_repo_test_audit(
+        self, command: str = "pytest", concurrency: Optional[int] = None, mode: str = "full"
+    ) -> List[str]:
+        return self.submit_repo_test_audit(command, concurrency, mode).result()
+
+    def run_commit_batch(
+        self, changes: List[Dict[str, Any]], message: str = "batch commit"
+    ) -> str:
+        # One permission check and at most one approval for the whole
+        # changeset, whatever the number of files and repos.
+        batch_id = uuid.uuid4().hex[:12]
+        with timer("commit_batch_flow", {"batch_id": batch_id}), transaction():
+            agent = self._select_agent("git:commit")
             if agent is None:
-                raise RuntimeError("No agent configured with cursor:prompt permissions.")
+                raise RuntimeError("No agent configured with git:commit permissions.")
 
-            request_ids = []
-            for repo_path in self.executor.list_repos():
-                plan_path = repo_path / "plan.md"
-                if plan_path.exists():
-                    plan_content = plan_path.read_text(encoding="utf-8")
-                else:
-                    plan_content = "# Plan\n"
-                snippet = plan_content.replace("\n", " ")[:400]
-                task = (
-                    f"Review and update {repo_path.name}/plan.md based on test results."
-                )
-                prompt = format_cursor_instructions(f"{task}\nPlan snapshot: {snippet}")
-                action = ActionRequest(
-                    action_type="cursor_prompt",
-                    description=f"Queue Cursor prompt for {repo_path.name}",
-                    payload={"repo_path": str(repo_path), "prompt": prompt},
+            repos = sorted({change["repo"] for change in changes})
+            action = ActionRequest(
+                action_type="git_commit_batch",
+                description=f"Commit {len(changes)} files across {len(repos)} repos",
+                payload={"message": message, "changes": changes},
+            )
+            request_id = self._request_permission(
+                agent,
+                action,
+                f"Batch commit to {', '.join(repos)}",
+                "Permission requested for batch commit",
+                batch_id,
+            )
+            if request_id is not None:
+                return request_id
+
+            return self.executor.execute_action(action)
+
+    def _cursor_prompt_tasks(
+        self, agent: AgentProfile, repo_path: Path, batch_id: str
+    ) -> List[Task]:
+        permission = f"permission:{repo_path.name}"
+
+        def request(_: Dict[str, Any]) -> Dict[str, Any]:
+            # The plan is read when the task runs, so an audit that finishes
+            # first is reflected in the prompt.
+            plan_path = repo_path / "plan.md"
+            if plan_path.exists():
+                plan_content = plan_path.read_text(encoding="utf-8")
+            else:
+                plan_content = "# Plan\n"
+            snippet = plan_content.replace("\n", " ")[:400]
+            task = (
+                f"Review and update {repo_path.name}/plan.md based on test results."
+            )
+            prompt = format_cursor_instructions(f"{task}\nPlan snapshot: {snippet}")
+            action = ActionRequest(
+                action_type="cursor_prompt",
+                description=f"Queue Cursor prompt for {repo_path.name}",
+                payload={"repo_path": str(repo_path), "prompt": prompt},
+            )
+            request_id = self._request_permission(
+                agent,
+                action,
+                f"Queue Cursor prompt for {repo_path.name}",
+                f"Permission requested for Cursor prompt in {repo_path.name}",
+                batch_id,
+            )
+            return {"request_id": request_id, "action": action}
+
+        def execute(deps: Dict[str, Any]) -> Optional[str]:
+            request_id = deps[permission]["request_id"]
+            if request_id is None:
+                self.executor.execute_action(deps[permission]["action"])
+                append_activity(
+                    f"Cursor prompt queued for {repo_path.name}",
+                    {"component": "Final Order", "location": "workspace_execution.py"},
                 )
-                decision = evaluate_action(action, agent)
-                if decision.requires_approval:
-                    request_id = add_permission_request(
-                        title=f"Queue Cursor prompt for {repo_path.name}",
-                        action={
-                            "action_type": action.action_type,
-                            "description": action.description,
-                            "payload": action.payload,
-                        },
-                        agent={"name": agent.name, "role": agent.role},
-                        reason=decision.reason,
-                        origin={"component": "Inquisitor", "location": "permission_judge.py"},
-                    )
-                    request_ids.append(request_id)
-                    append_activity(
-                        f"Permission requested for Cursor prompt in {repo_path.name}",
-                        {
-                            "component": "Inquisitor",
-                            "location": "permission_judge.py",
-                            "reason": decision.reason,
-                        },
-                    )
-                else:
-                    self.executor.execute_action(action)
-                    append_activity(
-                        f"Cursor prompt queued for {repo_path.name}",
-                        {"component": "Final Order", "location": "workspace_execution.py"},
-                    )
-            return request_ids
+            return request_id
+
+        return [
+            Task(permission, request, commit_group="permissions"),
+            Task(
+                f"execute:{repo_path.name}",
+                execute,
+                deps=[permission],
+                action_type="cursor_prompt",
+            ),
+        ]
+
+    def submit_cursor_prompt_flow(self, priority: int = 0) -> FlowHandle:
+        agent = self._select_agent("cursor:prompt")
+        if agent is None:
+            raise RuntimeError("No agent configured with cursor:prompt permissions.")
+
+        repos = self.executor.list_repos()
+        batch_id = uuid.uuid4().hex[:12]
+        tasks: List[Task] = []
+        for repo_path in repos:
+            tasks.extend(self._cursor_prompt_tasks(agent, repo_path, batch_id))
+        executes = [f"execute:{repo_path.name}" for repo_path in repos]
+        tasks.append(
+            Task(
+                "summary",
+                lambda results: [results[name] for name in executes if results[name]],
+                deps=executes,
+            )
+        )
+        return get_scheduler().submit(
+            "cursor_prompt_flow", tasks, priority=priority, data={"batch_id": batch_id}
+        )
+
+    def run_cursor_prompt_flow(self) -> List[str]:
+        return self.submit_cursor_prompt_flow().result()
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import job_queue
+from config import get_state_dir
+from file_lock import file_lock
+from job_worker import ensure_workers
+from observability import log_event, use_trace
+from state_store import (
+    append_activity,
+    commit_batch,
+    list_pending_permission_requests,
+    new_batch,
+    transaction,
+    update_permission_request,
+)
+
+
+# Operator decisions on permission requests, singly or a whole batch at once.
+# Approved actions go on the job queue and run concurrently in job_worker
+# processes. Deciding N requests costs one queue write and one state write,
+# not N of each. Decisions hold a lock from the pending check until they are
+# committed, so concurrent sessions or double clicks decide a request once.
+
+ACTIVITY_METADATA = {
+    "component": "Inquisitor",
+    "location": "permission_judge.py",
+    "llm_used": "none",
+}
+
+
+def group_by_batch(requests: List[Dict[str, Any]]) -> Dict[Optional[str], List[Dict[str, Any]]]:
+    # Keeps the order requests arrived in, both across and within batches.
+    groups: Dict[Optional[str], List[Dict[str, Any]]] = defaultdict(list)
+    for request in requests:
+        groups[request.get("batch_id")].append(request)
+    return dict(groups)
+
+
+def matches(request: Dict[str, Any], query: str) -> bool:
+    # Every whitespace-separated term must appear in the request's title,
+    # description, action type or agent name (case-insensitive).
+    haystack = " ".join(
+        [
+            request.get("title", ""),
+            request["action"].get("description", ""),
+            request["action"].get("action_type", ""),
+            request.get("agent", {}).get("name", ""),
+        ]
+    ).lower()
+    return all(term in haystack for term in query.lower().split())
+
+
+def _decision_metadata(requests: List[Dict[str, Any]]) -> Dict[str, Any]:
+    metadata = dict(ACTIVITY_METADATA)
+    batch_ids = {request.get("batch_id") for request in requests}
+    if len(batch_ids) == 1 and None not in batch_ids:
+        metadata["batch_id"] = batch_ids.pop()
+    if len(requests) > 1:
+        metadata["requests"] = len(requests)
+    return metadata
+
+
+def _lock_path() -> Path:
+    return get_state_dir() / "permission_decisions.lock"
+
+
+def _still_pending(requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # The UI may act on a list rendered before another rerun decided some of
+    # these requests; those are skipped. Call with the decision lock held.
+    pending = {request["id"] for request in list_pending_permission_requests()}
+    return [request for request in requests if request["id"] in pending]
+
+
+def approve(requests: List[Dict[str, Any]]) -> List[str]:
+    # Returns the queued job ids.
+    with file_lock(_lock_path()):
+        requests = _still_pending(requests)
+        if not requests:
+            return []
+        job_ids = job_queue.enqueue_many(
+            [(request["action"], request["id"], request.get("trace")) for request in requests]
+        )
+        # Committed before the lock is released, even inside an outer
+        # transaction, so the next decision sees these requests as decided.
+        batch = new_batch()
+        with transaction(batch):
+            for request, job_id in zip(requests, job_ids):
+                with use_trace(request.get("trace")):
+                    update_permission_request(
+                        request["id"],
+                        "approved",
+                        {"job_id": job_id, "execution": job_queue.QUEUED},
+                    )
+            if len(requests) == 1:
+                message = "Permission approved and action queued"
+            else:
+                message = f"{len(requests)} permissions approved and actions queued"
+            append_activity(message, _decision_metadata(requests))
+        commit_batch(batch)
+    log_event("permission_bulk_decision", {"status": "approved", "requests": len(requests)})
+    ensure_workers()
+    return job_ids
+
+
+def deny(requests: List[Dict[str, Any]]) -> int:
+    with file_lock(_lock_path()):
+        requests = _still_pending(requests)
+        if not requests:
+            return 0
+        batch = new_batch()
+        with transaction(batch):
+            for request in requests:
+                update_permission_request(request["id"], "denied")
+            if len(requests) == 1:
+                message = "Permission denied"
+            else:
+                message = f"{len(requests)} permissions denied"
+            append_activity(message, _decision_metadata(requests))
+        commit_batch(batch)
+    log_event("permission_bulk_decision", {"status": "denied", "requests": len(requests)})
+    return len(requests)
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import os
 from pathlib import Path
+from typing import Dict, Optional
 
 
 BASE_DIR = Path(__file__).resolve().parent
@@ -35,6 +36,153 @@ def get_sandbox_mode() -> str:
     return os.getenv("EXEGOL_SANDBOX_MODE", "noop").strip().lower()
 
 
+def get_sandbox_image() -> str:
+    return os.getenv("EXEGOL_SANDBOX_IMAGE", "python:3.11-slim")
+
+
+def get_sandbox_pool_size() -> int:
+    return max(1, int(os.getenv("EXEGOL_SANDBOX_POOL_SIZE", "2")))
+
+
+def get_sandbox_max_uses() -> int:
+    return max(1, int(os.getenv("EXEGOL_SANDBOX_MAX_USES", "20")))
+
+
+def get_sandbox_cpus() -> Optional[float]:
+    value = os.getenv("EXEGOL_SANDBOX_CPUS", "").strip()
+    return float(value) if value and float(value) > 0 else None
+
+
+def get_sandbox_memory() -> Optional[str]:
+    return os.getenv("EXEGOL_SANDBOX_MEMORY", "").strip() or None
+
+
+def get_local_workers() -> int:
+    return max(1, int(os.getenv("EXEGOL_LOCAL_WORKERS", str(os.cpu_count() or 2))))
+
+
+def get_local_cpu_seconds() -> Optional[int]:
+    value = os.getenv("EXEGOL_LOCAL_CPU_SECONDS", "").strip()
+    return int(value) if value and int(value) > 0 else None
+
+
+def get_local_memory_mb() -> Optional[int]:
+    value = os.getenv("EXEGOL_LOCAL_MEMORY_MB", "").strip()
+    return int(value) if value and int(value) > 0 else None
+
+
+def get_test_timeout() -> float:
+    return float(os.getenv("EXEGOL_TEST_TIMEOUT", "900"))
+
+
+def get_test_progress_interval() -> float:
+    return float(os.getenv("EXEGOL_TEST_PROGRESS_INTERVAL", "2"))
+
+
+def get_test_cache_ttl() -> float:
+    return float(os.getenv("EXEGOL_TEST_CACHE_TTL", str(7 * 24 * 3600)))
+
+
+def get_test_cache_max_entries() -> int:
+    return max(1, int(os.getenv("EXEGOL_TEST_CACHE_MAX_ENTRIES", "500")))
+
+
+def get_scheduler_workers() -> int:
+    return max(1, int(os.getenv("EXEGOL_SCHEDULER_WORKERS", "8")))
+
+
+def get_scheduler_limits() -> Dict[str, int]:
+    # Per-action-type concurrency caps, e.g. "run_tests=4,git_commit_batch=1".
+    limits = {"run_tests": get_audit_concurrency()}
+    for item in os.getenv("EXEGOL_SCHEDULER_LIMITS", "").split(","):
+        name, _, value = item.partition("=")
+        if name.strip() and value.strip():
+            limits[name.strip()] = max(1, int(value))
+    return limits
+
+
+def get_commit_concurrency() -> int:
+    return max(1, int(os.getenv("EXEGOL_COMMIT_CONCURRENCY", "4")))
+
+
+def get_repo_pool_size() -> int:
+    return max(1, int(os.getenv("EXEGOL_REPO_POOL_SIZE", "32")))
+
+
+def get_job_workers() -> int:
+    return max(1, int(os.getenv("EXEGOL_JOB_WORKERS", "2")))
+
+
+def get_job_poll_interval() -> float:
+    return float(os.getenv("EXEGOL_JOB_POLL_INTERVAL", "0.5"))
+
+
+def get_job_stale_seconds() -> float:
+    return float(os.getenv("EXEGOL_JOB_STALE_SECONDS", "30"))
+
+
+def get_job_worker_idle_seconds() -> float:
+    return float(os.getenv("EXEGOL_JOB_WORKER_IDLE_SECONDS", "300"))
+
+
+def get_audit_concurrency() -> int:
+    return max(1, int(os.getenv("EXEGOL_AUDIT_CONCURRENCY", "4")))
+
+
+def get_log_mode() -> str:
+    return os.getenv("EXEGOL_LOG_MODE", "sync").strip().lower()
+
+
+def get_log_flush_interval() -> float:
+    return float(os.getenv("EXEGOL_LOG_FLUSH_INTERVAL", "0.5"))
+
+
+def get_log_batch_size() -> int:
+    return int(os.getenv("EXEGOL_LOG_BATCH_SIZE", "256"))
+
+
+def get_log_rotate_bytes() -> int:
+    return int(os.getenv("EXEGOL_LOG_ROTATE_BYTES", str(5 * 1024 * 1024)))
+
+
+def get_log_rotate_seconds() -> int:
+    return int(os.getenv("EXEGOL_LOG_ROTATE_SECONDS", "3600"))
+
+
+def get_log_compress() -> bool:
+    return os.getenv("EXEGOL_LOG_COMPRESS", "1").strip().lower() not in {"0", "false", "no"}
+
+
+def get_metrics_persist_interval() -> float:
+    return float(os.getenv("EXEGOL_METRICS_PERSIST_INTERVAL", "10"))
+
+
+def get_state_backend() -> str:
+    return os.getenv("EXEGOL_STATE_BACKEND", "json").strip().lower()
+
+
+def get_state_journal_max_bytes() -> int:
+    return int(os.getenv("EXEGOL_STATE_JOURNAL_MAX_BYTES", str(1024 * 1024)))
+
+
+def _retention_setting(collection: str, setting: str, default: str) -> Optional[float]:
+    specific = f"EXEGOL_RETENTION_{collection.upper()}_{setting}"
+    value = os.getenv(specific, os.getenv(f"EXEGOL_RETENTION_{setting}", default))
+    value = value.strip()
+    if not value or float(value) <= 0:
+        return None
+    return float(value)
+
+
+def get_retention_max_entries(collection: str) -> Optional[int]:
+    value = _retention_setting(collection, "MAX_ENTRIES", "1000")
+    return int(value) if value is not None else None
+
+
+def get_retention_max_age_days(collection: str) -> Optional[float]:
+    return _retention_setting(collection, "MAX_AGE_DAYS", "0")
+
+
 def ensure_directories() -> None:
     for path in (get_state_dir(), get_log_dir(), get_workspace_dir()):
         path.mkdir(parents=True, exist_ok=True)
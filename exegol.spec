@@ -15,7 +15,7 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=datas,
-    hiddenimports=[],
+    hiddenimports=["job_worker"],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
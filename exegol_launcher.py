@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import multiprocessing
 import os
 import sys
 
@@ -7,6 +8,19 @@ from streamlit.web import cli as stcli
 
 
 def main() -> None:
+    # In the packaged build, spawned multiprocessing children (the local
+    # runner's pool) re-run this executable; this turns them into workers
+    # instead of starting another dashboard.
+    multiprocessing.freeze_support()
+    if len(sys.argv) > 1 and sys.argv[1] == "--job-worker":
+        # The packaged build ships no job_worker.py to run, so ensure_workers()
+        # starts this executable with --job-worker instead.
+        from job_worker import main as job_worker_main
+
+        sys.argv = [sys.argv[0], *sys.argv[2:]]
+        job_worker_main()
+        return
+    os.environ.setdefault("EXEGOL_LOG_MODE", "async")
     script_path = os.path.join(os.path.dirname(__file__), "ui_dashboard.py")
     sys.argv = ["streamlit", "run", script_path]
     stcli.main()
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
+
+
+_held = threading.local()
+
+
+def _lock_handle(handle) -> None:
+    if fcntl is not None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        return
+    while True:  # pragma: no cover - Windows
+        try:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+            return
+        except OSError:
+            time.sleep(0.01)
+
+
+def _try_lock_handle(handle) -> bool:
+    if fcntl is not None:
+        try:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        return True
+    try:  # pragma: no cover - Windows
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:  # pragma: no cover - Windows
+        return False
+    return True  # pragma: no cover - Windows
+
+
+def _unlock_handle(handle) -> None:
+    if fcntl is not None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+        return
+    handle.seek(0)  # pragma: no cover - Windows
+    msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)  # pragma: no cover
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    # Exclusive lock shared by threads and processes. Re-acquiring a lock the
+    # current thread already holds is a no-op so locked helpers can nest.
+    depths: Dict[str, int] = getattr(_held, "depths", None) or {}
+    _held.depths = depths
+    key = str(path)
+    if depths.get(key):
+        depths[key] += 1
+        try:
+            yield
+        finally:
+            depths[key] -= 1
+        return
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a+b") as handle:
+        _lock_handle(handle)
+        depths[key] = 1
+        try:
+            yield
+        finally:
+            depths[key] = 0
+            _unlock_handle(handle)
+
+
+def hold_lock(path: Path):
+    # Locks `path` for as long as the returned handle stays open, typically
+    # the life of the process, so others can tell the holder is alive with
+    # lock_is_free().
+    path.parent.mkdir(parents=True, exist_ok=True)
+    handle = open(path, "a+b")
+    _lock_handle(handle)
+    return handle
+
+
+@contextmanager
+def lock_is_free(path: Path) -> Iterator[bool]:
+    # Yields True while holding the lock if nobody else held it, False
+    # otherwise; never waits.
+    try:
+        handle = open(path, "a+b")
+    except OSError:
+        yield False
+        return
+    with handle:
+        acquired = _try_lock_handle(handle)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                _unlock_handle(handle)
+
+
+def atomic_write_text(path: Path, content: str) -> None:
+    temp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with temp_path.open("w", encoding="utf-8") as handle:
+        handle.write(content)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temp_path, path)
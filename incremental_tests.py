@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import ast
+import hashlib
+import json
+import os
+import shlex
+from collections import defaultdict
+from pathlib import Path, PurePosixPath
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from git import Repo
+from git.exc import GitCommandError, InvalidGitRepositoryError, NoSuchPathError
+
+from config import get_state_dir
+from file_lock import atomic_write_text, file_lock
+from repo_pool import get_repo_pool
+from run_cache import IGNORED_PATHS, SKIPPED_DIRS, is_run_artifact
+
+
+# Picks the tests affected by what changed since the last successful audit.
+# Each repo has a record under state/test_selection/ holding the last audited
+# commit, a per-file import cache (reparsed only when a file's mtime moves)
+# and source -> test associations learned from commits that touched both.
+# Anything the selection can't reason about falls back to the full suite.
+
+FULL_RUN_FILES = {
+    "conftest.py",
+    "pytest.ini",
+    "pyproject.toml",
+    "setup.cfg",
+    "setup.py",
+    "tox.ini",
+}
+IGNORED_SUFFIXES = {".md", ".rst"}
+MAX_LEARNED_COMMITS = 200
+
+
+def is_test_file(path: str) -> bool:
+    name = PurePosixPath(path).name
+    return name.endswith(".py") and (name.startswith("test_") or name.endswith("_test.py"))
+
+
+def _record_path(repo_path: Path) -> Path:
+    digest = hashlib.sha1(str(repo_path.resolve()).encode("utf-8")).hexdigest()[:16]
+    return get_state_dir() / "test_selection" / f"{digest}.json"
+
+
+def load_record(repo_path: Path) -> Dict[str, Any]:
+    try:
+        record = json.loads(_record_path(repo_path).read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        record = {}
+    record.setdefault("last_commit", None)
+    record.setdefault("imports", {})
+    record.setdefault("co_changes", {})
+    return record
+
+
+def _save_record(repo_path: Path, record: Dict[str, Any]) -> None:
+    path = _record_path(repo_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write_text(path, json.dumps(record))
+
+
+def _candidates(parts: Tuple[str, ...]) -> List[str]:
+    base = "/".join(parts)
+    return [f"{base}.py", f"{base}/__init__.py"] if base else []
+
+
+def _imports(source: str, relative_path: str) -> List[str]:
+    # Every repo-relative path an import could refer to. Unresolvable guesses
+    # are harmless: they only matter if a changed file has that path.
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return []
+    package = PurePosixPath(relative_path).parent.parts
+    roots = [(), ("src",), package]
+    found: Set[str] = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                parts = tuple(alias.name.split("."))
+                for root in roots:
+                    found.update(_candidates(root + parts))
+        elif isinstance(node, ast.ImportFrom):
+            module = tuple(node.module.split(".")) if node.module else ()
+            if node.level:
+                bases = [package[: len(package) - (node.level - 1)]]
+            else:
+                bases = roots
+            for base in bases:
+                found.update(_candidates(base + module))
+                for alias in node.names:
+                    found.update(_candidates(base + module + (alias.name,)))
+    return sorted(found)
+
+
+def _python_files(root: Path) -> Iterator[Path]:
+    for directory, dirnames, filenames in os.walk(root):
+        dirnames[:] = [
+            name for name in dirnames if not name.startswith(".") and name not in SKIPPED_DIRS
+        ]
+        for filename in filenames:
+            if filename.endswith(".py"):
+                yield Path(directory) / filename
+
+
+def _import_graph(root: Path, record: Dict[str, Any]) -> Dict[str, List[str]]:
+    cached = record["imports"]
+    fresh = {}
+    for path in _python_files(root):
+        relative = path.relative_to(root).as_posix()
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            continue
+        entry = cached.get(relative)
+        if entry is None or entry["mtime"] != mtime:
+            try:
+                source = path.read_text(encoding="utf-8")
+            except (OSError, UnicodeDecodeError):
+                source = ""
+            entry = {"mtime": mtime, "imports": _imports(source, relative)}
+        fresh[relative] = entry
+    record["imports"] = fresh
+    return {relative: entry["imports"] for relative, entry in fresh.items()}
+
+
+def _changed_files(repo: Repo, since: str) -> Set[str]:
+    changed = set(repo.git.diff("--name-only", since, "HEAD").splitlines())
+    changed.update(repo.git.diff("--name-only", "HEAD").splitlines())
+    changed.update(path for path in repo.untracked_files if not is_run_artifact(path))
+    return {path for path in changed if path and path not in IGNORED_PATHS}
+
+
+def _full_run_reason(changed: Set[str]) -> Optional[str]:
+    for path in sorted(changed):
+        name = PurePosixPath(path).name
+        if name in FULL_RUN_FILES or name.startswith("requirements"):
+            return f"{path} changed"
+        suffix = PurePosixPath(path).suffix
+        if suffix != ".py" and suffix not in IGNORED_SUFFIXES:
+            return f"non-Python file {path} changed"
+    return None
+
+
+def _affected_tests(
+    changed: Set[str], graph: Dict[str, List[str]], co_changes: Dict[str, List[str]]
+) -> List[str]:
+    dependents = defaultdict(set)
+    for path, imports in graph.items():
+        for target in imports:
+            dependents[target].add(path)
+    seen = set(changed)
+    queue = list(changed)
+    while queue:
+        for dependent in dependents.get(queue.pop(), ()):
+            if dependent not in seen:
+                seen.add(dependent)
+                queue.append(dependent)
+    for path in changed:
+        seen.update(co_changes.get(path, ()))
+    return sorted(path for path in seen if is_test_file(path) and path in graph)
+
+
+def _is_pytest(command: str) -> bool:
+    try:
+        words = shlex.split(command)
+    except ValueError:
+        return False
+    return "pytest" in words[:3]
+
+
+def _select(repo: Repo, repo_path: Path, command: str, selection: Dict[str, Any]) -> None:
+    try:
+        selection["head"] = repo.head.commit.hexsha
+    except ValueError:
+        selection["reason"] = "no commits yet"
+        return
+    if not _is_pytest(command):
+        selection["reason"] = "command is not pytest"
+        return
+    record = load_record(repo_path)
+    if record["last_commit"] is None:
+        selection["reason"] = "no previous successful audit"
+        return
+    try:
+        changed = _changed_files(repo, record["last_commit"])
+    except GitCommandError:
+        selection["reason"] = "last audited commit not found"
+        return
+    reason = _full_run_reason(changed)
+    if reason is not None:
+        selection["reason"] = reason
+        return
+
+    graph = _import_graph(repo_path, record)
+    _save_record(repo_path, record)
+    tests = _affected_tests(changed, graph, record["co_changes"])
+    selection["selection"] = "incremental"
+    selection["tests"] = tests
+    selection["command"] = " ".join([command, *(shlex.quote(test) for test in tests)])
+    selection["reason"] = f"{len(changed)} changed files"
+
+
+def select_tests(repo_path: Path, command: str) -> Dict[str, Any]:
+    # Returns the command to run plus how it was chosen: "full" with a reason,
+    # or "incremental" with the selected test files (possibly none).
+    selection: Dict[str, Any] = {
+        "selection": "full",
+        "command": command,
+        "tests": [],
+        "reason": None,
+        "head": None,
+    }
+    try:
+        with get_repo_pool().lease(repo_path) as repo, file_lock(
+            _record_path(repo_path).with_suffix(".lock")
+        ):
+            _select(repo, repo_path, command, selection)
+    except (InvalidGitRepositoryError, NoSuchPathError):
+        selection["reason"] = "not a git repository"
+    return selection
+
+
+def _learn_co_changes(repo: Repo, since: str, head: str, co_changes: Dict[str, List[str]]) -> None:
+    for commit in repo.iter_commits(f"{since}..{head}", max_count=MAX_LEARNED_COMMITS):
+        files = list(commit.stats.files)
+        tests = {path for path in files if is_test_file(path)}
+        if not tests:
+            continue
+        for path in files:
+            if path.endswith(".py") and path not in tests:
+                co_changes[path] = sorted(tests.union(co_changes.get(path, ())))
+
+
+def record_run(repo_path: Path, status: Optional[str], head: Optional[str] = None) -> None:
+    # A successful run covers everything up to its commit; it becomes the base
+    # for the next incremental selection.
+    if status != "success":
+        return
+    try:
+        with get_repo_pool().lease(repo_path) as repo, file_lock(
+            _record_path(repo_path).with_suffix(".lock")
+        ):
+            try:
+                head = head or repo.head.commit.hexsha
+            except ValueError:
+                return
+            record = load_record(repo_path)
+            previous = record["last_commit"]
+            if previous is not None and previous != head:
+                try:
+                    _learn_co_changes(repo, previous, head, record["co_changes"])
+                except GitCommandError:
+                    pass
+            record["last_commit"] = head
+            _save_record(repo_path, record)
+    except (InvalidGitRepositoryError, NoSuchPathError):
+        return
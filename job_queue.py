@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import time
+import uuid
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import get_state_dir
+from file_lock import file_lock
+from observability import log_event
+
+
+# Durable queue of approved actions, consumed by job_worker processes. Jobs
+# live in state/jobs.db and move queued -> running -> succeeded | failed.
+# A worker claims a job atomically and heartbeats it while it runs; a running
+# job whose heartbeat goes stale belonged to a worker that died and is failed
+# rather than retried, since actions such as commits are not idempotent.
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+_initialized: set = set()
+
+
+def _db_path() -> Path:
+    return get_state_dir() / "jobs.db"
+
+
+def connect() -> sqlite3.Connection:
+    path = _db_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(str(path), timeout=30, isolation_level=None)
+    connection.execute("PRAGMA busy_timeout=30000")
+    if str(path) not in _initialized:
+        with file_lock(path.with_name(f"{path.name}.init.lock")):
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "id TEXT NOT NULL UNIQUE, "
+                "request_id TEXT, "
+                "status TEXT NOT NULL, "
+                "worker TEXT, "
+                "enqueued_at REAL NOT NULL, "
+                "started_at REAL, "
+                "heartbeat_at REAL, "
+                "finished_at REAL, "
+                "data TEXT NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status)")
+        _initialized.add(str(path))
+    return connection
+
+
+def _row_to_job(row: sqlite3.Row) -> Dict[str, Any]:
+    job = json.loads(row["data"])
+    job.update(
+        {
+            "id": row["id"],
+            "request_id": row["request_id"],
+            "status": row["status"],
+            "worker": row["worker"],
+            "enqueued_at": row["enqueued_at"],
+            "started_at": row["started_at"],
+            "heartbeat_at": row["heartbeat_at"],
+            "finished_at": row["finished_at"],
+        }
+    )
+    return job
+
+
+def enqueue(
+    action: Dict[str, Any],
+    request_id: Optional[str] = None,
+    trace: Optional[Dict[str, str]] = None,
+) -> str:
+    return enqueue_many([(action, request_id, trace)])[0]
+
+
+def enqueue_many(
+    items: List[Tuple[Dict[str, Any], Optional[str], Optional[Dict[str, str]]]]
+) -> List[str]:
+    # Queues (action, request_id, trace) items in one transaction, in order.
+    now = time.time()
+    rows = []
+    for action, request_id, trace in items:
+        data = {"action": action, "trace": trace, "result": None, "error": None}
+        rows.append((uuid.uuid4().hex, request_id, QUEUED, now, json.dumps(data)))
+    with closing(connect()) as connection:
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.executemany(
+                "INSERT INTO jobs (id, request_id, status, enqueued_at, data) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+    for (action, request_id, _), row in zip(items, rows):
+        log_event(
+            "job_enqueued",
+            {"job_id": row[0], "request_id": request_id, "action_type": action.get("action_type")},
+        )
+    return [row[0] for row in rows]
+
+
+def claim(worker: str) -> Optional[Dict[str, Any]]:
+    # BEGIN IMMEDIATE takes the write lock up front, so two workers can never
+    # both see the same job as queued.
+    with closing(connect()) as connection:
+        connection.row_factory = sqlite3.Row
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY seq LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row is None:
+                connection.execute("COMMIT")
+                return None
+            now = time.time()
+            connection.execute(
+                "UPDATE jobs SET status = ?, worker = ?, started_at = ?, heartbeat_at = ? "
+                "WHERE id = ?",
+                (RUNNING, worker, now, now, row["id"]),
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+    job = _row_to_job(row)
+    job.update({"status": RUNNING, "worker": worker, "started_at": now, "heartbeat_at": now})
+    return job
+
+
+def heartbeat(job_id: str) -> None:
+    with closing(connect()) as connection:
+        connection.execute(
+            "UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND status = ?",
+            (time.time(), job_id, RUNNING),
+        )
+
+
+def _finish(job_id: str, status: str, result: Any, error: Optional[str]) -> bool:
+    # Only a running job can finish; one already failed by reap_stale stays
+    # failed even if its worker turns out to have been merely slow.
+    with closing(connect()) as connection:
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT data FROM jobs WHERE id = ? AND status = ?", (job_id, RUNNING)
+            ).fetchone()
+            if row is not None:
+                data = json.loads(row[0])
+                data.update({"result": result, "error": error})
+                connection.execute(
+                    "UPDATE jobs SET status = ?, finished_at = ?, data = ? WHERE id = ?",
+                    (status, time.time(), json.dumps(data), job_id),
+                )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+    if row is None:
+        return False
+    log_event("job_finished", {"job_id": job_id, "status": status, "error": error})
+    return True
+
+
+def complete(job_id: str, result: Any = None) -> bool:
+    return _finish(job_id, SUCCEEDED, result, None)
+
+
+def fail(job_id: str, error: str) -> bool:
+    return _finish(job_id, FAILED, None, error)
+
+
+def reap_stale(stale_seconds: float) -> List[Dict[str, Any]]:
+    # Fails running jobs that stopped heartbeating and returns them, so the
+    # caller can report the failure on their permission requests.
+    cutoff = time.time() - stale_seconds
+    with closing(connect()) as connection:
+        connection.row_factory = sqlite3.Row
+        rows = connection.execute(
+            "SELECT * FROM jobs WHERE status = ? AND heartbeat_at < ?", (RUNNING, cutoff)
+        ).fetchall()
+    reaped = []
+    for row in rows:
+        job = _row_to_job(row)
+        error = f"Worker {job['worker']} stopped before the job finished"
+        with closing(connect()) as connection:
+            changed = connection.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, data = ? "
+                "WHERE id = ? AND status = ? AND heartbeat_at < ?",
+                (
+                    FAILED,
+                    time.time(),
+                    json.dumps({**json.loads(row["data"]), "error": error}),
+                    job["id"],
+                    RUNNING,
+                    cutoff,
+                ),
+            ).rowcount
+        if changed:
+            job.update({"status": FAILED, "error": error})
+            reaped.append(job)
+            log_event("job_reaped", {"job_id": job["id"], "worker": job["worker"]})
+    return reaped
+
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    with closing(connect()) as connection:
+        connection.row_factory = sqlite3.Row
+        row = connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return _row_to_job(row) if row is not None else None
+
+
+def list_jobs(limit: int = 50, status: Optional[str] = None) -> List[Dict[str, Any]]:
+    query = "SELECT * FROM jobs"
+    params: List[Any] = []
+    if status is not None:
+        query += " WHERE status = ?"
+        params.append(status)
+    query += " ORDER BY seq DESC LIMIT ?"
+    params.append(limit)
+    with closing(connect()) as connection:
+        connection.row_factory = sqlite3.Row
+        rows = connection.execute(query, params).fetchall()
+    return [_row_to_job(row) for row in rows]
+
+
+def counts() -> Dict[str, int]:
+    with closing(connect()) as connection:
+        rows = connection.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+    return {status: count for status, count in rows}
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import job_queue
+from config import (
+    get_job_poll_interval,
+    get_job_stale_seconds,
+    get_job_worker_idle_seconds,
+    get_job_workers,
+    get_log_dir,
+    get_state_dir,
+)
+from file_lock import file_lock
+from models import ActionRequest
+from observability import log_event, use_trace
+from state_store import append_activity, transaction, update_permission_request
+from workspace_execution import WorkspaceExecutor
+
+
+# Executes approved actions from job_queue outside the dashboard process, so
+# a long test run never blocks the UI and approvals run side by side. Each
+# worker keeps a heartbeat file under state/job_workers/ that ensure_workers()
+# counts, and exits once it has been idle for EXEGOL_JOB_WORKER_IDLE_SECONDS.
+# Run one by hand with `python job_worker.py`.
+
+ACTIVITY_METADATA = {
+    "component": "Inquisitor",
+    "location": "job_worker.py",
+    "llm_used": "none",
+}
+
+
+def _workers_dir() -> Path:
+    return get_state_dir() / "job_workers"
+
+
+def _heartbeat_interval() -> float:
+    return max(0.2, get_job_stale_seconds() / 3)
+
+
+def _touch_worker(pid: int) -> None:
+    path = _workers_dir() / f"{pid}.pid"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(str(pid), encoding="utf-8")
+
+
+def live_workers() -> List[int]:
+    # A worker counts as alive while its heartbeat file is fresh; files left
+    # behind by workers that died are removed.
+    cutoff = time.time() - get_job_stale_seconds()
+    alive = []
+    for path in _workers_dir().glob("*.pid"):
+        try:
+            if path.stat().st_mtime >= cutoff:
+                alive.append(int(path.stem))
+            else:
+                path.unlink()
+        except (FileNotFoundError, ValueError):
+            continue
+    return sorted(alive)
+
+
+class _Heartbeat(threading.Thread):
+    def __init__(self) -> None:
+        super().__init__(name="exegol-job-heartbeat", daemon=True)
+        self.job_id: Optional[str] = None
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(_heartbeat_interval()):
+            _touch_worker(os.getpid())
+            job_id = self.job_id
+            if job_id is not None:
+                job_queue.heartbeat(job_id)
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+
+def _report(job: Dict[str, Any], fields: Dict[str, Any], message: str) -> None:
+    request_id = job.get("request_id")
+    with transaction():
+        if request_id:
+            update_permission_request(request_id, "approved", {"job_id": job["id"], **fields})
+        append_activity(message, {**ACTIVITY_METADATA, "job_id": job["id"]})
+
+
+def process_job(executor: WorkspaceExecutor, job: Dict[str, Any]) -> None:
+    with use_trace(job.get("trace")):
+        _report(job, {"execution": job_queue.RUNNING}, "Approved action started")
+        try:
+            with transaction():
+                result = executor.execute_action(ActionRequest(**job["action"]))
+        except Exception as exc:
+            if job_queue.fail(job["id"], str(exc)):
+                _report(
+                    job,
+                    {"execution": job_queue.FAILED, "error": str(exc)},
+                    "Approved action failed",
+                )
+            return
+        if job_queue.complete(job["id"], result):
+            _report(
+                job,
+                {"execution": job_queue.SUCCEEDED, "result": result},
+                "Permission approved and action executed",
+            )
+
+
+def _reap() -> None:
+    for job in job_queue.reap_stale(get_job_stale_seconds()):
+        with use_trace(job.get("trace")):
+            _report(
+                job,
+                {"execution": job_queue.FAILED, "error": job["error"]},
+                "Approved action failed",
+            )
+
+
+def run_worker(
+    max_jobs: Optional[int] = None, idle_seconds: Optional[float] = None
+) -> int:
+    # Processes jobs until max_jobs have run or the queue has stayed empty
+    # for idle_seconds; returns how many jobs were processed.
+    idle_seconds = get_job_worker_idle_seconds() if idle_seconds is None else idle_seconds
+    poll_interval = get_job_poll_interval()
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    executor = WorkspaceExecutor()
+    heartbeat = _Heartbeat()
+    processed = 0
+    _touch_worker(os.getpid())
+    heartbeat.start()
+    log_event("job_worker_started", {"worker": worker})
+    try:
+        idle_since = time.monotonic()
+        while max_jobs is None or processed < max_jobs:
+            _reap()
+            job = job_queue.claim(worker)
+            if job is None:
+                if time.monotonic() - idle_since >= idle_seconds:
+                    break
+                time.sleep(poll_interval)
+                continue
+            heartbeat.job_id = job["id"]
+            try:
+                process_job(executor, job)
+            finally:
+                heartbeat.job_id = None
+            processed += 1
+            idle_since = time.monotonic()
+    finally:
+        heartbeat.stop()
+        (_workers_dir() / f"{os.getpid()}.pid").unlink(missing_ok=True)
+        log_event("job_worker_stopped", {"worker": worker, "processed": processed})
+    return processed
+
+
+def _worker_command() -> List[str]:
+    # In the packaged build sys.executable is the launcher and the .py
+    # sources aren't shipped; the launcher runs a worker given --job-worker.
+    if getattr(sys, "frozen", False):
+        return [sys.executable, "--job-worker"]
+    return [sys.executable, str(Path(__file__).resolve())]
+
+
+def ensure_workers(count: Optional[int] = None) -> int:
+    # Starts worker processes until `count` are alive and returns how many
+    # were started. The spawner writes each new worker's heartbeat file itself
+    # so a dashboard rerun a moment later doesn't start duplicates.
+    count = get_job_workers() if count is None else count
+    _workers_dir().mkdir(parents=True, exist_ok=True)
+    with file_lock(_workers_dir() / "spawn.lock"):
+        missing = count - len(live_workers())
+        if missing <= 0:
+            return 0
+        log_path = get_log_dir() / "job_worker.log"
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        for _ in range(missing):
+            with log_path.open("ab") as log_file:
+                process = subprocess.Popen(
+                    _worker_command(),
+                    cwd=str(Path(__file__).resolve().parent),
+                    stdin=subprocess.DEVNULL,
+                    stdout=log_file,
+                    stderr=subprocess.STDOUT,
+                    start_new_session=True,
+                    creationflags=getattr(subprocess, "CREATE_NEW_PROCESS_GROUP", 0),
+                )
+            _touch_worker(process.pid)
+        log_event("job_workers_started", {"started": missing, "target": count})
+    return missing
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run Exegol approved-action jobs.")
+    parser.add_argument("--max-jobs", type=int, default=None)
+    parser.add_argument("--idle-seconds", type=float, default=None)
+    args = parser.parse_args()
+    run_worker(max_jobs=args.max_jobs, idle_seconds=args.idle_seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 @echo off
 setlocal
 set ROOT=%~dp0
+if not defined EXEGOL_LOG_MODE set EXEGOL_LOG_MODE=async
 
 if exist "%ROOT%dist\exegol\exegol.exe" (
   start "" "%ROOT%dist\exegol\exegol.exe"
@@ -3,6 +3,9 @@ param(
 )
 
 $Root = Split-Path -Parent $MyInvocation.MyCommand.Path
+if (-not $env:EXEGOL_LOG_MODE) {
+    $env:EXEGOL_LOG_MODE = "async"
+}
 $ExePath = Join-Path $Root "dist\exegol\exegol.exe"
 
 if (Test-Path $ExePath) {
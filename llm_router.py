@@ -3,6 +3,7 @@ from __future__ import annotations
 import time
 from typing import Literal
 
+import metrics
 from models import LLMDecision
 from observability import log_event
 
@@ -30,6 +31,7 @@ def route_prompt(prompt: str, intent: str) -> LLMDecision:
         reason=reason,
         latency_ms=round(latency_ms, 2),
     )
+    metrics.registry.record("llm_routing", latency_ms, {"provider": provider})
     log_event(
         "llm_routing",
         {
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import atexit
+import multiprocessing
+import os
+import signal
+import subprocess
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, Optional
+
+from config import (
+    get_local_cpu_seconds,
+    get_local_memory_mb,
+    get_local_workers,
+    get_test_timeout,
+)
+from observability import current_trace, use_trace
+from sandbox import RunGuard, RunOutput, new_run_id
+
+
+# Runs test commands as plain subprocesses in the repo directory. Each run
+# executes inside a worker of a shared process pool, which bounds how many
+# suites run at once and keeps output streaming and the timeout watchdog out
+# of the caller's process.
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _with_limits(command: str, cpu_seconds: Optional[int], memory_mb: Optional[int]) -> str:
+    # The shell applies the limits with ulimit before running the command,
+    # rather than a preexec_fn, which isn't safe in a worker that may have
+    # threads running (the async ops log writer).
+    lines = []
+    if cpu_seconds:
+        lines.append(f"ulimit -t {cpu_seconds} || exit 126")
+    if memory_mb:
+        lines.append(f"ulimit -v {memory_mb * 1024} || exit 126")
+    return "\n".join(lines + [command])
+
+
+def _kill(process: subprocess.Popen) -> None:
+    if process.poll() is not None:
+        return
+    if os.name == "posix":
+        os.killpg(process.pid, signal.SIGKILL)
+    else:  # pragma: no cover - Windows
+        process.kill()
+
+
+def _sync_environment(environment: Dict[str, str]) -> None:
+    # Pool workers outlive the call that started them; take the caller's
+    # EXEGOL_* settings so state, log and limit paths match this run.
+    for key in [key for key in os.environ if key.startswith("EXEGOL_")]:
+        if key not in environment:
+            del os.environ[key]
+    os.environ.update(environment)
+
+
+def _run_in_worker(
+    repo_path: str,
+    command: str,
+    run_id: str,
+    timeout: float,
+    environment: Dict[str, str],
+    trace: Optional[Dict[str, str]] = None,
+) -> Dict[str, object]:
+    _sync_environment(environment)
+    with use_trace(trace):
+        return _run(repo_path, command, run_id, timeout)
+
+
+def _run(repo_path: str, command: str, run_id: str, timeout: float) -> Dict[str, object]:
+    shell_command = command
+    if os.name == "posix":
+        shell_command = _with_limits(command, get_local_cpu_seconds(), get_local_memory_mb())
+
+    process = subprocess.Popen(
+        shell_command,
+        shell=True,
+        cwd=repo_path,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        stdin=subprocess.DEVNULL,
+        start_new_session=os.name == "posix",
+    )
+    try:
+        output = RunOutput(run_id, Path(repo_path))
+    except Exception:
+        _kill(process)
+        process.stdout.close()
+        process.wait()
+        raise
+    guard = RunGuard(run_id, Path(repo_path), command, "local", lambda: _kill(process), timeout)
+    try:
+        with guard:
+            for chunk in iter(lambda: process.stdout.read1(65536), b""):
+                output.write(chunk)
+            exit_code = process.wait()
+    finally:
+        output.close()
+
+    if guard.outcome is not None:
+        status, exit_code = guard.outcome, None
+    else:
+        status = "success" if exit_code == 0 else "failed"
+    return {
+        "status": status,
+        "exit_code": exit_code,
+        "run_id": run_id,
+        "timeout_s": guard.timeout,
+        "output_path": str(output.path),
+        "output_bytes": output.bytes_written,
+        "output_tail": output.tail(),
+        "command": command,
+        "repo_path": repo_path,
+        "runner": "local",
+    }
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=get_local_workers(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not pool:
+            return
+        _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def run_local(
+    repo_path: Path,
+    command: str,
+    run_id: Optional[str] = None,
+    timeout: Optional[float] = None,
+) -> Dict[str, object]:
+    environment = {key: value for key, value in os.environ.items() if key.startswith("EXEGOL_")}
+    pool = _get_pool()
+    try:
+        future = pool.submit(
+            _run_in_worker,
+            str(repo_path),
+            command,
+            run_id or new_run_id(),
+            timeout if timeout is not None else get_test_timeout(),
+            environment,
+            current_trace(),
+        )
+        return future.result()
+    except BrokenProcessPool:
+        # A worker died (crashed or OOM-killed) and the executor won't take
+        # more work; drop it so the next run starts a fresh pool.
+        _discard_pool(pool)
+        raise
+
+
+def shutdown_local_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+atexit.register(shutdown_local_pool)
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import shutil
+import time
+from collections import Counter
+from pathlib import Path
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+
+from config import get_log_compress, get_log_rotate_bytes, get_log_rotate_seconds
+from file_lock import atomic_write_text
+
+
+# Closed segments of ops.jsonl live in logs/segments/ next to a sidecar
+# index.json that records each segment's time range, per-event-type counts
+# and byte offsets within the overall log stream.
+
+_start_cache: Dict[Tuple[str, int], Tuple[Optional[float], int]] = {}
+
+
+def segment_dir(log_path: Path) -> Path:
+    return log_path.parent / "segments"
+
+
+def lock_path(log_path: Path) -> Path:
+    return log_path.with_suffix(".lock")
+
+
+def index_path(log_path: Path) -> Path:
+    return segment_dir(log_path) / "index.json"
+
+
+def load_index(log_path: Path) -> List[Dict[str, Any]]:
+    path = index_path(log_path)
+    if not path.exists():
+        return []
+    with path.open("r", encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def _first_timestamp(path: Path) -> Optional[float]:
+    with path.open("rb") as handle:
+        line = handle.readline()
+    try:
+        return float(json.loads(line)["timestamp"])
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def needs_rotation(log_path: Path, now: float) -> bool:
+    try:
+        stat = log_path.stat()
+    except FileNotFoundError:
+        return False
+    if stat.st_size == 0:
+        return False
+    max_bytes = get_log_rotate_bytes()
+    if max_bytes > 0 and stat.st_size >= max_bytes:
+        return True
+    interval = get_log_rotate_seconds()
+    if interval <= 0:
+        return False
+    # The active file only grows, so a smaller size than last seen means it
+    # was rotated (possibly by another process) and its start must be re-read.
+    key = (str(log_path), stat.st_ino)
+    cached = _start_cache.get(key)
+    if cached is None or stat.st_size < cached[1]:
+        start = _first_timestamp(log_path)
+    else:
+        start = cached[0]
+    _start_cache[key] = (start, stat.st_size)
+    if start is None:
+        return False
+    return int(start // interval) != int(now // interval)
+
+
+def _summarize(path: Path) -> Dict[str, Any]:
+    counts: Counter = Counter()
+    start_ts = end_ts = None
+    with path.open("rb") as handle:
+        for line in handle:
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            counts[event.get("event_type", "unknown")] += 1
+            timestamp = event.get("timestamp")
+            if timestamp is None:
+                continue
+            start_ts = timestamp if start_ts is None else min(start_ts, timestamp)
+            end_ts = timestamp if end_ts is None else max(end_ts, timestamp)
+    return {
+        "start_ts": start_ts,
+        "end_ts": end_ts,
+        "counts": dict(counts),
+        "events": sum(counts.values()),
+    }
+
+
+def rotate(log_path: Path) -> Optional[Dict[str, Any]]:
+    # Callers hold lock_path(log_path) so writers and other rotators wait.
+    try:
+        stat = log_path.stat()
+    except FileNotFoundError:
+        return None
+    summary = _summarize(log_path)
+    index = load_index(log_path)
+    stream_offset = index[-1]["stream_offset"] + index[-1]["bytes"] if index else 0
+    started = time.gmtime(summary["start_ts"] or stat.st_mtime)
+    name = f"ops-{time.strftime('%Y%m%dT%H%M%S', started)}-{len(index):06d}.jsonl"
+
+    directory = segment_dir(log_path)
+    directory.mkdir(parents=True, exist_ok=True)
+    compressed = get_log_compress()
+    if compressed:
+        name = f"{name}.gz"
+    target = directory / name
+    if compressed:
+        try:
+            with log_path.open("rb") as source, gzip.open(target, "wb") as sink:
+                shutil.copyfileobj(source, sink)
+        except OSError:
+            target.unlink(missing_ok=True)
+            raise
+
+    # The segment is indexed before the active file goes away, so a reader
+    # never sees ops.jsonl missing without the segment that replaced it.
+    entry = {
+        "file": name,
+        **summary,
+        "bytes": stat.st_size,
+        "stream_offset": stream_offset,
+        "compressed": compressed,
+    }
+    previous = json.dumps(index, indent=2)
+    index.append(entry)
+    atomic_write_text(index_path(log_path), json.dumps(index, indent=2))
+    try:
+        if compressed:
+            log_path.unlink()
+        else:
+            os.replace(log_path, target)
+    except OSError:
+        atomic_write_text(index_path(log_path), previous)
+        if compressed:
+            target.unlink(missing_ok=True)
+        raise
+    _start_cache.pop((str(log_path), stat.st_ino), None)
+    return entry
+
+
+def open_segment(log_path: Path, entry: Dict[str, Any]) -> IO[bytes]:
+    path = segment_dir(log_path) / entry["file"]
+    if entry.get("compressed"):
+        return gzip.open(path, "rb")
+    return path.open("rb")
+
+
+def iter_lines(handle: IO[bytes]) -> Iterator[Dict[str, Any]]:
+    for line in handle:
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            continue
@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import atexit
+import json
+import math
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from config import get_log_dir, get_metrics_persist_interval
+from file_lock import atomic_write_text, file_lock, hold_lock, lock_is_free
+
+
+# Data keys that become histogram tags. They are low-cardinality by design;
+# anything else in an event's data (paths, ids, messages) is not a tag.
+TAG_KEYS = ("mode", "runner", "provider", "action_type")
+
+_MIN_MS = 0.001
+_GROWTH = 1.05
+
+TagSet = Tuple[Tuple[str, str], ...]
+
+# Snapshots of processes that have exited are folded into this file, so the
+# number of files to merge tracks live processes rather than history.
+ROLLUP_NAME = "metrics-rollup.json"
+
+
+def extract_tags(data: Mapping[str, Any]) -> Dict[str, str]:
+    return {key: str(data[key]) for key in TAG_KEYS if data.get(key) is not None}
+
+
+class Histogram:
+    # Log-linear buckets with 5% relative width: percentiles are accurate to
+    # a few percent, and two histograms merge by adding bucket counts.
+
+    def __init__(self) -> None:
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.minimum = math.inf
+        self.maximum = 0.0
+
+    @staticmethod
+    def _bucket(value: float) -> int:
+        if value <= _MIN_MS:
+            return 0
+        return math.ceil(math.log(value / _MIN_MS, _GROWTH))
+
+    def record(self, value: float, error: bool = False) -> None:
+        bucket = self._bucket(value)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.errors += int(error)
+        self.total += value
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+
+    def merge(self, other: "Histogram") -> None:
+        for bucket, count in other.buckets.items():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+        self.count += other.count
+        self.errors += other.errors
+        self.total += other.total
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+
+    def percentile(self, quantile: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = quantile * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                value = _MIN_MS * _GROWTH**bucket
+                return round(min(max(value, self.minimum), self.maximum), 3)
+        return round(self.maximum, 3)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "error_rate": round(self.errors / self.count, 4) if self.count else 0.0,
+            "mean_ms": round(self.total / self.count, 3) if self.count else 0.0,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.maximum, 3),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "buckets": {str(bucket): count for bucket, count in self.buckets.items()},
+            "count": self.count,
+            "errors": self.errors,
+            "total": self.total,
+            "minimum": self.minimum if self.count else None,
+            "maximum": self.maximum,
+        }
+
+    @classmethod
+    def from_dict(cls, payload: Mapping[str, Any]) -> "Histogram":
+        histogram = cls()
+        histogram.buckets = {int(bucket): count for bucket, count in payload["buckets"].items()}
+        histogram.count = payload["count"]
+        histogram.errors = payload["errors"]
+        histogram.total = payload["total"]
+        minimum = payload.get("minimum")
+        histogram.minimum = math.inf if minimum is None else minimum
+        histogram.maximum = payload["maximum"]
+        return histogram
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, TagSet], Histogram] = {}
+        self._last_persist = time.monotonic()
+        self.snapshot_name = f"metrics-{os.getpid()}-{int(time.time())}.json"
+        self._liveness: Optional[Tuple[Path, Any]] = None
+
+    def record(
+        self,
+        event_type: str,
+        elapsed_ms: float,
+        tags: Optional[Mapping[str, str]] = None,
+        error: bool = False,
+    ) -> None:
+        key = (event_type, tuple(sorted((tags or {}).items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.record(elapsed_ms, error)
+            due = time.monotonic() - self._last_persist >= get_metrics_persist_interval()
+        if due:
+            try:
+                self.persist()
+            except OSError:
+                pass
+
+    def histograms(self) -> Dict[Tuple[str, TagSet], Histogram]:
+        with self._lock:
+            return {key: _copy(histogram) for key, histogram in self._histograms.items()}
+
+    def persist(self, directory: Optional[Path] = None) -> Optional[Path]:
+        with self._lock:
+            self._last_persist = time.monotonic()
+            if not self._histograms:
+                return None
+            payload = _serialize(self._histograms)
+        target_dir = directory or metrics_dir()
+        target_dir.mkdir(parents=True, exist_ok=True)
+        path = target_dir / self.snapshot_name
+        # The snapshot's lock stays held while this process lives; once it is
+        # free, compact_snapshots() may fold the snapshot into the rollup.
+        if self._liveness is None or self._liveness[0] != target_dir:
+            self._liveness = (target_dir, hold_lock(path.with_suffix(".lock")))
+        atomic_write_text(path, json.dumps(payload))
+        return path
+
+
+def _copy(histogram: Histogram) -> Histogram:
+    return Histogram.from_dict(histogram.to_dict())
+
+
+def _serialize(histograms: Mapping[Tuple[str, TagSet], Histogram]) -> List[Dict[str, Any]]:
+    return [
+        {"event_type": event_type, "tags": dict(tags), **histogram.to_dict()}
+        for (event_type, tags), histogram in histograms.items()
+    ]
+
+
+def metrics_dir() -> Path:
+    return get_log_dir() / "metrics"
+
+
+def _merge_into(
+    merged: Dict[Tuple[str, TagSet], Histogram], key: Tuple[str, TagSet], histogram: Histogram
+) -> None:
+    if key in merged:
+        merged[key].merge(histogram)
+    else:
+        merged[key] = histogram
+
+
+def _read_snapshot(path: Path) -> Dict[Tuple[str, TagSet], Histogram]:
+    histograms: Dict[Tuple[str, TagSet], Histogram] = {}
+    try:
+        entries = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return histograms
+    for entry in entries:
+        key = (entry["event_type"], tuple(sorted(entry["tags"].items())))
+        _merge_into(histograms, key, Histogram.from_dict(entry))
+    return histograms
+
+
+def compact_snapshots(directory: Optional[Path] = None) -> int:
+    # Folds snapshots whose process has exited into the rollup file and
+    # deletes them; returns how many were folded.
+    source = directory or metrics_dir()
+    if not source.exists():
+        return 0
+    with file_lock(source / "rollup.lock"):
+        rollup_path = source / ROLLUP_NAME
+        rollup = None
+        folded = []
+        for path in sorted(source.glob("metrics-*.json")):
+            if path.name in (ROLLUP_NAME, registry.snapshot_name):
+                continue
+            with lock_is_free(path.with_suffix(".lock")) as exited:
+                if not exited:
+                    continue
+                if rollup is None:
+                    rollup = _read_snapshot(rollup_path)
+                for key, histogram in _read_snapshot(path).items():
+                    _merge_into(rollup, key, histogram)
+                folded.append(path)
+        if rollup is None:
+            return 0
+        atomic_write_text(rollup_path, json.dumps(_serialize(rollup)))
+        for path in folded:
+            for stale in (path, path.with_suffix(".lock")):
+                try:
+                    stale.unlink(missing_ok=True)
+                except OSError:
+                    pass
+    return len(folded)
+
+
+def load_snapshots(
+    directory: Optional[Path] = None, include_live: bool = True
+) -> Dict[Tuple[str, TagSet], Histogram]:
+    # Each live process persists its own snapshot file and exited ones are
+    # rolled up; merging them gives the combined view across agents, workers
+    # and the dashboard. This process contributes its live registry instead
+    # of its possibly stale file.
+    merged: Dict[Tuple[str, TagSet], Histogram] = {}
+    source = directory or metrics_dir()
+    compact_snapshots(source)
+    if source.exists():
+        for path in sorted(source.glob("metrics-*.json")):
+            if include_live and path.name == registry.snapshot_name:
+                continue
+            for key, histogram in _read_snapshot(path).items():
+                _merge_into(merged, key, histogram)
+    if include_live:
+        for key, histogram in registry.histograms().items():
+            _merge_into(merged, key, histogram)
+    return merged
+
+
+def summarize(histograms: Mapping[Tuple[str, TagSet], Histogram]) -> List[Dict[str, Any]]:
+    rows = []
+    for (event_type, tags), histogram in sorted(histograms.items()):
+        rows.append(
+            {
+                "event_type": event_type,
+                "tags": ", ".join(f"{key}={value}" for key, value in tags),
+                **histogram.summary(),
+            }
+        )
+    return rows
+
+
+def _persist_at_exit() -> None:
+    try:
+        registry.persist()
+    except OSError:
+        pass
+
+
+registry = MetricsRegistry()
+atexit.register(_persist_at_exit)
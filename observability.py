@@ -1,23 +1,181 @@
 from __future__ import annotations
 
+import atexit
 import json
+import os
+import queue
+import threading
 import time
-from dataclasses import asdict
-from typing import Any, Dict, Optional
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
-from config import ensure_directories, get_log_dir
+import log_segments
+import metrics
+from config import get_log_batch_size, get_log_dir, get_log_flush_interval, get_log_mode
+from file_lock import file_lock
+
+
+_prepared_dirs: set = set()
+
+
+def _ops_log_path() -> Path:
+    log_dir = get_log_dir()
+    if log_dir not in _prepared_dirs:
+        log_dir.mkdir(parents=True, exist_ok=True)
+        _prepared_dirs.add(log_dir)
+    return log_dir / "ops.jsonl"
+
+
+def _append_lines(path: Path, lines: List[str]) -> None:
+    # Writers and rotation share a lock so no line lands in a segment after
+    # it was indexed; one write() per batch keeps lines whole.
+    with file_lock(log_segments.lock_path(path)):
+        try:
+            if log_segments.needs_rotation(path, time.time()):
+                log_segments.rotate(path)
+        except (OSError, ValueError):
+            # A failed rotation must not drop events; keep appending to the
+            # active file and retry on the next write.
+            pass
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, "".join(lines).encode("utf-8"))
+        finally:
+            os.close(fd)
+
+
+class _LogWriter:
+    def __init__(self) -> None:
+        self.mode: Optional[str] = None
+        self._queue: "queue.Queue[Tuple[Optional[Path], Any]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def current_mode(self) -> str:
+        return self.mode or get_log_mode()
+
+    def write(self, path: Path, line: str) -> None:
+        if self.current_mode() != "async":
+            _append_lines(path, [line])
+            return
+        self._ensure_thread()
+        self._queue.put((path, line))
+
+    def flush(self, timeout: Optional[float] = 5.0) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            return
+        done = threading.Event()
+        self._queue.put((None, done))
+        done.wait(timeout)
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._drain, name="exegol-log-writer", daemon=True
+                )
+                self._thread.start()
+
+    def _drain(self) -> None:
+        while True:
+            item = self._queue.get()
+            batch = [item]
+            deadline = time.monotonic() + get_log_flush_interval()
+            batch_size = get_log_batch_size()
+            while len(batch) < batch_size and item[0] is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(item)
+            self._write_batch(batch)
+
+    def _write_batch(self, batch: List[Tuple[Optional[Path], Any]]) -> None:
+        grouped: Dict[Path, List[str]] = defaultdict(list)
+        waiters = []
+        for path, value in batch:
+            if path is None:
+                waiters.append(value)
+            else:
+                grouped[path].append(value)
+        for path, lines in grouped.items():
+            try:
+                _append_lines(path, lines)
+            except OSError:
+                continue
+        for waiter in waiters:
+            waiter.set()
+
+
+_writer = _LogWriter()
+atexit.register(_writer.flush)
+
+
+def set_log_mode(mode: Optional[str]) -> None:
+    if mode not in (None, "sync", "async"):
+        raise ValueError(f"Unsupported log mode: {mode}")
+    if mode != "async":
+        _writer.flush()
+    _writer.mode = mode
+
+
+def flush_logs() -> None:
+    _writer.flush()
+
+
+# (trace_id, span_id) of the innermost open timer. Context variables follow
+# the call stack, and worker threads inherit them when started with a copied
+# context, so nested timers and events link to their parent span.
+_current_span: ContextVar[Optional[Tuple[str, str]]] = ContextVar(
+    "exegol_current_span", default=None
+)
+
+
+def _new_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def current_trace() -> Optional[Dict[str, str]]:
+    span = _current_span.get()
+    if span is None:
+        return None
+    return {"trace_id": span[0], "span_id": span[1]}
+
+
+@contextmanager
+def use_trace(trace: Optional[Dict[str, str]]) -> Iterator[None]:
+    # Resume a trace captured elsewhere, e.g. stored with a permission request
+    # and continued when the request is approved.
+    if not trace:
+        yield
+        return
+    token = _current_span.set((trace["trace_id"], trace["span_id"]))
+    try:
+        yield
+    finally:
+        _current_span.reset(token)
 
 
 def log_event(event_type: str, data: Dict[str, Any]) -> None:
-    ensure_directories()
     payload = {
         "event_type": event_type,
         "timestamp": time.time(),
         **data,
     }
-    log_path = get_log_dir() / "ops.jsonl"
-    with log_path.open("a", encoding="utf-8") as handle:
-        handle.write(json.dumps(payload) + "\n")
+    span = _current_span.get()
+    if span is not None and "span_id" not in payload:
+        payload["trace_id"] = span[0]
+        payload["parent_span_id"] = span[1]
+    _writer.write(_ops_log_path(), json.dumps(payload) + "\n")
 
 
 class timer:
@@ -25,19 +183,56 @@ class timer:
         self.event_type = event_type
         self.data = data or {}
         self.start = 0.0
+        self.start_ts = 0.0
+        self.trace_id = ""
+        self.span_id = ""
+        self.parent_span_id: Optional[str] = None
+        self._token = None
 
-    def __enter__(self):
+    def begin(self) -> "timer":
+        # begin()/finish() let a span outlive the block that opened it, e.g.
+        # a scheduled flow whose tasks finish on other threads. Pass
+        # trace_context() to use_trace() to parent work under it.
+        parent = _current_span.get()
+        self.trace_id = parent[0] if parent else _new_id()
+        self.parent_span_id = parent[1] if parent else None
+        self.span_id = _new_id()
+        self.start_ts = time.time()
         self.start = time.perf_counter()
         return self
 
-    def __exit__(self, exc_type, exc, tb):
+    def trace_context(self) -> Dict[str, str]:
+        return {"trace_id": self.trace_id, "span_id": self.span_id}
+
+    def finish(self, error: bool = False) -> None:
         elapsed_ms = (time.perf_counter() - self.start) * 1000
+        metrics.registry.record(
+            self.event_type,
+            elapsed_ms,
+            metrics.extract_tags(self.data),
+            error=error,
+        )
         log_event(
             self.event_type,
             {
                 **self.data,
                 "elapsed_ms": round(elapsed_ms, 2),
-                "status": "error" if exc else "ok",
+                "status": "error" if error else "ok",
+                "trace_id": self.trace_id,
+                "span_id": self.span_id,
+                "parent_span_id": self.parent_span_id,
+                "start_ts": self.start_ts,
+                "pid": os.getpid(),
+                "thread_id": threading.get_ident(),
             },
         )
+
+    def __enter__(self):
+        self.begin()
+        self._token = _current_span.set((self.trace_id, self.span_id))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self._token)
+        self.finish(error=exc is not None)
         return False
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from collections import deque
+from pathlib import Path
+from typing import IO, Any, Deque, Dict, List, Optional, Tuple
+
+import log_segments
+from config import get_log_dir
+from file_lock import file_lock
+
+
+def _ops_log_path() -> Path:
+    return get_log_dir() / "ops.jsonl"
+
+
+def _matches(
+    event: Dict[str, Any],
+    event_type: Optional[str],
+    since: Optional[float],
+    until: Optional[float],
+) -> bool:
+    if event_type is not None and event.get("event_type") != event_type:
+        return False
+    timestamp = event.get("timestamp", 0)
+    if since is not None and timestamp < since:
+        return False
+    if until is not None and timestamp > until:
+        return False
+    return True
+
+
+def query_events(
+    event_type: Optional[str] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    log_path: Optional[Path] = None,
+) -> List[Dict[str, Any]]:
+    # The segment index lets us skip closed segments outside the time range
+    # or without the requested event type; only the active file is always read.
+    path = log_path or _ops_log_path()
+    with file_lock(log_segments.lock_path(path)):
+        index = log_segments.load_index(path)
+        active = path.read_bytes() if path.exists() else b""
+
+    events = []
+    for entry in index:
+        if since is not None and entry.get("end_ts") is not None and entry["end_ts"] < since:
+            continue
+        if until is not None and entry.get("start_ts") is not None and entry["start_ts"] > until:
+            continue
+        if event_type is not None and not entry["counts"].get(event_type):
+            continue
+        with log_segments.open_segment(path, entry) as handle:
+            events.extend(
+                event
+                for event in log_segments.iter_lines(handle)
+                if _matches(event, event_type, since, until)
+            )
+    for line in active.splitlines():
+        try:
+            event = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if _matches(event, event_type, since, until):
+            events.append(event)
+    return events
+
+
+class OpsLogTailer:
+    def __init__(self, path: Optional[Path] = None, recent_limit: int = 5) -> None:
+        self._path_override = path
+        self._recent_limit = recent_limit
+        self._lock = threading.Lock()
+        self._path: Optional[Path] = None
+        self.reset()
+
+    def reset(self) -> None:
+        self.offset = 0
+        self.segments_seen: Optional[int] = None
+        self.index_stamp: Optional[Tuple[int, int]] = None
+        self.identity: Optional[Tuple[int, int]] = None
+        self.total_events = 0
+        self.routing_count = 0
+        self.latency_sum = 0.0
+        self.latency_count = 0
+        self.last_route: Optional[Dict[str, Any]] = None
+        self.recent: Deque[Dict[str, Any]] = deque(maxlen=self._recent_limit)
+
+    @property
+    def avg_routing_latency(self) -> float:
+        if not self.latency_count:
+            return 0.0
+        return round(self.latency_sum / self.latency_count, 2)
+
+    def _current_path(self) -> Path:
+        return self._path_override or _ops_log_path()
+
+    def poll(self) -> "OpsLogTailer":
+        with self._lock:
+            path = self._current_path()
+            if path != self._path:
+                self._path = path
+                self.reset()
+            # Every log_event waits on this lock, so only snapshot the index
+            # and open the active file under it; closed segments never change
+            # and the open handle keeps the active file's bytes readable even
+            # if it is rotated away before we parse it.
+            with file_lock(log_segments.lock_path(path)):
+                fresh = self.segments_seen is None
+                segments = self._unseen_segments(path)
+                try:
+                    handle: Optional[IO[bytes]] = path.open("rb")
+                except FileNotFoundError:
+                    handle = None
+            try:
+                self._drain_rotated_segments(path, segments, fresh)
+                if handle is None:
+                    # Removed and not recreated yet; keep what was counted.
+                    self.identity = None
+                    self.offset = 0
+                    return self
+                self._read_active(handle)
+            finally:
+                if handle is not None:
+                    handle.close()
+            return self
+
+    def _read_active(self, handle: IO[bytes]) -> None:
+        stat = os.fstat(handle.fileno())
+        identity = (stat.st_dev, stat.st_ino)
+        if self.identity is not None and identity != self.identity:
+            # A new file took the old one's place: keep the aggregates
+            # and read the new file from the start.
+            self.offset = 0
+        elif stat.st_size < self.offset:
+            # Same file, shorter than what was read: the log was truncated.
+            self.reset()
+        self.identity = identity
+
+        if stat.st_size > self.offset:
+            self._read_handle(handle)
+
+    def _unseen_segments(self, path: Path) -> List[Dict[str, Any]]:
+        try:
+            stat = log_segments.index_path(path).stat()
+            stamp = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            stamp = None
+        if stamp == self.index_stamp and self.segments_seen is not None:
+            return []
+        self.index_stamp = stamp
+        index = log_segments.load_index(path)
+        seen = self.segments_seen or 0
+        self.segments_seen = len(index)
+        return index[seen:]
+
+    def _drain_rotated_segments(
+        self, path: Path, segments: List[Dict[str, Any]], fresh: bool
+    ) -> None:
+        # Segments indexed since the last poll: the first one is the file this
+        # tailer was reading, so finish it from the current offset. Segments
+        # never read are taken from their index counts, and only opened for
+        # routing latencies and, for the newest one, the recent events. A
+        # fresh tailer starts from the full history this way.
+        for position, entry in enumerate(segments):
+            if position == 0 and not fresh and self.offset:
+                with log_segments.open_segment(path, entry) as handle:
+                    self._read_handle(handle)
+            else:
+                self._ingest_segment(path, entry, position == len(segments) - 1)
+            self.offset = 0
+        if segments:
+            self.identity = None
+
+    def _ingest_segment(self, path: Path, entry: Dict[str, Any], keep_recent: bool) -> None:
+        counts = entry.get("counts", {})
+        self.total_events += entry.get("events", sum(counts.values()))
+        routes = counts.get("llm_routing", 0)
+        self.routing_count += routes
+        if not routes and not keep_recent:
+            return
+        with log_segments.open_segment(path, entry) as handle:
+            for event in log_segments.iter_lines(handle):
+                if keep_recent:
+                    self.recent.append(event)
+                if event.get("event_type") == "llm_routing":
+                    self._ingest_route(event)
+
+    def _read_handle(self, handle: IO[bytes]) -> None:
+        handle.seek(self.offset)
+        chunk = handle.read()
+        # Only consume complete lines; a partially written line is picked up
+        # on the next poll.
+        end = chunk.rfind(b"\n")
+        if end < 0:
+            return
+        self.offset += end + 1
+        for line in chunk[: end + 1].splitlines():
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            self._ingest(event)
+
+    def _ingest(self, event: Dict[str, Any]) -> None:
+        self.total_events += 1
+        self.recent.append(event)
+        if event.get("event_type") != "llm_routing":
+            return
+        self.routing_count += 1
+        self._ingest_route(event)
+
+    def _ingest_route(self, event: Dict[str, Any]) -> None:
+        self.last_route = event
+        latency = event.get("latency_ms")
+        if latency is not None:
+            self.latency_sum += latency
+            self.latency_count += 1
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from models import AgentProfile
+
+
+# Compiles agent permissions from agents.md into lookup tables, so deciding
+# an action or picking an agent is a dict lookup rather than a scan.
+#
+# A permission is a colon-separated scope ("git:commit"), optionally followed
+# by ":requires-approval". A trailing "*" segment is a prefix rule covering
+# every scope below it ("git:*", or "*" for everything), and a "*" elsewhere
+# matches any single segment ("*:run"). When several permissions cover an
+# action, the most permissive wins.
+
+APPROVAL_FLAG = "requires-approval"
+WILDCARD = "*"
+
+
+@dataclass(frozen=True)
+class ActionRule:
+    scope: str
+    allowed: str
+    with_approval: str
+    denied: str
+
+
+# New action types only need an entry here.
+ACTION_RULES: Dict[str, ActionRule] = {
+    "git_commit": ActionRule(
+        "git:commit",
+        "Commit allowed.",
+        "Commit allowed with approval.",
+        "Commit not allowed; approval required.",
+    ),
+    "run_tests": ActionRule(
+        "tests:run",
+        "Test execution allowed.",
+        "Test execution requires approval.",
+        "Test execution not allowed; approval required.",
+    ),
+    "cursor_prompt": ActionRule(
+        "cursor:prompt",
+        "Cursor prompt allowed.",
+        "Cursor prompt requires approval.",
+        "Cursor prompt not allowed; approval required.",
+    ),
+}
+ACTION_RULES["git_commit_batch"] = ACTION_RULES["git_commit"]
+
+UNMATCHED = (True, "No matching permission found.")
+
+
+def _parse(permission: str) -> Tuple[Tuple[str, ...], bool]:
+    segments = tuple(permission.split(":"))
+    if len(segments) > 1 and segments[-1] == APPROVAL_FLAG:
+        return segments[:-1], True
+    return segments, False
+
+
+def _covers(pattern: Tuple[str, ...], scope: Tuple[str, ...]) -> bool:
+    for index, segment in enumerate(pattern):
+        if segment == WILDCARD and index == len(pattern) - 1:
+            return len(scope) > index
+        if index >= len(scope) or segment not in (WILDCARD, scope[index]):
+            return False
+    return len(pattern) == len(scope)
+
+
+@lru_cache(maxsize=1024)
+def compile_permissions(permissions: Tuple[str, ...]) -> Dict[str, Tuple[bool, str]]:
+    # action type -> (requires_approval, reason). Keyed on the permissions
+    # themselves, so an edit to agents.md compiles afresh and agents sharing
+    # a permission set share one table.
+    parsed = [_parse(permission) for permission in permissions]
+    decisions = {}
+    for action_type, rule in ACTION_RULES.items():
+        scope = tuple(rule.scope.split(":"))
+        grants = {needs_approval for pattern, needs_approval in parsed if _covers(pattern, scope)}
+        if False in grants:
+            decisions[action_type] = (False, rule.allowed)
+        elif True in grants:
+            decisions[action_type] = (True, rule.with_approval)
+        else:
+            decisions[action_type] = (True, rule.denied)
+    return decisions
+
+
+def decide(agent: AgentProfile, action_type: str) -> Tuple[bool, str]:
+    return compile_permissions(tuple(agent.permissions)).get(action_type, UNMATCHED)
+
+
+class Policy:
+    # The compiled view of one version of agents.md. decide() answers from the
+    # agent's table without touching its permissions; select_agent() returns
+    # the first agent, in file order, holding a permission under a scope.
+
+    def __init__(self, agents: List[AgentProfile]) -> None:
+        self.agents = agents
+        self._tables: Dict[str, Tuple[AgentProfile, Dict[str, Tuple[bool, str]]]] = {}
+        self._by_scope: Dict[Tuple[str, ...], int] = {}
+        self._wildcards: List[Tuple[Tuple[str, ...], int]] = []
+        for position, agent in enumerate(agents):
+            self._tables.setdefault(
+                agent.name, (agent, compile_permissions(tuple(agent.permissions)))
+            )
+            for permission in agent.permissions:
+                segments = tuple(permission.split(":"))
+                if WILDCARD in segments:
+                    self._wildcards.append((_parse(permission)[0], position))
+                    continue
+                for end in range(1, len(segments) + 1):
+                    self._by_scope.setdefault(segments[:end], position)
+        self._selected: Dict[str, Optional[AgentProfile]] = {}
+
+    def decide(self, agent: AgentProfile, action_type: str) -> Tuple[bool, str]:
+        entry = self._tables.get(agent.name)
+        if entry is None or entry[0] is not agent:
+            # Not an agent loaded from this agents.md; compile its own set.
+            return decide(agent, action_type)
+        return entry[1].get(action_type, UNMATCHED)
+
+    def select_agent(self, scope: str) -> Optional[AgentProfile]:
+        if scope not in self._selected:
+            segments = tuple(scope.split(":"))
+            positions = [
+                position
+                for pattern, position in self._wildcards
+                if _covers(pattern, segments)
+            ]
+            if segments in self._by_scope:
+                positions.append(self._by_scope[segments])
+            self._selected[scope] = self.agents[min(positions)] if positions else None
+        return self._selected[scope]
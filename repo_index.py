@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import get_state_dir
+from file_lock import atomic_write_text, file_lock
+
+
+# Persistent index of the checkouts in the workspace, stored in
+# state/repo_index.json. Adding, removing or renaming a checkout changes the
+# workspace directory's mtime, so a refresh only rescans the workspace when
+# that mtime moved. Plain directories are re-checked when their own mtime
+# moves (e.g. after `git init`). HEAD is read from the ref files directly
+# rather than through GitPython, which would spawn git processes per repo.
+#
+# inotify is not used: the mtime checks cost one stat per non-repo directory
+# plus one for the workspace, and work the same on every platform.
+
+_cache: Dict[str, Tuple[Optional[Tuple[int, int]], Dict[str, Any]]] = {}
+_cache_lock = threading.Lock()
+
+
+def index_path() -> Path:
+    return get_state_dir() / "repo_index.json"
+
+
+def _lock_path() -> Path:
+    return get_state_dir() / "repo_index.lock"
+
+
+def _git_dir(repo_path: Path) -> Optional[Path]:
+    marker = repo_path / ".git"
+    if marker.is_dir():
+        return marker
+    if marker.is_file():
+        # Worktrees and submodules point at their git dir from a .git file.
+        content = marker.read_text(encoding="utf-8").strip()
+        if content.startswith("gitdir:"):
+            return (repo_path / content[len("gitdir:") :].strip()).resolve()
+    return None
+
+
+def read_head(repo_path: Path) -> Optional[str]:
+    git_dir = _git_dir(repo_path)
+    if git_dir is None:
+        return None
+    try:
+        head = (git_dir / "HEAD").read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    if not head.startswith("ref: "):
+        return head or None
+    ref = head[len("ref: ") :]
+    try:
+        return (git_dir / ref).read_text(encoding="utf-8").strip() or None
+    except OSError:
+        pass
+    try:
+        packed = (git_dir / "packed-refs").read_text(encoding="utf-8")
+    except OSError:
+        return None
+    for line in packed.splitlines():
+        if line.endswith(f" {ref}"):
+            return line.split(" ", 1)[0]
+    return None
+
+
+def _empty(root: Path) -> Dict[str, Any]:
+    return {"root": str(root), "root_mtime_ns": None, "repos": {}, "others": {}}
+
+
+def _file_stamp(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _load_all() -> Dict[str, Any]:
+    # Reparse the index file only when another process rewrote it.
+    path = index_path()
+    stamp = _file_stamp(path)
+    key = str(path)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        data = {}
+    with _cache_lock:
+        _cache[key] = (stamp, data)
+    return data
+
+
+def _save_all(data: Dict[str, Any]) -> None:
+    path = index_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write_text(path, json.dumps(data, indent=2))
+    with _cache_lock:
+        _cache[str(path)] = (_file_stamp(path), data)
+
+
+def _mtime_ns(path: Path) -> Optional[int]:
+    try:
+        return path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _entry(path: Path, previous: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    entry = dict(previous or {"last_audit": None})
+    entry.update(
+        {
+            "name": path.name,
+            "path": str(path),
+            "head": read_head(path),
+            "mtime_ns": _mtime_ns(path),
+        }
+    )
+    return entry
+
+
+def _refresh(root: Path, index: Dict[str, Any], deep: bool) -> bool:
+    changed = False
+    repos = index["repos"]
+    others = index["others"]
+    root_mtime = _mtime_ns(root)
+    if root_mtime != index["root_mtime_ns"]:
+        index["root_mtime_ns"] = root_mtime
+        changed = True
+        names = (
+            {entry.name for entry in root.iterdir() if entry.is_dir()} if root_mtime else set()
+        )
+        for name in set(repos) - names:
+            del repos[name]
+        for name in set(others) - names:
+            del others[name]
+        for name in names - set(repos) - set(others):
+            others[name] = None
+
+    # Plain directories become repos when something (git init, a clone)
+    # writes into them, which moves their mtime.
+    for name, seen in list(others.items()):
+        path = root / name
+        mtime = _mtime_ns(path)
+        if mtime == seen:
+            continue
+        changed = True
+        if _git_dir(path) is not None:
+            del others[name]
+            repos[name] = _entry(path, None)
+        else:
+            others[name] = mtime
+
+    if deep:
+        for name, entry in list(repos.items()):
+            path = root / name
+            if _git_dir(path) is None:
+                del repos[name]
+                others[name] = _mtime_ns(path)
+                changed = True
+                continue
+            fresh = _entry(path, entry)
+            if fresh != entry:
+                repos[name] = fresh
+                changed = True
+    return changed
+
+
+def refresh(
+    root: Path, deep: bool = False, deep_after: Optional[float] = None
+) -> Dict[str, Dict[str, Any]]:
+    # A shallow refresh only picks up checkouts that appeared or disappeared;
+    # a deep one also re-reads each repo's HEAD and mtime. deep_after turns a
+    # shallow refresh deep once the last deep one is that many seconds old.
+    root = root.resolve()
+    with file_lock(_lock_path()):
+        data = _load_all()
+        index = data.get(str(root))
+        changed = index is None
+        if index is None:
+            index = data[str(root)] = _empty(root)
+        if deep_after is not None and time.time() - index.get("deep_at", 0) >= deep_after:
+            deep = True
+        if deep:
+            index["deep_at"] = time.time()
+            changed = True
+        if _refresh(root, index, deep) or changed:
+            _save_all(data)
+        return {name: dict(entry) for name, entry in index["repos"].items()}
+
+
+def list_repos(
+    root: Path, deep: bool = False, deep_after: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    return [entry for _, entry in sorted(refresh(root, deep, deep_after).items())]
+
+
+def record_audit(root: Path, repo_path: Path, status: Optional[str]) -> None:
+    root = root.resolve()
+    repo_path = repo_path.resolve()
+    if repo_path.parent != root:
+        return
+    with file_lock(_lock_path()):
+        data = _load_all()
+        index = data.get(str(root))
+        if index is None or repo_path.name not in index["repos"]:
+            return
+        entry = _entry(repo_path, index["repos"][repo_path.name])
+        entry["last_audit"] = {"status": status, "timestamp": time.time()}
+        index["repos"][repo_path.name] = entry
+        _save_all(data)
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import atexit
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+from git import Repo
+
+from config import get_repo_pool_size
+from observability import log_event
+
+
+class _Handle:
+    def __init__(self, repo: Repo) -> None:
+        self.repo = repo
+        # GitPython Repo objects are not thread-safe; one user at a time.
+        self.lock = threading.RLock()
+
+
+class RepoPool:
+    # Keeps recently used Repo handles open so their `git cat-file` helper
+    # processes are reused across actions. The least recently used handle is
+    # closed (terminating its helpers) once the pool is over capacity.
+
+    def __init__(self, max_size: Optional[int] = None) -> None:
+        self.max_size = max_size or get_repo_pool_size()
+        self._handles: "OrderedDict[Path, _Handle]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._handles)
+
+    def _handle(self, path: Path) -> _Handle:
+        key = path.resolve()
+        evicted = []
+        with self._lock:
+            handle = self._handles.get(key)
+            if handle is not None:
+                self._handles.move_to_end(key)
+                return handle
+            # Opening raises for non-repos before anything is cached.
+            handle = self._handles[key] = _Handle(Repo(key))
+            while len(self._handles) > self.max_size:
+                evicted.append(self._handles.popitem(last=False))
+        for evicted_path, evicted_handle in evicted:
+            self._close(evicted_path, evicted_handle, "evicted")
+        return handle
+
+    def get(self, path: Path) -> Repo:
+        return self._handle(path).repo
+
+    @contextmanager
+    def lease(self, path: Path) -> Iterator[Repo]:
+        handle = self._handle(path)
+        with handle.lock:
+            yield handle.repo
+
+    def discard(self, path: Path) -> None:
+        with self._lock:
+            handle = self._handles.pop(path.resolve(), None)
+        if handle is not None:
+            self._close(path, handle, "discarded")
+
+    def _close(self, path: Path, handle: _Handle, reason: str) -> None:
+        # Waits for a current lease to finish before closing.
+        with handle.lock:
+            handle.repo.close()
+        log_event("repo_handle_closed", {"repo_path": str(path), "reason": reason})
+
+    def close(self) -> None:
+        with self._lock:
+            handles = list(self._handles.items())
+            self._handles.clear()
+        for path, handle in handles:
+            self._close(path, handle, "shutdown")
+
+
+_pool: Optional[RepoPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_repo_pool() -> RepoPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = RepoPool()
+        return _pool
+
+
+def close_repo_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
+
+
+atexit.register(close_repo_pool)
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path, PurePosixPath
+from typing import Any, Dict, Optional
+
+from git import Repo
+from git.exc import GitCommandError, InvalidGitRepositoryError, NoSuchPathError
+
+from config import get_sandbox_image, get_state_dir, get_test_cache_max_entries, get_test_cache_ttl
+from file_lock import atomic_write_text
+from repo_pool import get_repo_pool
+
+
+# Test results keyed by what the run actually sees: the HEAD tree, any
+# uncommitted changes, the command and the runner. Files the executor writes
+# into the repo itself (plan.md) are left out of the key, otherwise every run
+# would invalidate its own entry.
+IGNORED_PATHS = ("plan.md",)
+# Untracked files a test run leaves behind in repos that don't gitignore
+# them are left out for the same reason. Anything else untracked is source
+# the run sees; gitignored files never show up in untracked_files anyway.
+BYTECODE_SUFFIXES = {".pyc", ".pyo"}
+RUN_ARTIFACT_DIRS = {"__pycache__", ".pytest_cache"}
+# Directories the incremental test scan never descends into.
+SKIPPED_DIRS = {"__pycache__", "node_modules", "venv", "build", "dist"}
+
+# Only outcomes that are a property of the code are reused; a timeout or a
+# cancellation says more about the run than about the tree.
+CACHEABLE_STATUSES = ("success", "failed")
+
+
+def cache_dir() -> Path:
+    return get_state_dir() / "test_cache"
+
+
+def is_run_artifact(path: str) -> bool:
+    posix = PurePosixPath(path)
+    if posix.suffix in BYTECODE_SUFFIXES:
+        return True
+    return any(part in RUN_ARTIFACT_DIRS for part in posix.parts[:-1])
+
+
+def _dirty_digest(repo: Repo) -> str:
+    digest = hashlib.sha256()
+    excludes = [f":(exclude){path}" for path in IGNORED_PATHS]
+    digest.update(repo.git.diff("HEAD", "--binary", "--", ".", *excludes).encode("utf-8"))
+    root = Path(repo.working_tree_dir)
+    for name in sorted(repo.untracked_files):
+        if name in IGNORED_PATHS or is_run_artifact(name):
+            continue
+        digest.update(name.encode("utf-8") + b"\0")
+        try:
+            digest.update(hashlib.sha256((root / name).read_bytes()).digest())
+        except OSError:
+            continue
+    return digest.hexdigest()
+
+
+def cache_key(repo_path: Path, command: str, mode: str) -> Optional[str]:
+    # None means the run can't be keyed (not a git repo, or no commits yet)
+    # and should not be cached.
+    try:
+        with get_repo_pool().lease(repo_path) as repo:
+            tree = repo.head.commit.tree.hexsha
+            dirty = _dirty_digest(repo)
+    except (InvalidGitRepositoryError, NoSuchPathError, GitCommandError, ValueError):
+        return None
+    image = get_sandbox_image() if mode == "docker" else ""
+    material = json.dumps([tree, dirty, command, mode, image])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def _entry_path(key: str) -> Path:
+    return cache_dir() / f"{key}.json"
+
+
+def lookup(key: str) -> Optional[Dict[str, Any]]:
+    path = _entry_path(key)
+    try:
+        entry = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return None
+    if time.time() - entry["created_at"] > get_test_cache_ttl():
+        path.unlink(missing_ok=True)
+        return None
+    # The file's mtime is its last use, which drives LRU eviction.
+    os.utime(path)
+    return entry["result"]
+
+
+def store(key: str, repo_path: Path, result: Dict[str, Any]) -> bool:
+    if result.get("status") not in CACHEABLE_STATUSES:
+        return False
+    directory = cache_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    entry = {"repo_path": str(repo_path), "created_at": time.time(), "result": result}
+    atomic_write_text(_entry_path(key), json.dumps(entry))
+    evict()
+    return True
+
+
+def evict() -> int:
+    # Drop entries unused for longer than the TTL, then the least recently
+    # used ones beyond the size cap.
+    directory = cache_dir()
+    if not directory.exists():
+        return 0
+    entries = []
+    for path in directory.glob("*.json"):
+        try:
+            entries.append((path.stat().st_mtime, path))
+        except FileNotFoundError:
+            continue
+    entries.sort(reverse=True)
+    cutoff = time.time() - get_test_cache_ttl()
+    limit = get_test_cache_max_entries()
+    removed = 0
+    for position, (mtime, path) in enumerate(entries):
+        if position >= limit or mtime < cutoff:
+            path.unlink(missing_ok=True)
+            removed += 1
+    return removed
+
+
+def invalidate(repo_path: Optional[Path] = None) -> int:
+    # Remove every entry, or only those recorded for one repo.
+    directory = cache_dir()
+    if not directory.exists():
+        return 0
+    removed = 0
+    for path in directory.glob("*.json"):
+        if repo_path is not None:
+            try:
+                entry = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError):
+                continue
+            if entry.get("repo_path") != str(repo_path):
+                continue
+        path.unlink(missing_ok=True)
+        removed += 1
+    return removed
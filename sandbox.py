@@ -0,0 +1,407 @@
+from __future__ import annotations
+
+import atexit
+import json
+import shlex
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from config import (
+    get_log_dir,
+    get_sandbox_cpus,
+    get_sandbox_image,
+    get_sandbox_max_uses,
+    get_sandbox_memory,
+    get_sandbox_pool_size,
+    get_state_dir,
+    get_test_progress_interval,
+    get_test_timeout,
+    get_workspace_dir,
+)
+from file_lock import atomic_write_text
+from observability import log_event, timer
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_docker_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            try:
+                import docker
+            except ImportError as exc:
+                raise RuntimeError("docker SDK not installed") from exc
+            _client = docker.from_env()
+        return _client
+
+
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+
+class RunOutput:
+    # Streams a run's output to logs/test_runs/<run_id>.log, keeps the last
+    # few KiB in memory for display, and emits throttled progress events.
+
+    def __init__(
+        self,
+        run_id: str,
+        repo_path: Path,
+        tail_bytes: int = 8192,
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> None:
+        self.run_id = run_id
+        self.repo_path = repo_path
+        self.tail_bytes = tail_bytes
+        self.on_progress = on_progress
+        self.path = get_log_dir() / "test_runs" / f"{run_id}.log"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.bytes_written = 0
+        self._tail = bytearray()
+        self._handle = self.path.open("wb")
+        self._started = time.monotonic()
+        self._last_progress = self._started
+
+    def write(self, chunk: bytes) -> None:
+        if not chunk:
+            return
+        self._handle.write(chunk)
+        self._handle.flush()
+        self.bytes_written += len(chunk)
+        self._tail.extend(chunk)
+        if len(self._tail) > self.tail_bytes:
+            del self._tail[: len(self._tail) - self.tail_bytes]
+        now = time.monotonic()
+        if now - self._last_progress >= get_test_progress_interval():
+            self._last_progress = now
+            self._progress()
+
+    def _progress(self) -> None:
+        progress = {
+            "run_id": self.run_id,
+            "repo_path": str(self.repo_path),
+            "bytes": self.bytes_written,
+            "elapsed_ms": round((time.monotonic() - self._started) * 1000, 2),
+        }
+        log_event("test_run_progress", progress)
+        if self.on_progress is not None:
+            self.on_progress({**progress, "tail": self.tail()})
+
+    def tail(self) -> str:
+        return bytes(self._tail).decode("utf-8", errors="replace")
+
+    def close(self) -> None:
+        self._handle.close()
+
+
+def new_run_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+# In-flight runs are tracked as small files under state/runs/ so any process,
+# including the dashboard, can list them and request cancellation by dropping
+# a <run_id>.cancel marker that the run's watchdog picks up.
+
+
+def _runs_dir() -> Path:
+    return get_state_dir() / "runs"
+
+
+def list_active_runs() -> List[Dict[str, Any]]:
+    runs_dir = _runs_dir()
+    if not runs_dir.exists():
+        return []
+    runs = []
+    now = time.time()
+    for path in sorted(runs_dir.glob("*.json")):
+        try:
+            run = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            continue
+        # Entries outliving their deadline belong to a process that died.
+        if now > run["started_at"] + run["timeout_s"] + 60:
+            path.unlink(missing_ok=True)
+            continue
+        run["cancel_requested"] = cancel_requested(run["run_id"])
+        runs.append(run)
+    return runs
+
+
+def request_cancel(run_id: str) -> None:
+    runs_dir = _runs_dir()
+    runs_dir.mkdir(parents=True, exist_ok=True)
+    (runs_dir / f"{run_id}.cancel").touch()
+    log_event("test_run_cancel_requested", {"run_id": run_id})
+
+
+def cancel_requested(run_id: str) -> bool:
+    return (_runs_dir() / f"{run_id}.cancel").exists()
+
+
+class RunGuard:
+    # Registers a run and watches it from a background thread: once the
+    # wall-clock timeout passes or a cancel marker appears, it records the
+    # outcome and calls stop() to kill the underlying process or container.
+
+    def __init__(
+        self,
+        run_id: str,
+        repo_path: Path,
+        command: str,
+        runner: str,
+        stop: Callable[[], None],
+        timeout: Optional[float] = None,
+        poll_interval: float = 0.2,
+    ) -> None:
+        self.run_id = run_id
+        self.timeout = timeout if timeout is not None else get_test_timeout()
+        self.stop = stop
+        self.poll_interval = poll_interval
+        self.outcome: Optional[str] = None
+        self._info = {
+            "run_id": run_id,
+            "repo_path": str(repo_path),
+            "command": command,
+            "runner": runner,
+            "started_at": time.time(),
+            "timeout_s": self.timeout,
+        }
+        self._finished = threading.Event()
+        self._thread = threading.Thread(
+            target=self._watch, name=f"exegol-run-{run_id}", daemon=True
+        )
+
+    def __enter__(self) -> "RunGuard":
+        runs_dir = _runs_dir()
+        runs_dir.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(runs_dir / f"{self.run_id}.json", json.dumps(self._info))
+        self._deadline = time.monotonic() + self.timeout
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._finished.set()
+        self._thread.join()
+        (_runs_dir() / f"{self.run_id}.json").unlink(missing_ok=True)
+        (_runs_dir() / f"{self.run_id}.cancel").unlink(missing_ok=True)
+        return False
+
+    def _watch(self) -> None:
+        while not self._finished.wait(self.poll_interval):
+            if time.monotonic() >= self._deadline:
+                self.outcome = "timeout"
+            elif cancel_requested(self.run_id):
+                self.outcome = "cancelled"
+            else:
+                continue
+            log_event(
+                f"test_run_{self.outcome}",
+                {"run_id": self.run_id, "repo_path": self._info["repo_path"]},
+            )
+            try:
+                self.stop()
+            except Exception:
+                pass
+            return
+
+
+class _PooledContainer:
+    def __init__(self, container: Any) -> None:
+        self.container = container
+        self.uses = 0
+        self.created_at = time.time()
+
+
+class DockerSandboxPool:
+    # Keeps pre-started sandbox containers with the workspace mounted
+    # read-only. Each run copies the repo into a scratch directory inside the
+    # container, runs the command there via exec, and deletes the copy, so a
+    # container can serve many runs without leaking state between them.
+
+    def __init__(
+        self,
+        client: Any = None,
+        image: Optional[str] = None,
+        size: Optional[int] = None,
+        max_uses: Optional[int] = None,
+        workspace_root: Optional[Path] = None,
+    ) -> None:
+        self._client = client
+        self.image = image or get_sandbox_image()
+        self.size = size or get_sandbox_pool_size()
+        self.max_uses = max_uses or get_sandbox_max_uses()
+        self.workspace_root = (workspace_root or get_workspace_dir()).resolve()
+        self._idle: List[_PooledContainer] = []
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> Any:
+        if self._client is None:
+            self._client = get_docker_client()
+        return self._client
+
+    def _create(self) -> _PooledContainer:
+        with timer("sandbox_container_start", {"runner": "docker"}):
+            limits: Dict[str, Any] = {}
+            cpus = get_sandbox_cpus()
+            if cpus is not None:
+                limits["nano_cpus"] = int(cpus * 1_000_000_000)
+            memory = get_sandbox_memory()
+            if memory is not None:
+                limits["mem_limit"] = memory
+            container = self.client.containers.run(
+                image=self.image,
+                command=["sleep", "infinity"],
+                volumes={str(self.workspace_root): {"bind": "/workspace", "mode": "ro"}},
+                labels={"exegol.sandbox": "1"},
+                detach=True,
+                **limits,
+            )
+        return _PooledContainer(container)
+
+    def _discard(self, pooled: _PooledContainer, reason: str) -> None:
+        log_event("sandbox_container_recycled", {"reason": reason, "uses": pooled.uses})
+        try:
+            pooled.container.remove(force=True)
+        except Exception:
+            pass
+
+    def _healthy(self, pooled: _PooledContainer) -> bool:
+        try:
+            pooled.container.reload()
+        except Exception:
+            return False
+        return pooled.container.status == "running"
+
+    def warm(self) -> None:
+        with self._lock:
+            missing = self.size - len(self._idle)
+        for _ in range(missing):
+            pooled = self._create()
+            with self._lock:
+                self._idle.append(pooled)
+
+    def acquire(self) -> _PooledContainer:
+        while True:
+            with self._lock:
+                pooled = self._idle.pop() if self._idle else None
+            if pooled is None:
+                return self._create()
+            if self._healthy(pooled):
+                return pooled
+            self._discard(pooled, "unhealthy")
+
+    def release(self, pooled: _PooledContainer, healthy: bool = True) -> None:
+        pooled.uses += 1
+        if not healthy:
+            self._discard(pooled, "failed")
+            return
+        if pooled.uses >= self.max_uses:
+            self._discard(pooled, "max_uses")
+            return
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(pooled)
+                return
+        self._discard(pooled, "pool_full")
+
+    def _script(self, repo_path: Path, command: str, workdir: str) -> str:
+        relative = repo_path.resolve().relative_to(self.workspace_root)
+        source = shlex.quote(f"/workspace/{relative.as_posix()}")
+        target = shlex.quote(workdir)
+        return (
+            f"cp -a {source} {target} && cd {target} && ({command}); "
+            f"status=$?; rm -rf {target}; exit $status"
+        )
+
+    def _exec_streaming(self, pooled: _PooledContainer, script: str, output: RunOutput) -> int:
+        api = self.client.api
+        exec_id = api.exec_create(pooled.container.id, ["bash", "-lc", script])["Id"]
+        for chunk in api.exec_start(exec_id, stream=True):
+            output.write(chunk)
+        return api.exec_inspect(exec_id)["ExitCode"]
+
+    def run(
+        self,
+        repo_path: Path,
+        command: str,
+        run_id: Optional[str] = None,
+        on_progress: Optional[ProgressCallback] = None,
+        timeout: Optional[float] = None,
+    ) -> Dict[str, object]:
+        run_id = run_id or new_run_id()
+        script = self._script(repo_path, command, f"/tmp/exegol-run-{run_id}")
+        pooled = self.acquire()
+        try:
+            output = RunOutput(run_id, repo_path, on_progress=on_progress)
+        except Exception:
+            self.release(pooled)
+            raise
+        healthy = True
+        # Killing the container is the only reliable way to stop an exec; the
+        # container is then discarded instead of returned to the pool.
+        guard = RunGuard(
+            run_id, repo_path, command, "docker", pooled.container.kill, timeout=timeout
+        )
+        try:
+            with guard:
+                exit_code = self._exec_streaming(pooled, script, output)
+        except Exception:
+            healthy = False
+            if guard.outcome is None:
+                raise
+        finally:
+            output.close()
+            self.release(pooled, healthy=healthy and guard.outcome is None)
+
+        if guard.outcome is not None:
+            status, exit_code = guard.outcome, None
+        else:
+            status = "success" if exit_code == 0 else "failed"
+        return {
+            "status": status,
+            "exit_code": exit_code,
+            "run_id": run_id,
+            "timeout_s": guard.timeout,
+            "output_path": str(output.path),
+            "output_bytes": output.bytes_written,
+            "output_tail": output.tail(),
+            "command": command,
+            "repo_path": str(repo_path),
+            "runner": "docker",
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for pooled in idle:
+            self._discard(pooled, "shutdown")
+
+
+_pools: Dict[Path, DockerSandboxPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_sandbox_pool(workspace_root: Optional[Path] = None) -> DockerSandboxPool:
+    root = (workspace_root or get_workspace_dir()).resolve()
+    with _pools_lock:
+        pool = _pools.get(root)
+        if pool is None:
+            pool = _pools[root] = DockerSandboxPool(workspace_root=root)
+        return pool
+
+
+def close_sandbox_pools() -> None:
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+atexit.register(close_sandbox_pools)
@@ -0,0 +1,350 @@
+from __future__ import annotations
+
+import atexit
+import heapq
+import itertools
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from config import get_scheduler_limits, get_scheduler_workers
+from observability import log_event, timer, use_trace
+from state_store import commit_batch, new_batch, transaction
+
+
+PENDING = "pending"
+READY = "ready"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+SKIPPED = "skipped"
+UNSETTLED = (PENDING, READY, RUNNING)
+
+
+@dataclass
+class Task:
+    # fn receives the results of its dependencies keyed by task name. Higher
+    # priority runs first among ready tasks; action_type is what per-type
+    # concurrency limits count against. The flow's buffered state writes are
+    # committed once every task sharing a commit_group has settled.
+    name: str
+    fn: Callable[[Dict[str, Any]], Any]
+    deps: List[str] = field(default_factory=list)
+    action_type: Optional[str] = None
+    priority: int = 0
+    commit_group: Optional[str] = None
+    status: str = PENDING
+    result: Any = None
+    error: Optional[str] = None
+
+
+class FlowHandle:
+    def __init__(
+        self,
+        name: str,
+        tasks: List[Task],
+        priority: int,
+        max_parallel: Optional[int],
+        final: Optional[str],
+        data: Dict[str, Any],
+    ) -> None:
+        self.flow_id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.tasks = {task.name: task for task in tasks}
+        self.order = [task.name for task in tasks]
+        self.priority = priority
+        self.max_parallel = max_parallel
+        self.final = final or (self.order[-1] if self.order else None)
+        self.running = 0
+        self.submitted_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.span = timer(name, data)
+        self.batch = new_batch()
+        self.commit_error: Optional[str] = None
+        self._commit_lock = threading.Lock()
+        self._finished = threading.Event()
+
+    def commit(self) -> bool:
+        # Serialized so records from an earlier drain are never written after
+        # a later one. A failed write is logged and kept on the flow rather
+        # than raised into the scheduler worker that happened to commit.
+        with self._commit_lock:
+            try:
+                commit_batch(self.batch)
+            except Exception as exc:
+                self.commit_error = str(exc)
+                with use_trace(self.span.trace_context()):
+                    log_event(
+                        "flow_commit_failed",
+                        {"flow_id": self.flow_id, "flow": self.name, "error": str(exc)},
+                    )
+                return False
+        return True
+
+    def progress(self) -> Dict[str, Any]:
+        counts = {PENDING: 0, READY: 0, RUNNING: 0, DONE: 0, FAILED: 0, SKIPPED: 0}
+        for task in list(self.tasks.values()):
+            counts[task.status] += 1
+        return {
+            "flow_id": self.flow_id,
+            "name": self.name,
+            "total": len(self.tasks),
+            "finished": self.done(),
+            **counts,
+        }
+
+    def done(self) -> bool:
+        return self._finished.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._finished.wait(timeout)
+
+    def result(self, timeout: Optional[float] = None) -> Any:
+        if not self.wait(timeout):
+            raise TimeoutError(f"Flow {self.name} did not finish in {timeout}s")
+        if self.commit_error is not None:
+            raise RuntimeError(f"Flow {self.name} could not save its state: {self.commit_error}")
+        if self.final is None:
+            return None
+        task = self.tasks[self.final]
+        if task.status == FAILED:
+            raise RuntimeError(f"Flow {self.name} failed in {task.name}: {task.error}")
+        if task.status == SKIPPED:
+            raise RuntimeError(f"Flow {self.name} skipped {task.name} after a failed dependency")
+        return task.result
+
+
+class Scheduler:
+    # Runs flows as graphs of tasks on a shared worker pool. A task becomes
+    # ready once all its dependencies are done; if one fails, everything that
+    # depends on it is skipped. Ready tasks are picked by priority, subject
+    # to per-action-type limits and each flow's own parallelism cap. A flow's
+    # tasks share one state batch, committed when a commit group settles and
+    # when the flow finishes, and are traced under the flow's span.
+
+    def __init__(
+        self, workers: Optional[int] = None, limits: Optional[Dict[str, int]] = None
+    ) -> None:
+        self.workers = workers or get_scheduler_workers()
+        self.limits = limits if limits is not None else get_scheduler_limits()
+        self._cond = threading.Condition()
+        self._ready: List[Tuple[int, int, FlowHandle, Task]] = []
+        self._seq = itertools.count()
+        self._running_by_type: Dict[str, int] = {}
+        self._active: Dict[str, FlowHandle] = {}
+        self._finished: Deque[FlowHandle] = deque(maxlen=20)
+        self._threads: List[threading.Thread] = []
+        self._stopped = False
+
+    def submit(
+        self,
+        name: str,
+        tasks: List[Task],
+        priority: int = 0,
+        max_parallel: Optional[int] = None,
+        final: Optional[str] = None,
+        data: Optional[Dict[str, Any]] = None,
+    ) -> FlowHandle:
+        flow = FlowHandle(name, tasks, priority, max_parallel, final, data or {})
+        for task in tasks:
+            missing = [dep for dep in task.deps if dep not in flow.tasks]
+            if missing:
+                raise ValueError(f"Task {task.name} depends on unknown tasks: {missing}")
+        _check_acyclic(flow)
+
+        flow.span.begin()
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError("Scheduler is shut down")
+            self._ensure_workers()
+            self._active[flow.flow_id] = flow
+            for task in tasks:
+                if not task.deps:
+                    self._push(flow, task)
+            finished = self._settle_if_complete(flow)
+            self._cond.notify_all()
+        if finished:
+            self._finish(flow)
+        log_event(
+            "flow_submitted", {"flow_id": flow.flow_id, "flow": name, "tasks": len(tasks)}
+        )
+        return flow
+
+    def flows(self) -> List[FlowHandle]:
+        with self._cond:
+            return list(self._active.values()) + list(reversed(self._finished))
+
+    def _ensure_workers(self) -> None:
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(
+                target=self._work,
+                name=f"exegol-scheduler-{len(self._threads)}",
+                daemon=True,
+            )
+            self._threads.append(thread)
+            thread.start()
+
+    def _push(self, flow: FlowHandle, task: Task) -> None:
+        task.status = READY
+        key = -(flow.priority + task.priority)
+        heapq.heappush(self._ready, (key, next(self._seq), flow, task))
+
+    def _eligible(self, flow: FlowHandle, task: Task) -> bool:
+        if flow.max_parallel is not None and flow.running >= flow.max_parallel:
+            return False
+        limit = self.limits.get(task.action_type or "")
+        return limit is None or self._running_by_type.get(task.action_type, 0) < limit
+
+    def _next(self) -> Optional[Tuple[FlowHandle, Task]]:
+        with self._cond:
+            while True:
+                if self._stopped:
+                    return None
+                held = []
+                picked = None
+                while self._ready:
+                    item = heapq.heappop(self._ready)
+                    if self._eligible(item[2], item[3]):
+                        picked = item
+                        break
+                    held.append(item)
+                for item in held:
+                    heapq.heappush(self._ready, item)
+                if picked is not None:
+                    flow, task = picked[2], picked[3]
+                    task.status = RUNNING
+                    flow.running += 1
+                    if task.action_type:
+                        self._running_by_type[task.action_type] = (
+                            self._running_by_type.get(task.action_type, 0) + 1
+                        )
+                    return flow, task
+                self._cond.wait()
+
+    def _work(self) -> None:
+        while True:
+            picked = self._next()
+            if picked is None:
+                return
+            flow, task = picked
+            deps = {name: flow.tasks[name].result for name in task.deps}
+            try:
+                with use_trace(flow.span.trace_context()), transaction(flow.batch):
+                    result = task.fn(deps)
+            except Exception as exc:
+                self._complete(flow, task, FAILED, None, str(exc))
+            else:
+                self._complete(flow, task, DONE, result, None)
+
+    def _complete(
+        self, flow: FlowHandle, task: Task, status: str, result: Any, error: Optional[str]
+    ) -> None:
+        if status == FAILED:
+            with use_trace(flow.span.trace_context()):
+                log_event(
+                    "flow_task_failed",
+                    {"flow_id": flow.flow_id, "flow": flow.name, "task": task.name, "error": error},
+                )
+        with self._cond:
+            task.status, task.result, task.error = status, result, error
+            flow.running -= 1
+            if task.action_type:
+                self._running_by_type[task.action_type] -= 1
+            for other in flow.tasks.values():
+                if other.status != PENDING or task.name not in other.deps:
+                    continue
+                if status == FAILED:
+                    _skip(flow, other)
+                elif all(flow.tasks[dep].status == DONE for dep in other.deps):
+                    self._push(flow, other)
+            group_settled = task.commit_group is not None and all(
+                other.status not in UNSETTLED
+                for other in flow.tasks.values()
+                if other.commit_group == task.commit_group
+            )
+            finished = self._settle_if_complete(flow)
+            self._cond.notify_all()
+        if finished:
+            self._finish(flow)
+        elif group_settled:
+            flow.commit()
+
+    def _settle_if_complete(self, flow: FlowHandle) -> bool:
+        # Called with the condition held; True exactly once per flow, for the
+        # caller that must then _finish() it outside the lock.
+        if flow.finished_at is not None:
+            return False
+        if any(task.status in UNSETTLED for task in flow.tasks.values()):
+            return False
+        flow.finished_at = time.time()
+        self._active.pop(flow.flow_id, None)
+        self._finished.append(flow)
+        return True
+
+    def _finish(self, flow: FlowHandle) -> None:
+        # State is committed before waiters wake, so a flow's result is
+        # never seen ahead of its writes.
+        try:
+            flow.commit()
+        finally:
+            failed = any(task.status == FAILED for task in flow.tasks.values())
+            flow.span.finish(error=failed or flow.commit_error is not None)
+            flow._finished.set()
+
+    def shutdown(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=5)
+
+
+def _skip(flow: FlowHandle, task: Task) -> None:
+    task.status = SKIPPED
+    for other in flow.tasks.values():
+        if other.status == PENDING and task.name in other.deps:
+            _skip(flow, other)
+
+
+def _check_acyclic(flow: FlowHandle) -> None:
+    visiting, visited = set(), set()
+
+    def visit(name: str) -> None:
+        if name in visited:
+            return
+        if name in visiting:
+            raise ValueError(f"Flow {flow.name} has a dependency cycle at {name}")
+        visiting.add(name)
+        for dep in flow.tasks[name].deps:
+            visit(dep)
+        visiting.discard(name)
+        visited.add(name)
+
+    for name in flow.tasks:
+        visit(name)
+
+
+_scheduler: Optional[Scheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> Scheduler:
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = Scheduler()
+        return _scheduler
+
+
+def shutdown_scheduler() -> None:
+    global _scheduler
+    with _scheduler_lock:
+        scheduler, _scheduler = _scheduler, None
+    if scheduler is not None:
+        scheduler.shutdown()
+
+
+atexit.register(shutdown_scheduler)
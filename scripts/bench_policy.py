@@ -0,0 +1,131 @@
+"""Benchmark the compiled policy engine against the previous permission checks.
+
+Usage: python scripts/bench_policy.py [--agents 50] [--permissions 20] [--rounds 20000]
+
+The "legacy" functions reproduce the pre-policy-engine logic from
+permission_judge.evaluate_action and AgentManager._select_agent; logging is
+left out of both sides so only the decision work is timed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import timeit
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from models import AgentProfile  # noqa: E402
+from policy_engine import Policy, decide  # noqa: E402
+
+
+def legacy_decide(action_type: str, agent: AgentProfile) -> Tuple[bool, str]:
+    requires_approval = True
+    reason = "No matching permission found."
+    if action_type in ("git_commit", "git_commit_batch"):
+        permissions = set(agent.permissions)
+        if "git:commit" in permissions:
+            requires_approval, reason = False, "Commit allowed."
+        elif "git:commit:requires-approval" in permissions:
+            requires_approval, reason = True, "Commit allowed with approval."
+        else:
+            requires_approval, reason = True, "Commit not allowed; approval required."
+    elif action_type == "run_tests":
+        permissions = set(agent.permissions)
+        if "tests:run" in permissions:
+            requires_approval, reason = False, "Test execution allowed."
+        elif "tests:run:requires-approval" in permissions:
+            requires_approval, reason = True, "Test execution requires approval."
+        else:
+            requires_approval, reason = True, "Test execution not allowed; approval required."
+    elif action_type == "cursor_prompt":
+        permissions = set(agent.permissions)
+        if "cursor:prompt" in permissions:
+            requires_approval, reason = False, "Cursor prompt allowed."
+        elif "cursor:prompt:requires-approval" in permissions:
+            requires_approval, reason = True, "Cursor prompt requires approval."
+        else:
+            requires_approval, reason = True, "Cursor prompt not allowed; approval required."
+    return requires_approval, reason
+
+
+def legacy_select(agents: List[AgentProfile], prefix: str) -> Optional[AgentProfile]:
+    for agent in agents:
+        for permission in agent.permissions:
+            if permission.startswith(prefix):
+                return agent
+    return None
+
+
+def build_agents(count: int, permissions: int) -> List[AgentProfile]:
+    # Filler permissions that match nothing, with the real ones on the last
+    # agent so selection has to scan the whole file.
+    agents = [
+        AgentProfile(
+            name=f"agent-{index}",
+            role="Filler",
+            permissions=[f"scope{index}:perm{slot}" for slot in range(permissions)],
+        )
+        for index in range(count - 1)
+    ]
+    agents.append(
+        AgentProfile(
+            name="worker",
+            role="Dev",
+            permissions=[f"extra:perm{slot}" for slot in range(permissions - 3)]
+            + ["git:commit:requires-approval", "tests:run", "cursor:prompt"],
+        )
+    )
+    return agents
+
+
+def _report(label: str, legacy: float, compiled: float, rounds: int) -> None:
+    print(
+        f"{label:<12} legacy {legacy / rounds * 1e6:8.2f} us/op   "
+        f"compiled {compiled / rounds * 1e6:8.2f} us/op   "
+        f"speedup {legacy / compiled:6.1f}x"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--agents", type=int, default=50)
+    parser.add_argument("--permissions", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=20000)
+    args = parser.parse_args()
+
+    agents = build_agents(args.agents, args.permissions)
+    policy = Policy(agents)
+    worker = agents[-1]
+    action_types = ["git_commit", "run_tests", "cursor_prompt", "deploy"]
+    scopes = ["git:commit", "tests:run", "cursor:prompt"]
+
+    for action_type in action_types:
+        assert legacy_decide(action_type, worker) == decide(worker, action_type)
+        assert legacy_decide(action_type, worker) == policy.decide(worker, action_type)
+    for scope in scopes:
+        assert legacy_select(agents, scope) is policy.select_agent(scope)
+
+    legacy = timeit.timeit(
+        lambda: [legacy_decide(action_type, worker) for action_type in action_types],
+        number=args.rounds,
+    )
+    compiled = timeit.timeit(
+        lambda: [policy.decide(worker, action_type) for action_type in action_types],
+        number=args.rounds,
+    )
+    _report("evaluate", legacy, compiled, args.rounds * len(action_types))
+
+    legacy = timeit.timeit(
+        lambda: [legacy_select(agents, scope) for scope in scopes], number=args.rounds
+    )
+    compiled = timeit.timeit(
+        lambda: [policy.select_agent(scope) for scope in scopes], number=args.rounds
+    )
+    _report("select", legacy, compiled, args.rounds * len(scopes))
+
+
+if __name__ == "__main__":
+    main()
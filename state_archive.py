@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import gzip
+import json
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from config import get_retention_max_age_days, get_retention_max_entries, get_state_dir
+
+
+def _archive_dir(collection: str) -> Path:
+    return get_state_dir() / "archive" / collection
+
+
+def _partition(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def select_expired(
+    collection: str, entries: List[Dict[str, Any]], now: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    # Pending permission requests are still actionable and are never archived.
+    candidates = [entry for entry in entries if entry.get("status") != "pending"]
+    expired_ids = set()
+
+    max_entries = get_retention_max_entries(collection)
+    if max_entries is not None:
+        overflow = len(entries) - max_entries
+        for entry in candidates[: max(overflow, 0)]:
+            expired_ids.add(entry["id"])
+
+    max_age_days = get_retention_max_age_days(collection)
+    if max_age_days is not None:
+        cutoff = (now or time.time()) - max_age_days * 86400
+        for entry in candidates:
+            if entry.get("timestamp", cutoff) < cutoff:
+                expired_ids.add(entry["id"])
+
+    return [entry for entry in candidates if entry["id"] in expired_ids]
+
+
+def archive_entries(collection: str, entries: Iterable[Dict[str, Any]]) -> int:
+    partitions: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for entry in entries:
+        partitions[_partition(entry.get("timestamp", time.time()))].append(entry)
+    if not partitions:
+        return 0
+
+    archive_dir = _archive_dir(collection)
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    archived = 0
+    for partition, items in sorted(partitions.items()):
+        # Appending opens a new gzip member; gzip readers treat the members
+        # of one file as a single stream.
+        with gzip.open(archive_dir / f"{partition}.jsonl.gz", "at", encoding="utf-8") as handle:
+            for item in items:
+                handle.write(json.dumps(item, separators=(",", ":")) + "\n")
+        archived += len(items)
+    return archived
+
+
+def list_segments(collection: str) -> List[Path]:
+    archive_dir = _archive_dir(collection)
+    if not archive_dir.exists():
+        return []
+    return sorted(archive_dir.glob("*.jsonl.gz"))
+
+
+def iter_archived(
+    collection: str, since: Optional[float] = None, until: Optional[float] = None
+) -> Iterator[Dict[str, Any]]:
+    first = _partition(since) if since is not None else None
+    last = _partition(until) if until is not None else None
+    for segment in list_segments(collection):
+        partition = segment.name[: -len(".jsonl.gz")]
+        if (first and partition < first) or (last and partition > last):
+            continue
+        with gzip.open(segment, "rt", encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                timestamp = entry.get("timestamp", 0)
+                if since is not None and timestamp < since:
+                    continue
+                if until is not None and timestamp > until:
+                    continue
+                yield entry
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from config import get_state_dir
+from file_lock import file_lock
+
+
+COLLECTIONS = ("activity", "permission_requests", "interview", "cursor_prompts")
+
+_initialized: set = set()
+
+
+def _db_path() -> Path:
+    return get_state_dir() / "runtime_state.db"
+
+
+def _create_schema(connection: sqlite3.Connection) -> None:
+    connection.execute("PRAGMA journal_mode=WAL")
+    for collection in COLLECTIONS:
+        connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {collection} ("
+            "seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "id TEXT NOT NULL UNIQUE, "
+            "status TEXT, "
+            "timestamp REAL NOT NULL, "
+            "data TEXT NOT NULL)"
+        )
+        connection.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{collection}_timestamp "
+            f"ON {collection} (timestamp)"
+        )
+    connection.execute(
+        "CREATE INDEX IF NOT EXISTS idx_permission_requests_status "
+        "ON permission_requests (status)"
+    )
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+    )
+
+
+def connect() -> sqlite3.Connection:
+    path = _db_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(str(path), timeout=30)
+    connection.execute("PRAGMA busy_timeout=30000")
+    if str(path) not in _initialized:
+        # Switching to WAL needs an exclusive lock and SQLite may fail it with
+        # "database is locked" instead of waiting, so processes take turns.
+        with file_lock(path.with_name(f"{path.name}.init.lock")), connection:
+            _create_schema(connection)
+        _initialized.add(str(path))
+    return connection
+
+
+def _insert(connection: sqlite3.Connection, collection: str, entry: Dict[str, Any]) -> None:
+    connection.execute(
+        f"INSERT OR REPLACE INTO {collection} (id, status, timestamp, data) "
+        "VALUES (?, ?, ?, ?)",
+        (
+            entry["id"],
+            entry.get("status"),
+            entry.get("timestamp", time.time()),
+            json.dumps(entry),
+        ),
+    )
+
+
+def _update(
+    connection: sqlite3.Connection, collection: str, entry_id: str, fields: Dict[str, Any]
+) -> None:
+    row = connection.execute(
+        f"SELECT data FROM {collection} WHERE id = ?", (entry_id,)
+    ).fetchone()
+    if row is None:
+        return
+    entry = json.loads(row[0])
+    entry.update(fields)
+    connection.execute(
+        f"UPDATE {collection} SET status = ?, data = ? WHERE id = ?",
+        (entry.get("status"), json.dumps(entry), entry_id),
+    )
+
+
+def _touch(connection: sqlite3.Connection, timestamp: float) -> None:
+    connection.execute(
+        "INSERT OR REPLACE INTO meta (key, value) VALUES ('last_updated', ?)",
+        (str(timestamp),),
+    )
+
+
+def apply_records(records: Iterable[Dict[str, Any]]) -> None:
+    with closing(connect()) as connection, connection:
+        # The write lock is taken before _update reads an entry, so another
+        # process can't update it in between and have its fields overwritten;
+        # leaving the with block commits.
+        connection.execute("BEGIN IMMEDIATE")
+        last_timestamp = None
+        for record in records:
+            if record["op"] == "append":
+                _insert(connection, record["collection"], record["entry"])
+            elif record["op"] == "update":
+                _update(connection, record["collection"], record["id"], record["fields"])
+            last_timestamp = record["timestamp"]
+        if last_timestamp is not None:
+            _touch(connection, last_timestamp)
+
+
+def load_state() -> Dict[str, Any]:
+    state: Dict[str, Any] = {}
+    with closing(connect()) as connection:
+        for collection in COLLECTIONS:
+            rows = connection.execute(
+                f"SELECT data FROM {collection} ORDER BY seq"
+            ).fetchall()
+            state[collection] = [json.loads(row[0]) for row in rows]
+        row = connection.execute(
+            "SELECT value FROM meta WHERE key = 'last_updated'"
+        ).fetchone()
+    state["last_updated"] = float(row[0]) if row else time.time()
+    return state
+
+
+def save_state(state: Dict[str, Any]) -> None:
+    with closing(connect()) as connection, connection:
+        for collection in COLLECTIONS:
+            connection.execute(f"DELETE FROM {collection}")
+            for entry in state.get(collection, []):
+                _insert(connection, collection, entry)
+        _touch(connection, state.get("last_updated", time.time()))
+
+
+def import_state(state: Dict[str, Any]) -> int:
+    imported = 0
+    with closing(connect()) as connection, connection:
+        for collection in COLLECTIONS:
+            for entry in state.get(collection, []):
+                _insert(connection, collection, entry)
+                imported += 1
+        _touch(connection, state.get("last_updated", time.time()))
+    return imported
+
+
+def is_empty() -> bool:
+    with closing(connect()) as connection:
+        for collection in COLLECTIONS:
+            if connection.execute(f"SELECT 1 FROM {collection} LIMIT 1").fetchone():
+                return False
+    return True
+
+
+def recent(collection: str, limit: int) -> List[Dict[str, Any]]:
+    with closing(connect()) as connection:
+        rows = connection.execute(
+            f"SELECT data FROM {collection} ORDER BY seq DESC LIMIT ?", (limit,)
+        ).fetchall()
+    return [json.loads(row[0]) for row in reversed(rows)]
+
+
+def get_entry(collection: str, entry_id: str) -> Optional[Dict[str, Any]]:
+    with closing(connect()) as connection:
+        row = connection.execute(
+            f"SELECT data FROM {collection} WHERE id = ?", (entry_id,)
+        ).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def by_status(collection: str, status: str) -> List[Dict[str, Any]]:
+    with closing(connect()) as connection:
+        rows = connection.execute(
+            f"SELECT data FROM {collection} WHERE status = ? ORDER BY seq", (status,)
+        ).fetchall()
+    return [json.loads(row[0]) for row in rows]
+
+
+def select_expired(
+    collection: str, max_entries: Optional[int], cutoff: Optional[float]
+) -> List[Dict[str, Any]]:
+    not_pending = "(status IS NULL OR status != 'pending')"
+    expired: Dict[str, Dict[str, Any]] = {}
+    with closing(connect()) as connection:
+        if max_entries is not None:
+            total = connection.execute(f"SELECT COUNT(*) FROM {collection}").fetchone()[0]
+            overflow = total - max_entries
+            if overflow > 0:
+                rows = connection.execute(
+                    f"SELECT data FROM {collection} WHERE {not_pending} ORDER BY seq LIMIT ?",
+                    (overflow,),
+                ).fetchall()
+                for row in rows:
+                    entry = json.loads(row[0])
+                    expired[entry["id"]] = entry
+        if cutoff is not None:
+            rows = connection.execute(
+                f"SELECT data FROM {collection} WHERE {not_pending} AND timestamp < ? "
+                "ORDER BY seq",
+                (cutoff,),
+            ).fetchall()
+            for row in rows:
+                entry = json.loads(row[0])
+                expired[entry["id"]] = entry
+    return list(expired.values())
+
+
+def delete_entries(collection: str, entry_ids: Iterable[str]) -> None:
+    with closing(connect()) as connection, connection:
+        connection.executemany(
+            f"DELETE FROM {collection} WHERE id = ?", [(entry_id,) for entry_id in entry_ids]
+        )
@@ -1,12 +1,53 @@
 from __future__ import annotations
 
 import json
+import threading
 import time
 import uuid
-from typing import Any, Dict, List, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
 
-from config import ensure_directories, get_state_dir
-from observability import log_event
+import state_archive
+import state_sqlite
+from config import (
+    ensure_directories,
+    get_retention_max_age_days,
+    get_retention_max_entries,
+    get_state_backend,
+    get_state_dir,
+    get_state_journal_max_bytes,
+)
+from file_lock import atomic_write_text, file_lock
+from observability import current_trace, log_event
+
+
+# The default backend appends mutations to a journal next to the JSON snapshot
+# so that recording one event costs O(1); the journal is folded into the
+# snapshot once it grows past the configured size. EXEGOL_STATE_BACKEND=sqlite
+# stores the same records in indexed SQLite tables instead. Entries past the
+# configured retention move into gzip archive segments (see state_archive).
+
+_RETENTION_CHECK_INTERVAL = 200
+_records_since_retention = 0
+
+
+class _Batch:
+    def __init__(self) -> None:
+        self.records: List[Dict[str, Any]] = []
+        self.lock = threading.Lock()
+
+    def add(self, record: Dict[str, Any]) -> None:
+        with self.lock:
+            self.records.append(record)
+
+    def drain(self) -> List[Dict[str, Any]]:
+        with self.lock:
+            records, self.records = self.records, []
+        return records
+
+
+_active_batch: ContextVar[Optional[_Batch]] = ContextVar("exegol_state_batch", default=None)
 
 
 def _default_state() -> Dict[str, Any]:
@@ -23,34 +64,246 @@ def _state_path():
     return get_state_dir() / "runtime_state.json"
 
 
-def load_state() -> Dict[str, Any]:
-    ensure_directories()
+def _journal_path():
+    return get_state_dir() / "runtime_state.journal.jsonl"
+
+
+def _lock_path():
+    return get_state_dir() / "runtime_state.lock"
+
+
+def _load_snapshot() -> Dict[str, Any]:
     path = _state_path()
     if not path.exists():
         return _default_state()
     with path.open("r", encoding="utf-8") as handle:
-        return json.load(handle)
+        state = json.load(handle)
+    for key, value in _default_state().items():
+        state.setdefault(key, value)
+    return state
+
+
+def _apply_record(state: Dict[str, Any], record: Dict[str, Any]) -> None:
+    collection = state.setdefault(record["collection"], [])
+    if record["op"] == "append":
+        collection.append(record["entry"])
+    elif record["op"] == "update":
+        for entry in collection:
+            if entry["id"] == record["id"]:
+                entry.update(record["fields"])
+                break
+    state["last_updated"] = record["timestamp"]
+
+
+def _read_journal() -> List[Dict[str, Any]]:
+    path = _journal_path()
+    if not path.exists():
+        return []
+    records = []
+    with path.open("r", encoding="utf-8") as handle:
+        for line in handle:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # A torn trailing line from an interrupted append is ignored.
+                continue
+    return records
+
+
+_imported_state_dirs: set = set()
+
+
+def _use_sqlite() -> bool:
+    if get_state_backend() != "sqlite":
+        return False
+    state_dir = str(get_state_dir())
+    if state_dir not in _imported_state_dirs:
+        _imported_state_dirs.add(state_dir)
+        ensure_directories()
+        with file_lock(_lock_path()):
+            has_json_state = _state_path().exists() or _journal_path().exists()
+            if has_json_state and state_sqlite.is_empty():
+                migrate_json_to_sqlite()
+    return True
+
+
+def _load_committed_state() -> Dict[str, Any]:
+    ensure_directories()
+    if _use_sqlite():
+        return state_sqlite.load_state()
+    with file_lock(_lock_path()):
+        state = _load_snapshot()
+        records = _read_journal()
+    for record in records:
+        _apply_record(state, record)
+    return state
+
+
+def load_state() -> Dict[str, Any]:
+    state = _load_committed_state()
+    batch = _active_batch.get()
+    if batch is not None:
+        with batch.lock:
+            pending = list(batch.records)
+        for record in pending:
+            _apply_record(state, record)
+    return state
 
 
 def save_state(state: Dict[str, Any]) -> None:
     ensure_directories()
     state["last_updated"] = time.time()
-    path = _state_path()
-    with path.open("w", encoding="utf-8") as handle:
-        json.dump(state, handle, indent=2)
+    if _use_sqlite():
+        state_sqlite.save_state(state)
+        return
+    with file_lock(_lock_path()):
+        atomic_write_text(_state_path(), json.dumps(state, indent=2))
+        _journal_path().unlink(missing_ok=True)
+
+
+def _expire_from_state(state: Dict[str, Any]) -> int:
+    archived = 0
+    for collection in state_sqlite.COLLECTIONS:
+        entries = state.get(collection, [])
+        expired = state_archive.select_expired(collection, entries)
+        if not expired:
+            continue
+        archived += state_archive.archive_entries(collection, expired)
+        expired_ids = {entry["id"] for entry in expired}
+        state[collection] = [entry for entry in entries if entry["id"] not in expired_ids]
+    return archived
+
+
+def _expire_from_sqlite() -> int:
+    archived = 0
+    for collection in state_sqlite.COLLECTIONS:
+        max_age_days = get_retention_max_age_days(collection)
+        cutoff = time.time() - max_age_days * 86400 if max_age_days is not None else None
+        expired = state_sqlite.select_expired(
+            collection, get_retention_max_entries(collection), cutoff
+        )
+        if not expired:
+            continue
+        archived += state_archive.archive_entries(collection, expired)
+        state_sqlite.delete_entries(collection, [entry["id"] for entry in expired])
+    return archived
+
+
+def enforce_retention() -> int:
+    ensure_directories()
+    with file_lock(_lock_path()):
+        if _use_sqlite():
+            archived = _expire_from_sqlite()
+        else:
+            state = _load_committed_state()
+            archived = _expire_from_state(state)
+            save_state(state)
+    if archived:
+        log_event("state_archived", {"entries": archived})
+    return archived
+
+
+def compact_state() -> None:
+    enforce_retention()
+
+
+def load_archived(
+    collection: str, since: Optional[float] = None, until: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    return list(state_archive.iter_archived(collection, since=since, until=until))
+
+
+def migrate_json_to_sqlite() -> int:
+    ensure_directories()
+    with file_lock(_lock_path()):
+        state = _load_snapshot()
+        for record in _read_journal():
+            _apply_record(state, record)
+        return state_sqlite.import_state(state)
+
+
+def _commit_records(records: List[Dict[str, Any]]) -> None:
+    if not records:
+        return
+    ensure_directories()
+    if _use_sqlite():
+        global _records_since_retention
+        state_sqlite.apply_records(records)
+        _records_since_retention += len(records)
+        if _records_since_retention >= _RETENTION_CHECK_INTERVAL:
+            _records_since_retention = 0
+            enforce_retention()
+        return
+    lines = "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records)
+    with file_lock(_lock_path()):
+        with _journal_path().open("a", encoding="utf-8") as handle:
+            handle.write(lines)
+            size = handle.tell()
+        if size >= get_state_journal_max_bytes():
+            compact_state()
+
+
+def _write_record(record: Dict[str, Any]) -> None:
+    batch = _active_batch.get()
+    if batch is not None:
+        batch.add(record)
+        return
+    _commit_records([record])
+
+
+@contextmanager
+def transaction(batch: Optional[_Batch] = None) -> Iterator[None]:
+    # Mutations inside the block are buffered and committed in a single write
+    # on exit. Records are committed even if the block raises, because they
+    # describe side effects that already happened. Nested blocks join the
+    # outermost one, and worker threads started with a copied context share it.
+    # Passing a batch from new_batch() joins that batch instead; its records
+    # stay buffered until the owner calls commit_batch().
+    if batch is None and _active_batch.get() is not None:
+        yield
+        return
+    owned = batch is None
+    active = _Batch() if batch is None else batch
+    token = _active_batch.set(active)
+    try:
+        yield
+    finally:
+        _active_batch.reset(token)
+        if owned:
+            _commit_records(active.drain())
+
+
+def new_batch() -> _Batch:
+    return _Batch()
+
+
+def commit_batch(batch: _Batch) -> None:
+    records = batch.drain()
+    if records:
+        _commit_records(records)
+
+
+def _append_entry(collection: str, entry: Dict[str, Any]) -> None:
+    _write_record(
+        {
+            "op": "append",
+            "collection": collection,
+            "entry": entry,
+            "timestamp": time.time(),
+        }
+    )
 
 
 def append_activity(message: str, metadata: Optional[Dict[str, Any]] = None) -> None:
-    state = load_state()
-    state["activity"].append(
+    _append_entry(
+        "activity",
         {
             "id": str(uuid.uuid4()),
             "message": message,
             "metadata": metadata or {},
             "timestamp": time.time(),
-        }
+        },
     )
-    save_state(state)
     log_event("activity", {"message": message, "metadata": metadata or {}})
 
 
@@ -60,10 +313,13 @@ def add_permission_request(
     agent: Dict[str, Any],
     reason: Optional[str] = None,
     origin: Optional[Dict[str, Any]] = None,
+    batch_id: Optional[str] = None,
 ) -> str:
-    state = load_state()
+    # Requests raised by one flow share a batch_id so they can be decided
+    # together.
     request_id = str(uuid.uuid4())
-    state["permission_requests"].append(
+    _append_entry(
+        "permission_requests",
         {
             "id": request_id,
             "title": title,
@@ -72,47 +328,120 @@ def add_permission_request(
             "reason": reason,
             "origin": origin or {},
             "status": "pending",
+            "batch_id": batch_id,
+            "trace": current_trace(),
             "timestamp": time.time(),
-        }
+        },
     )
-    save_state(state)
     log_event("permission_request", {"request_id": request_id, "title": title})
     return request_id
 
 
-def update_permission_request(request_id: str, status: str) -> None:
-    state = load_state()
-    for request in state["permission_requests"]:
-        if request["id"] == request_id:
-            request["status"] = status
-            request["resolved_at"] = time.time()
-            break
-    save_state(state)
+def update_permission_request(
+    request_id: str, status: str, fields: Optional[Dict[str, Any]] = None
+) -> None:
+    # Extra fields, e.g. a job id or an execution result, are merged into the
+    # stored request alongside the new status.
+    _write_record(
+        {
+            "op": "update",
+            "collection": "permission_requests",
+            "id": request_id,
+            "fields": {**(fields or {}), "status": status, "resolved_at": time.time()},
+            "timestamp": time.time(),
+        }
+    )
     log_event("permission_decision", {"request_id": request_id, "status": status})
 
 
 def add_interview_message(role: str, content: str) -> None:
-    state = load_state()
-    state["interview"].append(
+    _append_entry(
+        "interview",
         {
             "id": str(uuid.uuid4()),
             "role": role,
             "content": content,
             "timestamp": time.time(),
-        }
+        },
     )
-    save_state(state)
 
 
 def add_cursor_prompt(repo_path: str, prompt: str) -> None:
-    state = load_state()
-    state["cursor_prompts"].append(
+    _append_entry(
+        "cursor_prompts",
         {
             "id": str(uuid.uuid4()),
             "repo_path": repo_path,
             "prompt": prompt,
             "timestamp": time.time(),
-        }
+        },
     )
-    save_state(state)
     log_event("cursor_prompt", {"repo_path": repo_path})
+
+
+def _recent(collection: str, limit: int) -> List[Dict[str, Any]]:
+    if _use_sqlite():
+        ensure_directories()
+        return state_sqlite.recent(collection, limit)
+    return load_state()[collection][-limit:]
+
+
+def recent_activity(limit: int = 10) -> List[Dict[str, Any]]:
+    return _recent("activity", limit)
+
+
+def recent_cursor_prompts(limit: int = 10) -> List[Dict[str, Any]]:
+    return _recent("cursor_prompts", limit)
+
+
+def list_interview_messages(limit: int = 200) -> List[Dict[str, Any]]:
+    return _recent("interview", limit)
+
+
+def list_pending_permission_requests() -> List[Dict[str, Any]]:
+    if _use_sqlite():
+        ensure_directories()
+        return state_sqlite.by_status("permission_requests", "pending")
+    return [
+        request
+        for request in load_state()["permission_requests"]
+        if request["status"] == "pending"
+    ]
+
+
+def dashboard_view(
+    activity_limit: int = 10,
+    prompt_limit: int = 10,
+    interview_limit: int = 200,
+) -> Dict[str, List[Dict[str, Any]]]:
+    # Everything the dashboard shows per rerun. SQLite answers each view from
+    # its indexes; the JSON backend replays the journal once for all of them.
+    if _use_sqlite():
+        ensure_directories()
+        return {
+            "interview": state_sqlite.recent("interview", interview_limit),
+            "activity": state_sqlite.recent("activity", activity_limit),
+            "pending_permissions": state_sqlite.by_status("permission_requests", "pending"),
+            "cursor_prompts": state_sqlite.recent("cursor_prompts", prompt_limit),
+        }
+    state = load_state()
+    return {
+        "interview": state["interview"][-interview_limit:],
+        "activity": state["activity"][-activity_limit:],
+        "pending_permissions": [
+            request
+            for request in state["permission_requests"]
+            if request["status"] == "pending"
+        ],
+        "cursor_prompts": state["cursor_prompts"][-prompt_limit:],
+    }
+
+
+def get_permission_request(request_id: str) -> Optional[Dict[str, Any]]:
+    if _use_sqlite():
+        ensure_directories()
+        return state_sqlite.get_entry("permission_requests", request_id)
+    for request in load_state()["permission_requests"]:
+        if request["id"] == request_id:
+            return request
+    return None
@@ -0,0 +1,46 @@
+import os
+
+import pytest
+
+
+@pytest.fixture(autouse=True, scope="session")
+def _session_log_dir(tmp_path_factory):
+    # Tests that don't set their own directories, and the metrics snapshot
+    # persisted at interpreter exit, write here instead of the repo's logs/.
+    os.environ.setdefault("EXEGOL_LOG_DIR", str(tmp_path_factory.mktemp("logs")))
+    os.environ.setdefault("EXEGOL_STATE_DIR", str(tmp_path_factory.mktemp("state")))
+    yield
+
+
+def _write_agents(path, name: str, role: str, permissions=()) -> None:
+    lines = ["# Agents", "", "```yaml", "agents:", f"  - name: \"{name}\"", f"    role: \"{role}\""]
+    if permissions:
+        lines.append("    permissions:")
+        lines.extend(f"      - \"{permission}\"" for permission in permissions)
+    lines.append("```")
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+@pytest.fixture
+def agent_workspace(tmp_path, monkeypatch):
+    # Points every EXEGOL_* path at tmp_path, with a single-agent agents.md
+    # and `repos` git repo directories named repo-0, repo-1, ... in the
+    # workspace. Returns the workspace dir.
+    def setup(*permissions: str, agent=("Tester", "QA"), repos: int = 0):
+        workspace_dir = tmp_path / "workspace"
+        workspace_dir.mkdir(exist_ok=True)
+        for index in range(repos):
+            (workspace_dir / f"repo-{index}" / ".git").mkdir(parents=True)
+        plan_path = tmp_path / "plan.md"
+        agents_path = tmp_path / "agents.md"
+        plan_path.write_text("# Plan\n", encoding="utf-8")
+        _write_agents(agents_path, *agent, permissions)
+        monkeypatch.setenv("EXEGOL_STATE_DIR", str(tmp_path / "state"))
+        monkeypatch.setenv("EXEGOL_LOG_DIR", str(tmp_path / "logs"))
+        monkeypatch.setenv("EXEGOL_WORKSPACE_DIR", str(workspace_dir))
+        monkeypatch.setenv("EXEGOL_PLAN_PATH", str(plan_path))
+        monkeypatch.setenv("EXEGOL_AGENTS_PATH", str(agents_path))
+        monkeypatch.setenv("EXEGOL_SANDBOX_MODE", "noop")
+        return workspace_dir
+
+    return setup
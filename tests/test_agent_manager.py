@@ -0,0 +1,42 @@
+import os
+
+import yaml
+
+import agent_manager
+from agent_manager import AgentManager, load_agents, load_plan
+
+
+def test_agents_and_plan_reload_only_when_files_change(
+    tmp_path, agent_workspace, monkeypatch
+) -> None:
+    agent_workspace(agent=("Maul", "Builder"))
+    plan_path = tmp_path / "plan.md"
+    agents_path = tmp_path / "agents.md"
+    parses = []
+    original = yaml.safe_load
+    monkeypatch.setattr(
+        agent_manager.yaml, "safe_load", lambda raw: parses.append(1) or original(raw)
+    )
+
+    manager = AgentManager()
+    assert [agent.name for agent in manager.agents] == ["Maul"]
+    assert [agent.name for agent in load_agents()] == ["Maul"]
+    assert len(parses) == 1
+    load_agents().clear()
+    assert len(manager.agents) == 1
+
+    agents_path.write_text(
+        "# Agents\n\n```yaml\nagents:\n  - name: \"Vader\"\n    role: \"Lead\"\n```\n",
+        encoding="utf-8",
+    )
+    assert [agent.name for agent in manager.agents] == ["Vader"]
+    assert len(parses) == 2
+
+    plan_path.write_text("# Plan\nStep 1\n", encoding="utf-8")
+    assert manager.plan == "# Plan\nStep 1\n"
+    # An edit that keeps both size and mtime is indistinguishable, so the
+    # cached content stays; that is the trade-off of not rereading the file.
+    stat = plan_path.stat()
+    plan_path.write_text("# Plan\nStep 2\n", encoding="utf-8")
+    os.utime(plan_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert load_plan() == "# Plan\nStep 1\n"
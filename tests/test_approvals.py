@@ -0,0 +1,76 @@
+import threading
+
+import approvals
+import job_queue
+import job_worker
+from agent_manager import AgentManager
+from state_store import get_permission_request, list_pending_permission_requests
+
+
+def test_flow_requests_share_a_batch(agent_workspace, monkeypatch) -> None:
+    agent_workspace("tests:run:requires-approval", repos=4)
+    monkeypatch.setattr(approvals, "ensure_workers", lambda: 0)
+    manager = AgentManager()
+
+    first = manager.run_repo_test_audit()
+    second = manager.run_repo_test_audit()
+
+    groups = approvals.group_by_batch(list_pending_permission_requests())
+    assert len(groups) == 2
+    assert [{request["id"] for request in group} for group in groups.values()] == [
+        set(first),
+        set(second),
+    ]
+
+
+def test_filtered_subset_is_approved_in_one_decision(agent_workspace, monkeypatch) -> None:
+    agent_workspace("tests:run:requires-approval", repos=4)
+    monkeypatch.setattr(approvals, "ensure_workers", lambda: 0)
+    request_ids = AgentManager().run_repo_test_audit()
+    (batch,) = approvals.group_by_batch(list_pending_permission_requests()).values()
+
+    subset = [request for request in batch if approvals.matches(request, "RUN repo-2")]
+    assert [request["id"] for request in subset] == [request_ids[2]]
+    subset += [request for request in batch if approvals.matches(request, "repo-3")]
+    job_ids = approvals.approve(subset)
+    # A stale list can't decide the same requests twice.
+    assert approvals.approve(subset) == []
+    assert approvals.deny(batch) == 2
+
+    assert job_worker.run_worker(idle_seconds=0) == 2
+    statuses = [get_permission_request(request_id) for request_id in request_ids]
+    assert [request["status"] for request in statuses] == [
+        "denied",
+        "denied",
+        "approved",
+        "approved",
+    ]
+    assert {statuses[2]["execution"], statuses[3]["execution"]} == {job_queue.SUCCEEDED}
+    assert [job["id"] for job in job_queue.list_jobs()] == job_ids[::-1]
+
+
+def test_concurrent_decisions_decide_a_request_once(agent_workspace, monkeypatch) -> None:
+    agent_workspace("tests:run:requires-approval", repos=1)
+    monkeypatch.setattr(approvals, "ensure_workers", lambda: 0)
+    (request_id,) = AgentManager().run_repo_test_audit()
+    (request,) = list_pending_permission_requests()
+    barrier = threading.Barrier(4)
+    decided = []
+
+    def decide(decision) -> None:
+        barrier.wait()
+        outcome = decision([request])
+        decided.append(len(outcome) if isinstance(outcome, list) else outcome)
+
+    threads = [
+        threading.Thread(target=decide, args=(decision,))
+        for decision in (approvals.approve, approvals.approve, approvals.approve, approvals.deny)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(decided) == 1
+    status = get_permission_request(request_id)["status"]
+    assert len(job_queue.list_jobs()) == (1 if status == "approved" else 0)
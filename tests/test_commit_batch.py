@@ -0,0 +1,72 @@
+import pytest
+from git import Repo
+
+from agent_manager import AgentManager
+from models import ActionRequest
+from state_store import list_pending_permission_requests
+
+
+CHANGES = [
+    {"repo": "alpha", "path": "src/app.py", "content": "print('app')\n"},
+    {"repo": "alpha", "path": "src/util.py", "content": "VALUE = 1\n"},
+    {"repo": "beta", "path": "README.md", "content": "# beta\n"},
+]
+
+
+def test_batch_commits_each_repo_once(agent_workspace) -> None:
+    workspace_dir = agent_workspace("git:commit", agent=("Builder", "Dev"))
+    manager = AgentManager()
+
+    summary = manager.run_commit_batch(CHANGES, message="generated")
+
+    alpha = Repo(workspace_dir / "alpha")
+    beta = Repo(workspace_dir / "beta")
+    assert summary == (
+        f"alpha@{alpha.head.commit.hexsha[:10]}, beta@{beta.head.commit.hexsha[:10]}"
+    )
+    assert len(list(alpha.iter_commits())) == 1
+    assert sorted(alpha.head.commit.stats.files) == ["src/app.py", "src/util.py"]
+    assert beta.head.commit.message == "generated"
+
+    manager.run_commit_batch(
+        [
+            {"repo": "alpha", "path": "src/util.py", "delete": True},
+            {"repo": "alpha", "path": "src/app.py", "content": "print('v2')\n"},
+        ]
+    )
+    assert [item.path for item in alpha.head.commit.tree.traverse()] == ["src", "src/app.py"]
+
+
+def test_batch_needs_a_single_approval(agent_workspace) -> None:
+    workspace_dir = agent_workspace("git:commit:requires-approval", agent=("Builder", "Dev"))
+    manager = AgentManager()
+
+    request_id = manager.run_commit_batch(CHANGES)
+
+    (request,) = list_pending_permission_requests()
+    assert request["id"] == request_id
+    assert request["action"]["action_type"] == "git_commit_batch"
+    assert request["batch_id"]
+    assert not (workspace_dir / "alpha").exists()
+
+    action = ActionRequest(**request["action"])
+    manager.executor.execute_action(action)
+    assert (workspace_dir / "beta" / "README.md").read_text(encoding="utf-8") == "# beta\n"
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        {"repo": "alpha", "path": "../escape.txt", "content": "x"},
+        {"repo": "alpha", "path": "/etc/passwd", "content": "x"},
+        {"repo": "alpha", "path": ".git/config", "content": "x"},
+        {"repo": "../alpha", "path": "file.txt", "content": "x"},
+    ],
+)
+def test_batch_rejects_paths_outside_the_repo(agent_workspace, change) -> None:
+    workspace_dir = agent_workspace("git:commit", agent=("Builder", "Dev"))
+
+    with pytest.raises(ValueError):
+        AgentManager().run_commit_batch([CHANGES[0], change])
+
+    assert not (workspace_dir / "alpha").exists()
@@ -0,0 +1,139 @@
+import shlex
+import sys
+from pathlib import Path
+
+from git import Repo
+
+import incremental_tests
+from models import ActionRequest
+from workspace_execution import WorkspaceExecutor
+
+
+PYTEST = f"{shlex.quote(sys.executable)} -m pytest -q -p no:cacheprovider"
+
+FILES = {
+    "pkg/__init__.py": "",
+    "pkg/util.py": "def double(value):\n    return value * 2\n",
+    "pkg/core.py": "from pkg.util import double\n\n\ndef quad(value):\n    return double(double(value))\n",
+    "tests/test_core.py": "from pkg.core import quad\n\n\ndef test_quad():\n    assert quad(1) == 4\n",
+    "tests/test_util.py": "from pkg import util\n\n\ndef test_double():\n    assert util.double(2) == 4\n",
+    "README.md": "# Sample\n",
+}
+
+
+def _commit(repo: Repo, files, message: str) -> str:
+    root = Path(repo.working_tree_dir)
+    for name, content in files.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding="utf-8")
+    repo.index.add(list(files))
+    return repo.index.commit(message).hexsha
+
+
+def _repo(tmp_path, monkeypatch) -> Repo:
+    monkeypatch.setenv("EXEGOL_STATE_DIR", str(tmp_path / "state"))
+    monkeypatch.setenv("EXEGOL_LOG_DIR", str(tmp_path / "logs"))
+    monkeypatch.setenv("EXEGOL_WORKSPACE_DIR", str(tmp_path / "workspace"))
+    repo = Repo.init(tmp_path / "workspace" / "sample-repo")
+    with repo.config_writer() as writer:
+        writer.set_value("user", "name", "Test")
+        writer.set_value("user", "email", "test@local")
+    _commit(repo, FILES, "initial")
+    return repo
+
+
+def test_selection_follows_imports_and_falls_back_to_full(tmp_path, monkeypatch) -> None:
+    repo = _repo(tmp_path, monkeypatch)
+    repo_path = Path(repo.working_tree_dir)
+
+    first = incremental_tests.select_tests(repo_path, "pytest")
+    assert first["selection"] == "full"
+    assert first["reason"] == "no previous successful audit"
+    incremental_tests.record_run(repo_path, "success")
+
+    _commit(repo, {"pkg/core.py": FILES["pkg/core.py"] + "\n# tweak\n"}, "core")
+    selection = incremental_tests.select_tests(repo_path, "pytest")
+    assert selection["selection"] == "incremental"
+    assert selection["tests"] == ["tests/test_core.py"]
+    assert selection["command"] == "pytest tests/test_core.py"
+
+    # util is imported directly by test_util and through core by test_core.
+    (repo_path / "pkg" / "util.py").write_text("def double(value):\n    return 2 * value\n")
+    selection = incremental_tests.select_tests(repo_path, "pytest")
+    assert selection["tests"] == ["tests/test_core.py", "tests/test_util.py"]
+
+    (repo_path / "requirements.txt").write_text("pytest\n", encoding="utf-8")
+    selection = incremental_tests.select_tests(repo_path, "pytest")
+    assert selection["selection"] == "full"
+    assert selection["reason"] == "requirements.txt changed"
+    assert incremental_tests.select_tests(repo_path, "make test")["selection"] == "full"
+
+
+def test_co_changed_tests_are_learned_from_history(tmp_path, monkeypatch) -> None:
+    repo = _repo(tmp_path, monkeypatch)
+    repo_path = Path(repo.working_tree_dir)
+    incremental_tests.record_run(repo_path, "success")
+
+    _commit(
+        repo,
+        {
+            "pkg/loader.py": "import json\n",
+            "tests/test_loader.py": "def test_loader():\n    assert True\n",
+        },
+        "loader",
+    )
+    incremental_tests.record_run(repo_path, "success")
+    assert incremental_tests.load_record(repo_path)["co_changes"]["pkg/loader.py"] == [
+        "tests/test_loader.py"
+    ]
+
+    _commit(repo, {"pkg/loader.py": "import csv\n"}, "loader again")
+    selection = incremental_tests.select_tests(repo_path, "pytest")
+    assert selection["tests"] == ["tests/test_loader.py"]
+
+
+def test_incremental_run_tests_action(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("EXEGOL_SANDBOX_MODE", "local")
+    repo = _repo(tmp_path, monkeypatch)
+    repo_path = Path(repo.working_tree_dir)
+    executor = WorkspaceExecutor()
+
+    def run(mode: str) -> str:
+        return executor.execute_action(
+            ActionRequest(
+                action_type="run_tests",
+                description="Run tests",
+                payload={"repo_path": str(repo_path), "command": PYTEST, "mode": mode},
+            )
+        )
+
+    assert run("full") == "success"
+    _commit(repo, {"README.md": "# Sample repo\n"}, "docs")
+    assert run("incremental") == "success"
+    assert "Selection: incremental (0 test files)" in (repo_path / "plan.md").read_text()
+
+    _commit(repo, {"pkg/util.py": "def double(value):\n    return value + value + 1\n"}, "bug")
+    assert run("incremental") == "failed"
+    plan = (repo_path / "plan.md").read_text()
+    assert "Selection: incremental (2 test files)" in plan
+
+
+def test_bytecode_and_cache_dirs_left_by_a_run_are_ignored(tmp_path, monkeypatch) -> None:
+    repo = _repo(tmp_path, monkeypatch)
+    repo_path = Path(repo.working_tree_dir)
+    incremental_tests.record_run(repo_path, "success")
+
+    for stray in (
+        "pkg/__pycache__/util.cpython-311.pyc",
+        "tests/__pycache__/test_core.cpython-311-pytest-8.0.0.pyc",
+        ".pytest_cache/v/cache/nodeids",
+        "stray.pyc",
+    ):
+        (repo_path / stray).parent.mkdir(parents=True, exist_ok=True)
+        (repo_path / stray).write_bytes(b"\0")
+    _commit(repo, {"pkg/core.py": FILES["pkg/core.py"] + "\n# tweak\n"}, "core")
+
+    selection = incremental_tests.select_tests(repo_path, "pytest")
+    assert selection["selection"] == "incremental"
+    assert selection["tests"] == ["tests/test_core.py"]
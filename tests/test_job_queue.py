@@ -0,0 +1,92 @@
+import time
+
+import job_queue
+import job_worker
+from state_store import add_permission_request, get_permission_request
+
+
+def _env(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("EXEGOL_STATE_DIR", str(tmp_path / "state"))
+    monkeypatch.setenv("EXEGOL_LOG_DIR", str(tmp_path / "logs"))
+    monkeypatch.setenv("EXEGOL_WORKSPACE_DIR", str(tmp_path / "workspace"))
+
+
+def _request(action):
+    return add_permission_request(title="Commit", action=action, agent={"name": "Maul"})
+
+
+COMMIT = {
+    "action_type": "git_commit",
+    "description": "Commit demo change",
+    "payload": {"repo": "queued-repo", "message": "queued"},
+}
+
+
+def test_claims_are_exclusive_and_stale_jobs_fail(tmp_path, monkeypatch) -> None:
+    _env(tmp_path, monkeypatch)
+    first = job_queue.enqueue(COMMIT)
+    second = job_queue.enqueue(COMMIT)
+
+    assert job_queue.claim("w1")["id"] == first
+    assert job_queue.claim("w2")["id"] == second
+    assert job_queue.claim("w3") is None
+
+    assert job_queue.complete(first, "abc")
+    assert job_queue.get_job(first)["result"] == "abc"
+    time.sleep(0.05)
+    (reaped,) = job_queue.reap_stale(0.01)
+    assert reaped["id"] == second
+    assert "w2" in reaped["error"]
+    # The slow worker's late result doesn't resurrect the reaped job.
+    assert not job_queue.complete(second, "late")
+    assert job_queue.counts() == {job_queue.SUCCEEDED: 1, job_queue.FAILED: 1}
+
+
+def test_worker_reports_results_on_the_permission_request(tmp_path, monkeypatch) -> None:
+    _env(tmp_path, monkeypatch)
+    ok_request = _request(COMMIT)
+    bad_action = {"action_type": "deploy", "description": "Deploy", "payload": {}}
+    bad_request = _request(bad_action)
+    job_queue.enqueue(COMMIT, request_id=ok_request)
+    job_queue.enqueue(bad_action, request_id=bad_request)
+
+    assert job_worker.run_worker(idle_seconds=0) == 2
+
+    ok = get_permission_request(ok_request)
+    assert ok["status"] == "approved"
+    assert ok["execution"] == job_queue.SUCCEEDED
+    assert len(ok["result"]) == 40
+    bad = get_permission_request(bad_request)
+    assert bad["execution"] == job_queue.FAILED
+    assert "Unsupported action" in bad["error"]
+    assert job_worker.live_workers() == []
+
+
+def test_ensure_workers_runs_jobs_in_another_process(tmp_path, monkeypatch) -> None:
+    _env(tmp_path, monkeypatch)
+    monkeypatch.setenv("EXEGOL_JOB_WORKER_IDLE_SECONDS", "1")
+    monkeypatch.setenv("EXEGOL_JOB_POLL_INTERVAL", "0.05")
+    request_id = _request(COMMIT)
+    job_id = job_queue.enqueue(COMMIT, request_id=request_id)
+
+    assert job_worker.ensure_workers(1) == 1
+    assert job_worker.ensure_workers(1) == 0
+    (pid,) = job_worker.live_workers()
+
+    deadline = time.time() + 30
+    while job_queue.get_job(job_id)["status"] != job_queue.SUCCEEDED:
+        assert time.time() < deadline
+        time.sleep(0.1)
+    job = job_queue.get_job(job_id)
+    assert job["worker"].endswith(f":{pid}")
+    assert get_permission_request(request_id)["result"] == job["result"]
+
+    while job_worker.live_workers():
+        assert time.time() < deadline
+        time.sleep(0.1)
+
+
+def test_packaged_build_starts_workers_through_the_launcher(monkeypatch) -> None:
+    monkeypatch.setattr(job_worker.sys, "frozen", True, raising=False)
+    monkeypatch.setattr(job_worker.sys, "executable", "/opt/exegol/exegol.exe")
+    assert job_worker._worker_command() == ["/opt/exegol/exegol.exe", "--job-worker"]
@@ -0,0 +1,88 @@
+import shlex
+import sys
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+import pytest
+
+import local_runner
+from local_runner import run_local
+from sandbox import list_active_runs
+
+
+PYTHON = shlex.quote(sys.executable)
+
+
+def _repo(tmp_path, monkeypatch):
+    monkeypatch.setenv("EXEGOL_LOG_DIR", str(tmp_path / "logs"))
+    monkeypatch.setenv("EXEGOL_STATE_DIR", str(tmp_path / "state"))
+    repo_path = tmp_path / "workspace" / "sample-repo"
+    repo_path.mkdir(parents=True)
+    (repo_path / "marker.txt").write_text("in repo\n", encoding="utf-8")
+    return repo_path
+
+
+def test_local_run_executes_in_repo_and_streams_output(tmp_path, monkeypatch) -> None:
+    repo_path = _repo(tmp_path, monkeypatch)
+    command = f"{PYTHON} -c \"print(open('marker.txt').read().strip())\""
+
+    result = run_local(repo_path, command)
+
+    assert result["status"] == "success"
+    assert result["exit_code"] == 0
+    assert result["runner"] == "local"
+    assert "in repo" in result["output_tail"]
+    output_path = Path(result["output_path"])
+    assert output_path.parent == tmp_path / "logs" / "test_runs"
+    assert "in repo" in output_path.read_text(encoding="utf-8")
+
+    failed = run_local(repo_path, f"{PYTHON} -c \"raise SystemExit(3)\"")
+    assert failed["status"] == "failed"
+    assert failed["exit_code"] == 3
+
+
+def test_hung_local_run_is_killed_on_timeout(tmp_path, monkeypatch) -> None:
+    repo_path = _repo(tmp_path, monkeypatch)
+
+    result = run_local(repo_path, f"{PYTHON} -c \"import time; time.sleep(30)\"", timeout=0.5)
+
+    assert result["status"] == "timeout"
+    assert result["exit_code"] is None
+    assert list_active_runs() == []
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="rlimits are POSIX-only")
+def test_resource_limits_apply_to_the_command(tmp_path, monkeypatch) -> None:
+    repo_path = _repo(tmp_path, monkeypatch)
+    monkeypatch.setenv("EXEGOL_LOCAL_CPU_SECONDS", "120")
+    monkeypatch.setenv("EXEGOL_LOCAL_MEMORY_MB", "4096")
+    script = (
+        "import resource; "
+        "print(resource.getrlimit(resource.RLIMIT_CPU), resource.getrlimit(resource.RLIMIT_AS))"
+    )
+
+    result = run_local(repo_path, f"{PYTHON} -c \"{script}\"")
+
+    assert result["status"] == "success"
+    assert "(120, 120) (4294967296, 4294967296)" in result["output_tail"]
+    assert result["command"].startswith(PYTHON)
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="kills the worker with a POSIX signal")
+def test_dead_worker_does_not_break_later_runs(tmp_path, monkeypatch) -> None:
+    repo_path = _repo(tmp_path, monkeypatch)
+
+    with pytest.raises(BrokenProcessPool):
+        run_local(repo_path, "kill -9 $PPID")
+    assert local_runner._pool is None
+
+    assert run_local(repo_path, f"{PYTHON} -c \"print('ok')\"")["status"] == "success"
+
+
+def test_failed_spawn_leaves_no_run_log(tmp_path, monkeypatch) -> None:
+    repo_path = _repo(tmp_path, monkeypatch)
+
+    with pytest.raises(OSError):
+        local_runner._run(str(repo_path / "missing"), "true", "broken", timeout=5)
+
+    assert not (tmp_path / "logs" / "test_runs" / "broken.log").exists()
@@ -0,0 +1,72 @@
+from metrics import ROLLUP_NAME, Histogram, MetricsRegistry, load_snapshots
+from observability import timer
+
+
+def test_histogram_percentiles_and_merge() -> None:
+    first = Histogram()
+    second = Histogram()
+    for value in range(1, 51):
+        first.record(float(value))
+    for value in range(51, 101):
+        second.record(float(value), error=value > 95)
+
+    first.merge(second)
+    summary = first.summary()
+
+    assert summary["count"] == 100
+    assert summary["error_rate"] == 0.05
+    assert abs(summary["p50_ms"] - 50) <= 50 * 0.05
+    assert abs(summary["p95_ms"] - 95) <= 95 * 0.05
+    assert abs(summary["p99_ms"] - 99) <= 99 * 0.05
+
+
+def test_registry_snapshots_merge_across_processes(tmp_path) -> None:
+    first = MetricsRegistry()
+    second = MetricsRegistry()
+    second.snapshot_name = "metrics-other.json"
+    first.record("workspace_run_tests", 10.0, {"mode": "docker"})
+    second.record("workspace_run_tests", 30.0, {"mode": "docker"}, error=True)
+    second.record("workspace_run_tests", 1.0, {"mode": "noop"})
+    first.persist(tmp_path)
+    second.persist(tmp_path)
+
+    merged = load_snapshots(tmp_path, include_live=False)
+
+    docker = merged[("workspace_run_tests", (("mode", "docker"),))]
+    assert docker.count == 2
+    assert docker.errors == 1
+    assert merged[("workspace_run_tests", (("mode", "noop"),))].count == 1
+
+
+def test_snapshots_of_exited_processes_are_rolled_up(tmp_path) -> None:
+    live = MetricsRegistry()
+    live.snapshot_name = "metrics-live.json"
+    live.record("workspace_run_tests", 10.0, {"mode": "docker"})
+    live.persist(tmp_path)
+    for name in ("metrics-exited-1.json", "metrics-exited-2.json"):
+        exited = MetricsRegistry()
+        exited.snapshot_name = name
+        exited.record("workspace_run_tests", 20.0, {"mode": "docker"})
+        exited.persist(tmp_path)
+        # Closing the handle releases the lock, as process exit would.
+        exited._liveness[1].close()
+
+    for _ in range(2):
+        merged = load_snapshots(tmp_path, include_live=False)
+        assert merged[("workspace_run_tests", (("mode", "docker"),))].count == 3
+    assert sorted(path.name for path in tmp_path.glob("metrics-*.json")) == [
+        "metrics-live.json",
+        ROLLUP_NAME,
+    ]
+
+
+def test_timer_feeds_registry_with_tags(tmp_path, monkeypatch) -> None:
+    import metrics
+
+    monkeypatch.setenv("EXEGOL_LOG_DIR", str(tmp_path / "logs"))
+
+    with timer("metrics_probe", {"mode": "noop", "repo_path": "/tmp/repo"}):
+        pass
+
+    histograms = metrics.registry.histograms()
+    assert histograms[("metrics_probe", (("mode", "noop"),))].count >= 1
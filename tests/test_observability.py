@@ -0,0 +1,34 @@
+import json
+
+from observability import flush_logs, log_event, set_log_mode
+
+
+def _read_events(log_dir):
+    path = log_dir / "ops.jsonl"
+    if not path.exists():
+        return []
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_sync_mode_writes_immediately(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("EXEGOL_LOG_DIR", str(tmp_path / "logs"))
+    set_log_mode("sync")
+
+    log_event("sync_event", {"value": 1})
+
+    assert [event["event_type"] for event in _read_events(tmp_path / "logs")] == ["sync_event"]
+    set_log_mode(None)
+
+
+def test_async_mode_batches_until_flush(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("EXEGOL_LOG_DIR", str(tmp_path / "logs"))
+    monkeypatch.setenv("EXEGOL_LOG_FLUSH_INTERVAL", "60")
+    set_log_mode("async")
+    try:
+        for index in range(20):
+            log_event("async_event", {"index": index})
+        flush_logs()
+        events = _read_events(tmp_path / "logs")
+        assert [event["index"] for event in events] == list(range(20))
+    finally:
+        set_log_mode(None)
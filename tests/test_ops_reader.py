@@ -0,0 +1,168 @@
+import json
+
+from ops_reader import OpsLogTailer
+
+
+def _write(path, events, mode="a"):
+    with path.open(mode, encoding="utf-8") as handle:
+        for event in events:
+            handle.write(json.dumps(event) + "\n")
+
+
+def test_tailer_reads_only_appended_lines(tmp_path) -> None:
+    path = tmp_path / "ops.jsonl"
+    _write(path, [{"event_type": "llm_routing", "latency_ms": 2.0}, {"event_type": "activity"}])
+    tailer = OpsLogTailer(path).poll()
+    assert (tailer.total_events, tailer.routing_count) == (2, 1)
+    first_offset = tailer.offset
+
+    with path.open("a", encoding="utf-8") as handle:
+        handle.write(json.dumps({"event_type": "llm_routing", "latency_ms": 4.0}) + "\n")
+        handle.write('{"event_type": "partial"')
+    tailer.poll()
+    assert tailer.offset > first_offset
+    assert tailer.total_events == 3
+    assert tailer.avg_routing_latency == 3.0
+
+    with path.open("a", encoding="utf-8") as handle:
+        handle.write("}\n")
+    tailer.poll()
+    assert tailer.recent[-1]["event_type"] == "partial"
+    assert tailer.total_events == 4
+
+
+def test_tailer_handles_truncation_and_rotation(tmp_path) -> None:
+    path = tmp_path / "ops.jsonl"
+    _write(path, [{"event_type": "activity"}] * 3)
+    tailer = OpsLogTailer(path).poll()
+
+    _write(path, [{"event_type": "llm_routing", "latency_ms": 1.0}], mode="w")
+    tailer.poll()
+    assert (tailer.total_events, tailer.routing_count) == (1, 1)
+
+    path.rename(tmp_path / "ops-old.jsonl")
+    _write(path, [{"event_type": "activity"}] * 2)
+    tailer.poll()
+    assert tailer.total_events == 3
+
+
+def test_rotation_indexes_segments_for_queries_and_tailer(tmp_path, monkeypatch) -> None:
+    log_dir = tmp_path / "logs"
+    monkeypatch.setenv("EXEGOL_LOG_DIR", str(log_dir))
+    monkeypatch.setenv("EXEGOL_LOG_ROTATE_BYTES", "400")
+    from observability import log_event
+    from ops_reader import query_events
+
+    tailer = OpsLogTailer().poll()
+    for index in range(30):
+        event_type = "llm_routing" if index % 10 == 0 else "activity"
+        log_event(event_type, {"index": index, "latency_ms": 1.0})
+        if index == 12:
+            tailer.poll()
+
+    index = json.loads((log_dir / "segments" / "index.json").read_text(encoding="utf-8"))
+    assert len(index) > 1
+    assert all(entry["file"].endswith(".jsonl.gz") for entry in index)
+    assert sum(entry["events"] for entry in index) < 30
+    assert index[1]["stream_offset"] == index[0]["bytes"]
+
+    routing = query_events("llm_routing")
+    assert [event["index"] for event in routing] == [0, 10, 20]
+    recent = [event["index"] for event in query_events(since=routing[-1]["timestamp"])]
+    assert recent[-10:] == list(range(20, 30))
+
+    tailer.poll()
+    assert tailer.total_events == 30
+    assert tailer.routing_count == 3
+
+
+def test_fresh_tailer_counts_rotated_segments(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("EXEGOL_LOG_DIR", str(tmp_path / "logs"))
+    monkeypatch.setenv("EXEGOL_LOG_ROTATE_BYTES", "400")
+    from observability import log_event
+    from ops_reader import query_events
+
+    for index in range(30):
+        event_type = "llm_routing" if index % 10 == 0 else "activity"
+        log_event(event_type, {"index": index, "latency_ms": float(index)})
+
+    assert (tmp_path / "logs" / "segments" / "index.json").exists()
+    tailer = OpsLogTailer().poll()
+    assert tailer.total_events == len(query_events()) == 30
+    assert tailer.routing_count == 3
+    assert tailer.avg_routing_latency == 10.0
+    assert tailer.last_route["index"] == 20
+
+    log_event("activity", {"index": 30})
+    tailer.poll()
+    assert tailer.total_events == 31
+
+
+def test_poll_during_rotation_does_not_double_count(tmp_path, monkeypatch) -> None:
+    import threading
+
+    import log_segments
+    from file_lock import file_lock
+
+    path = tmp_path / "ops.jsonl"
+    _write(path, [{"event_type": "activity", "timestamp": 1.0}] * 5)
+    tailer = OpsLogTailer(path).poll()
+    assert tailer.total_events == 5
+
+    # Poll from another thread after the segment is indexed but before the
+    # active file is removed.
+    poller = threading.Thread(target=tailer.poll)
+    write_index = log_segments.atomic_write_text
+
+    def write_index_then_poll(target, text):
+        write_index(target, text)
+        assert path.exists()
+        poller.start()
+        poller.join(0.2)
+
+    monkeypatch.setattr(log_segments, "atomic_write_text", write_index_then_poll)
+    with file_lock(log_segments.lock_path(path)):
+        log_segments.rotate(path)
+    poller.join()
+
+    tailer.poll()
+    assert tailer.total_events == 5
+    _write(path, [{"event_type": "activity", "timestamp": 2.0}])
+    tailer.poll()
+    assert tailer.total_events == 6
+
+
+def test_fresh_tailer_reads_segments_outside_the_writer_lock(tmp_path, monkeypatch) -> None:
+    import threading
+
+    import log_segments
+    from observability import log_event
+
+    monkeypatch.setenv("EXEGOL_LOG_DIR", str(tmp_path / "logs"))
+    monkeypatch.setenv("EXEGOL_LOG_ROTATE_BYTES", "400")
+    for index in range(30):
+        event_type = "llm_routing" if index == 2 else "activity"
+        log_event(event_type, {"index": index, "latency_ms": 4.0})
+    index = log_segments.load_index(tmp_path / "logs" / "ops.jsonl")
+    assert len(index) > 2
+
+    opened = []
+    open_segment = log_segments.open_segment
+
+    def open_segment_while_logging(log_path, entry):
+        # A writer in another thread must not wait on the tailer.
+        writer = threading.Thread(target=log_event, args=("activity", {"index": -1}))
+        writer.start()
+        writer.join(2)
+        assert not writer.is_alive()
+        opened.append(entry["file"])
+        return open_segment(log_path, entry)
+
+    monkeypatch.setattr(log_segments, "open_segment", open_segment_while_logging)
+    tailer = OpsLogTailer().poll()
+
+    assert opened == [index[0]["file"], index[-1]["file"]]
+    assert tailer.routing_count == 1
+    assert tailer.last_route["index"] == 2
+    assert tailer.avg_routing_latency == 4.0
+    assert tailer.total_events >= 30
@@ -0,0 +1,101 @@
+import pytest
+
+from agent_manager import AgentManager, load_policy
+from models import ActionRequest, AgentProfile
+from permission_judge import evaluate_action
+from policy_engine import Policy, compile_permissions, decide
+
+
+@pytest.mark.parametrize(
+    "permissions, action_type, expected",
+    [
+        (["git:commit"], "git_commit", (False, "Commit allowed.")),
+        (
+            ["git:commit:requires-approval"],
+            "git_commit_batch",
+            (True, "Commit allowed with approval."),
+        ),
+        (["git:commit:requires-approval", "git:commit"], "git_commit", (False, "Commit allowed.")),
+        (["tests:run"], "git_commit", (True, "Commit not allowed; approval required.")),
+        (["tests:run:requires-approval"], "run_tests", (True, "Test execution requires approval.")),
+        (["cursor:prompt"], "run_tests", (True, "Test execution not allowed; approval required.")),
+        (["cursor:prompt"], "cursor_prompt", (False, "Cursor prompt allowed.")),
+        (["git:commit"], "deploy", (True, "No matching permission found.")),
+        (["*"], "cursor_prompt", (False, "Cursor prompt allowed.")),
+        (["*:requires-approval"], "run_tests", (True, "Test execution requires approval.")),
+        (["git:*"], "git_commit", (False, "Commit allowed.")),
+        (["git:*"], "run_tests", (True, "Test execution not allowed; approval required.")),
+        (["*:run"], "run_tests", (False, "Test execution allowed.")),
+        (["git"], "git_commit", (True, "Commit not allowed; approval required.")),
+        (["git:commit:amend"], "git_commit", (True, "Commit not allowed; approval required.")),
+    ],
+)
+def test_decisions(permissions, action_type, expected) -> None:
+    agent = AgentProfile(name="Maul", role="Builder", permissions=permissions)
+    assert decide(agent, action_type) == expected
+
+
+def test_permission_sets_compile_once() -> None:
+    first = AgentProfile(name="Maul", role="Builder", permissions=["tests:run", "git:*"])
+    second = AgentProfile(name="Vader", role="Lead", permissions=["tests:run", "git:*"])
+    decide(first, "run_tests")
+    hits = compile_permissions.cache_info().hits
+    decide(second, "git_commit")
+    assert compile_permissions.cache_info().hits == hits + 1
+
+
+def test_agent_selection_follows_file_order_and_wildcards() -> None:
+    policy = Policy(
+        [
+            AgentProfile(name="Committer", role="Dev", permissions=["git:commit"]),
+            AgentProfile(name="Tester", role="QA", permissions=["tests:run:requires-approval"]),
+            AgentProfile(name="Admin", role="Lead", permissions=["*"]),
+        ]
+    )
+    assert policy.select_agent("tests:run").name == "Tester"
+    assert policy.select_agent("git").name == "Committer"
+    assert policy.select_agent("cursor:prompt").name == "Admin"
+    assert Policy(policy.agents[:2]).select_agent("cursor:prompt") is None
+
+
+def test_policy_recompiles_when_agents_file_changes(tmp_path, monkeypatch) -> None:
+    agents_path = tmp_path / "agents.md"
+    agents_path.write_text(
+        "# Agents\n\n```yaml\nagents:\n  - name: \"Maul\"\n    role: \"Builder\"\n"
+        "    permissions:\n      - \"git:commit\"\n```\n",
+        encoding="utf-8",
+    )
+    monkeypatch.setenv("EXEGOL_AGENTS_PATH", str(agents_path))
+    monkeypatch.setenv("EXEGOL_STATE_DIR", str(tmp_path / "state"))
+    monkeypatch.setenv("EXEGOL_LOG_DIR", str(tmp_path / "logs"))
+    monkeypatch.setenv("EXEGOL_WORKSPACE_DIR", str(tmp_path / "workspace"))
+    manager = AgentManager()
+
+    policy = load_policy()
+    assert load_policy() is policy
+    assert manager._select_agent("tests:run") is None
+
+    agents_path.write_text(
+        "# Agents\n\n```yaml\nagents:\n  - name: \"Maul\"\n    role: \"Builder\"\n"
+        "    permissions:\n      - \"tests:*\"\n```\n",
+        encoding="utf-8",
+    )
+    assert load_policy() is not policy
+    assert manager._select_agent("tests:run").name == "Maul"
+
+
+def test_evaluate_action_uses_the_loaded_agents_table(agent_workspace) -> None:
+    agent_workspace("tests:run", "git:commit:requires-approval", agent=("Maul", "Builder"))
+    agent = load_policy().agents[0]
+    action = ActionRequest(action_type="run_tests", description="Run tests", payload={})
+
+    misses = compile_permissions.cache_info().misses
+    hits = compile_permissions.cache_info().hits
+    assert evaluate_action(action, agent).requires_approval is False
+    action.action_type = "git_commit"
+    assert evaluate_action(action, agent).reason == "Commit allowed with approval."
+    assert compile_permissions.cache_info().hits == hits
+    assert compile_permissions.cache_info().misses == misses
+
+    stranger = AgentProfile(name="Maul", role="Builder", permissions=["git:commit"])
+    assert evaluate_action(action, stranger).requires_approval is False
@@ -0,0 +1,55 @@
+import time
+
+import state_store
+from agent_manager import AgentManager
+from state_store import load_state
+
+
+def test_parallel_audit_runs_repos_concurrently(agent_workspace, monkeypatch) -> None:
+    workspace_dir = agent_workspace("tests:run", repos=6)
+    manager = AgentManager()
+    original = manager.executor._run_tests_noop
+
+    def slow_noop(repo_path, command):
+        time.sleep(0.2)
+        return original(repo_path, command)
+
+    monkeypatch.setattr(manager.executor, "_run_tests_noop", slow_noop)
+
+    assert manager.run_repo_test_audit(concurrency=3) == []
+
+    summary = manager.last_audit_summary
+    assert summary["repos"] == 6
+    assert summary["concurrency"] == 3
+    assert summary["total_wall_ms"] < summary["sum_repo_wall_ms"]
+    assert {item["status"] for item in summary["per_repo"].values()} == {"skipped"}
+    for index in range(6):
+        assert (workspace_dir / f"repo-{index}" / "plan.md").exists()
+
+
+def test_parallel_audit_keeps_request_order(agent_workspace, monkeypatch) -> None:
+    agent_workspace("tests:run:requires-approval", repos=5)
+
+    request_ids = AgentManager().run_repo_test_audit(concurrency=4)
+
+    requests = {request["id"]: request for request in load_state()["permission_requests"]}
+    titles = [requests[request_id]["title"] for request_id in request_ids]
+    assert titles == [f"Run tests for repo-{index}" for index in range(5)]
+
+
+def test_audit_commits_state_in_two_writes(agent_workspace, monkeypatch) -> None:
+    agent_workspace("tests:run:requires-approval", repos=20)
+    commits = []
+    original_commit = state_store._commit_records
+    monkeypatch.setattr(
+        state_store,
+        "_commit_records",
+        lambda records: commits.append(len(records)) or original_commit(records),
+    )
+
+    request_ids = AgentManager().run_repo_test_audit()
+
+    # 20 permission requests plus their activity entries, then the summary.
+    assert commits == [40, 1]
+    assert len(request_ids) == 20
+    assert len(load_state()["permission_requests"]) == 20
@@ -0,0 +1,73 @@
+import shutil
+
+from git import Repo
+
+import repo_index
+
+
+def _init(path) -> Repo:
+    repo = Repo.init(path)
+    with repo.config_writer() as writer:
+        writer.set_value("user", "name", "Test")
+        writer.set_value("user", "email", "test@local")
+    (path / "README.md").write_text("# repo\n", encoding="utf-8")
+    repo.index.add(["README.md"])
+    repo.index.commit("initial")
+    return repo
+
+
+def test_index_tracks_added_removed_and_initialized_repos(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("EXEGOL_STATE_DIR", str(tmp_path / "state"))
+    root = tmp_path / "workspace"
+    root.mkdir()
+    alpha = _init(root / "alpha")
+    (root / "notes").mkdir()
+
+    entries = repo_index.list_repos(root)
+    assert [entry["name"] for entry in entries] == ["alpha"]
+    assert entries[0]["head"] == alpha.head.commit.hexsha
+    assert repo_index.index_path().exists()
+
+    _init(root / "beta")
+    _init(root / "notes")
+    assert [entry["name"] for entry in repo_index.list_repos(root)] == ["alpha", "beta", "notes"]
+
+    shutil.rmtree(root / "beta")
+    assert [entry["name"] for entry in repo_index.list_repos(root)] == ["alpha", "notes"]
+
+    (root / "README.md").write_text("not a repo", encoding="utf-8")
+    assert [entry["name"] for entry in repo_index.list_repos(root)] == ["alpha", "notes"]
+
+
+def test_deep_refresh_and_audit_results(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("EXEGOL_STATE_DIR", str(tmp_path / "state"))
+    root = tmp_path / "workspace"
+    root.mkdir()
+    repo = _init(root / "alpha")
+    repo_index.list_repos(root)
+
+    (root / "alpha" / "README.md").write_text("# changed\n", encoding="utf-8")
+    repo.index.add(["README.md"])
+    head = repo.index.commit("second").hexsha
+    repo_index.record_audit(root, root / "alpha", "success")
+    repo_index.record_audit(root, tmp_path / "elsewhere", "failed")
+
+    (entry,) = repo_index.list_repos(root, deep=True)
+    assert entry["head"] == head
+    assert entry["last_audit"]["status"] == "success"
+
+
+def test_shallow_refresh_goes_deep_only_when_stale(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("EXEGOL_STATE_DIR", str(tmp_path / "state"))
+    root = tmp_path / "workspace"
+    root.mkdir()
+    repo = _init(root / "alpha")
+    first = repo.head.commit.hexsha
+    assert repo_index.list_repos(root, deep_after=300)[0]["head"] == first
+
+    (root / "alpha" / "README.md").write_text("# changed\n", encoding="utf-8")
+    repo.index.add(["README.md"])
+    head = repo.index.commit("second").hexsha
+
+    assert repo_index.list_repos(root, deep_after=300)[0]["head"] == first
+    assert repo_index.list_repos(root, deep_after=0)[0]["head"] == head
@@ -0,0 +1,57 @@
+import pytest
+from git import Repo
+from git.exc import InvalidGitRepositoryError
+
+from models import ActionRequest
+from repo_pool import RepoPool, get_repo_pool
+from workspace_execution import WorkspaceExecutor
+
+
+def test_pool_reuses_handles_and_closes_evicted_ones(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("EXEGOL_LOG_DIR", str(tmp_path / "logs"))
+    for name in ("alpha", "beta", "gamma"):
+        Repo.init(tmp_path / name).close()
+    (tmp_path / "plain").mkdir()
+    pool = RepoPool(max_size=2)
+    closed = []
+
+    alpha = pool.get(tmp_path / "alpha")
+    monkeypatch.setattr(alpha, "close", lambda: closed.append("alpha"))
+    assert pool.get(tmp_path / "alpha") is alpha
+    pool.get(tmp_path / "beta")
+    pool.get(tmp_path / "alpha")
+    beta = pool.get(tmp_path / "beta")
+    monkeypatch.setattr(beta, "close", lambda: closed.append("beta"))
+    pool.get(tmp_path / "alpha")
+
+    pool.get(tmp_path / "gamma")
+    assert closed == ["beta"]
+    assert len(pool) == 2
+    with pytest.raises(InvalidGitRepositoryError):
+        pool.get(tmp_path / "plain")
+    assert len(pool) == 2
+
+    pool.close()
+    assert closed == ["beta", "alpha"]
+    assert len(pool) == 0
+
+
+def test_repeated_commits_share_one_handle(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("EXEGOL_STATE_DIR", str(tmp_path / "state"))
+    monkeypatch.setenv("EXEGOL_LOG_DIR", str(tmp_path / "logs"))
+    monkeypatch.setenv("EXEGOL_WORKSPACE_DIR", str(tmp_path / "workspace"))
+    executor = WorkspaceExecutor()
+    action = ActionRequest(
+        action_type="git_commit",
+        description="Commit",
+        payload={"repo": "pooled-repo", "message": "update"},
+    )
+
+    first = executor.execute_action(action)
+    second = executor.execute_action(action)
+
+    repo = executor.ensure_repo("pooled-repo")
+    assert repo is not get_repo_pool().get(tmp_path / "workspace" / "pooled-repo")
+    assert [commit.hexsha for commit in repo.iter_commits()] == [second, first]
+    assert repo.config_reader().get_value("user", "email") == "exegol@local"
+    repo.close()
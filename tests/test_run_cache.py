@@ -0,0 +1,120 @@
+import os
+import shlex
+import sys
+import time
+
+from git import Repo
+
+import run_cache
+from models import ActionRequest
+from state_store import load_state
+from workspace_execution import WorkspaceExecutor
+
+
+def _setup(tmp_path, monkeypatch):
+    monkeypatch.setenv("EXEGOL_STATE_DIR", str(tmp_path / "state"))
+    monkeypatch.setenv("EXEGOL_LOG_DIR", str(tmp_path / "logs"))
+    monkeypatch.setenv("EXEGOL_WORKSPACE_DIR", str(tmp_path / "workspace"))
+    monkeypatch.setenv("EXEGOL_SANDBOX_MODE", "local")
+    repo_dir = tmp_path / "workspace" / "sample-repo"
+    repo_dir.mkdir(parents=True)
+    repo = Repo.init(repo_dir)
+    with repo.config_writer() as writer:
+        writer.set_value("user", "name", "Test")
+        writer.set_value("user", "email", "test@local")
+    (repo_dir / "module.py").write_text("VALUE = 1\n", encoding="utf-8")
+    repo.index.add(["module.py"])
+    repo.index.commit("initial")
+    repo.close()
+    counter = tmp_path / "runs.txt"
+    script = f"open({str(counter)!r}, 'a').write('run\\n')"
+    command = f"{shlex.quote(sys.executable)} -c {shlex.quote(script)}"
+    return repo_dir, counter, command
+
+
+def _run(executor, repo_dir, command, **payload) -> str:
+    action = ActionRequest(
+        action_type="run_tests",
+        description="Run tests",
+        payload={"repo_path": str(repo_dir), "command": command, **payload},
+    )
+    return executor.execute_action(action)
+
+
+def _runs(counter) -> int:
+    return len(counter.read_text(encoding="utf-8").splitlines()) if counter.exists() else 0
+
+
+def test_unchanged_repo_reuses_cached_result(tmp_path, monkeypatch) -> None:
+    repo_dir, counter, command = _setup(tmp_path, monkeypatch)
+    executor = WorkspaceExecutor()
+
+    assert _run(executor, repo_dir, command) == "success"
+    assert _run(executor, repo_dir, command) == "success"
+    assert _runs(counter) == 1
+    activity = [entry["message"] for entry in load_state()["activity"]]
+    assert "Tests reused from cache for sample-repo" in activity
+
+    (repo_dir / "module.py").write_text("VALUE = 2\n", encoding="utf-8")
+    _run(executor, repo_dir, command)
+    assert _runs(counter) == 2
+
+    (repo_dir / "new_test.py").write_text("", encoding="utf-8")
+    _run(executor, repo_dir, command)
+    assert _runs(counter) == 3
+
+    _run(executor, repo_dir, command, use_cache=False)
+    assert _runs(counter) == 4
+
+    assert run_cache.invalidate(repo_dir) == 3
+    _run(executor, repo_dir, command)
+    assert _runs(counter) == 5
+
+
+def test_bytecode_left_by_a_run_keeps_the_cache_key(tmp_path, monkeypatch) -> None:
+    repo_dir, counter, command = _setup(tmp_path, monkeypatch)
+    executor = WorkspaceExecutor()
+
+    _run(executor, repo_dir, command)
+    (repo_dir / "__pycache__").mkdir()
+    (repo_dir / "__pycache__" / "module.cpython-311.pyc").write_bytes(b"\x00bytecode")
+    (repo_dir / ".pytest_cache").mkdir()
+    (repo_dir / ".pytest_cache" / "README.md").write_text("cache\n", encoding="utf-8")
+    _run(executor, repo_dir, command)
+
+    assert _runs(counter) == 1
+
+
+def test_untracked_sources_in_build_and_dot_dirs_change_the_key(tmp_path, monkeypatch) -> None:
+    repo_dir, counter, command = _setup(tmp_path, monkeypatch)
+    executor = WorkspaceExecutor()
+
+    _run(executor, repo_dir, command)
+    (repo_dir / "src" / "build").mkdir(parents=True)
+    (repo_dir / "src" / "build" / "helpers.py").write_text("VALUE = 1\n", encoding="utf-8")
+    _run(executor, repo_dir, command)
+    (repo_dir / "tests" / ".fixtures").mkdir(parents=True)
+    (repo_dir / "tests" / ".fixtures" / "data.json").write_text("{}\n", encoding="utf-8")
+    _run(executor, repo_dir, command)
+
+    assert _runs(counter) == 3
+
+
+def test_cache_evicts_least_recently_used(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("EXEGOL_STATE_DIR", str(tmp_path / "state"))
+    monkeypatch.setenv("EXEGOL_TEST_CACHE_MAX_ENTRIES", "2")
+    result = {"status": "success", "exit_code": 0}
+
+    assert run_cache.store("a", tmp_path, result)
+    assert run_cache.store("b", tmp_path, result)
+    assert not run_cache.store("c", tmp_path, {"status": "timeout"})
+    now = time.time()
+    os.utime(run_cache.cache_dir() / "a.json", (now - 200, now - 200))
+    os.utime(run_cache.cache_dir() / "b.json", (now - 100, now - 100))
+    # Reading "a" makes "b" the least recently used entry.
+    assert run_cache.lookup("a") == result
+    run_cache.store("d", tmp_path, result)
+
+    assert run_cache.lookup("b") is None
+    assert run_cache.lookup("a") == result
+    assert run_cache.lookup("d") == result
@@ -0,0 +1,188 @@
+import threading
+
+import pytest
+
+from sandbox import DockerSandboxPool, list_active_runs, request_cancel
+
+
+class FakeContainer:
+    def __init__(self, client, container_id: str) -> None:
+        self.client = client
+        self.id = container_id
+        self.status = "running"
+        self.removed = False
+        self.killed = threading.Event()
+        self.scripts = []
+
+    def reload(self) -> None:
+        pass
+
+    def kill(self) -> None:
+        self.status = "exited"
+        self.killed.set()
+
+    def remove(self, force=False) -> None:
+        self.removed = True
+
+
+class FakeAPI:
+    def __init__(self, client) -> None:
+        self.client = client
+        self.execs = {}
+
+    def exec_create(self, container_id, cmd):
+        container = self.client.containers.by_id[container_id]
+        container.scripts.append(cmd[-1])
+        exec_id = f"exec-{len(self.execs)}"
+        self.execs[exec_id] = container
+        return {"Id": exec_id}
+
+    def exec_start(self, exec_id, stream=False):
+        yield from self.client.chunks
+        if self.client.hang:
+            self.client.started.set()
+            self.execs[exec_id].killed.wait(10)
+
+    def exec_inspect(self, exec_id):
+        return {"ExitCode": self.client.exit_code}
+
+
+class FakeContainers:
+    def __init__(self, client) -> None:
+        self.client = client
+        self.created = []
+        self.by_id = {}
+
+    def run(self, **kwargs):
+        container = FakeContainer(self.client, f"container-{len(self.created)}")
+        self.created.append((kwargs, container))
+        self.by_id[container.id] = container
+        return container
+
+
+class FakeDockerClient:
+    def __init__(self, exit_code: int = 0, chunks=(b"collected 1 item\n", b"1 passed\n")) -> None:
+        self.exit_code = exit_code
+        self.chunks = list(chunks)
+        self.hang = False
+        self.started = threading.Event()
+        self.containers = FakeContainers(self)
+        self.api = FakeAPI(self)
+
+
+def _repo(tmp_path, monkeypatch):
+    monkeypatch.setenv("EXEGOL_LOG_DIR", str(tmp_path / "logs"))
+    monkeypatch.setenv("EXEGOL_STATE_DIR", str(tmp_path / "state"))
+    repo_path = tmp_path / "workspace" / "sample-repo"
+    repo_path.mkdir(parents=True)
+    return repo_path
+
+
+def test_pool_reuses_warm_containers(tmp_path, monkeypatch) -> None:
+    repo_path = _repo(tmp_path, monkeypatch)
+    client = FakeDockerClient()
+    pool = DockerSandboxPool(client=client, size=1, workspace_root=tmp_path / "workspace")
+    pool.warm()
+
+    first = pool.run(repo_path, "pytest -q")
+    second = pool.run(repo_path, "pytest -q")
+
+    assert first["status"] == second["status"] == "success"
+    assert len(client.containers.created) == 1
+    kwargs, container = client.containers.created[0]
+    assert kwargs["volumes"][str((tmp_path / "workspace").resolve())]["mode"] == "ro"
+    assert len(container.scripts) == 2
+    assert "cp -a /workspace/sample-repo /tmp/exegol-run-" in container.scripts[0]
+    assert container.scripts[0] != container.scripts[1]
+
+
+def test_pool_recycles_unhealthy_and_worn_containers(tmp_path, monkeypatch) -> None:
+    repo_path = _repo(tmp_path, monkeypatch)
+    client = FakeDockerClient(exit_code=1)
+    pool = DockerSandboxPool(
+        client=client, size=1, max_uses=2, workspace_root=tmp_path / "workspace"
+    )
+
+    assert pool.run(repo_path, "pytest")["status"] == "failed"
+    first = client.containers.created[0][1]
+    first.status = "exited"
+    pool.run(repo_path, "pytest")
+    assert first.removed
+    assert len(client.containers.created) == 2
+
+    pool.run(repo_path, "pytest")
+    second = client.containers.created[1][1]
+    assert second.removed
+
+    pool.close()
+
+
+def test_run_streams_output_to_file_with_progress(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("EXEGOL_TEST_PROGRESS_INTERVAL", "0")
+    repo_path = _repo(tmp_path, monkeypatch)
+    chunks = [f"line {index}\n".encode() * 200 for index in range(20)]
+    client = FakeDockerClient(chunks=chunks)
+    pool = DockerSandboxPool(client=client, size=1, workspace_root=tmp_path / "workspace")
+    progress = []
+
+    result = pool.run(repo_path, "pytest", on_progress=progress.append)
+
+    output_path = tmp_path / "logs" / "test_runs" / f"{result['run_id']}.log"
+    assert result["output_path"] == str(output_path)
+    assert output_path.read_bytes() == b"".join(chunks)
+    assert "output" not in result
+    assert len(result["output_tail"]) <= 8192
+    assert result["output_tail"].endswith("line 19\n")
+    assert len(progress) == len(chunks)
+    assert progress[-1]["bytes"] == result["output_bytes"]
+
+
+def test_failed_acquire_leaves_no_run_log(tmp_path, monkeypatch) -> None:
+    repo_path = _repo(tmp_path, monkeypatch)
+    pool = DockerSandboxPool(client=FakeDockerClient(), size=1, workspace_root=tmp_path / "workspace")
+
+    def broken_acquire():
+        raise RuntimeError("docker unavailable")
+
+    monkeypatch.setattr(pool, "acquire", broken_acquire)
+    with pytest.raises(RuntimeError):
+        pool.run(repo_path, "pytest", run_id="broken")
+
+    assert not (tmp_path / "logs" / "test_runs" / "broken.log").exists()
+
+
+def test_hung_run_times_out_and_container_is_discarded(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("EXEGOL_SANDBOX_CPUS", "1.5")
+    monkeypatch.setenv("EXEGOL_SANDBOX_MEMORY", "512m")
+    repo_path = _repo(tmp_path, monkeypatch)
+    client = FakeDockerClient()
+    client.hang = True
+    pool = DockerSandboxPool(client=client, size=1, workspace_root=tmp_path / "workspace")
+
+    result = pool.run(repo_path, "pytest", timeout=0.3)
+
+    assert result["status"] == "timeout"
+    assert result["exit_code"] is None
+    kwargs, container = client.containers.created[0]
+    assert kwargs["nano_cpus"] == 1_500_000_000
+    assert kwargs["mem_limit"] == "512m"
+    assert container.removed
+    assert list_active_runs() == []
+
+
+def test_run_can_be_cancelled_from_another_thread(tmp_path, monkeypatch) -> None:
+    repo_path = _repo(tmp_path, monkeypatch)
+    client = FakeDockerClient()
+    client.hang = True
+    pool = DockerSandboxPool(client=client, size=1, workspace_root=tmp_path / "workspace")
+    results = []
+
+    worker = threading.Thread(target=lambda: results.append(pool.run(repo_path, "pytest")))
+    worker.start()
+    assert client.started.wait(5)
+    (active,) = list_active_runs()
+    request_cancel(active["run_id"])
+    worker.join(5)
+
+    assert results[0]["status"] == "cancelled"
+    assert list_active_runs() == []
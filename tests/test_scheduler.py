@@ -0,0 +1,112 @@
+import threading
+import time
+
+import pytest
+
+import scheduler as scheduler_module
+from scheduler import FAILED, SKIPPED, Scheduler, Task
+
+
+@pytest.fixture
+def scheduler(tmp_path, monkeypatch):
+    monkeypatch.setenv("EXEGOL_STATE_DIR", str(tmp_path / "state"))
+    monkeypatch.setenv("EXEGOL_LOG_DIR", str(tmp_path / "logs"))
+    instance = Scheduler(workers=4, limits={"run_tests": 2})
+    yield instance
+    instance.shutdown()
+
+
+def test_dependencies_feed_results_and_failures_skip_dependents(scheduler) -> None:
+    flow = scheduler.submit(
+        "graph",
+        [
+            Task("a", lambda deps: 2),
+            Task("b", lambda deps: 3),
+            Task("sum", lambda deps: deps["a"] + deps["b"], deps=["a", "b"]),
+        ],
+    )
+    assert flow.result(timeout=5) == 5
+    assert flow.progress()["done"] == 3
+
+    def boom(deps):
+        raise ValueError("broken")
+
+    failing = scheduler.submit(
+        "failing",
+        [
+            Task("a", boom),
+            Task("b", lambda deps: 1, deps=["a"]),
+            Task("c", lambda deps: 1, deps=["b"]),
+        ],
+    )
+    with pytest.raises(RuntimeError, match="skipped c"):
+        failing.result(timeout=5)
+    assert [failing.tasks[name].status for name in "abc"] == [FAILED, SKIPPED, SKIPPED]
+
+
+def test_action_type_limits_and_priorities(scheduler) -> None:
+    lock = threading.Lock()
+    running = {"now": 0, "peak": 0}
+    order = []
+
+    def run_tests(deps):
+        with lock:
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+        time.sleep(0.05)
+        with lock:
+            running["now"] -= 1
+
+    audit = scheduler.submit(
+        "audit", [Task(f"t{index}", run_tests, action_type="run_tests") for index in range(6)]
+    )
+    urgent = scheduler.submit(
+        "urgent", [Task("prompt", lambda deps: order.append("urgent"))], priority=10
+    )
+    urgent.wait(5)
+    audit.wait(5)
+    # The prompt task is not limited by run_tests and overlaps the audit.
+    assert order == ["urgent"]
+    assert urgent.finished_at < audit.finished_at
+    assert running["peak"] == 2
+
+
+def test_flow_parallelism_cap_and_cycle_detection(scheduler) -> None:
+    active = []
+    peak = []
+
+    def work(deps):
+        active.append(1)
+        peak.append(len(active))
+        time.sleep(0.02)
+        active.pop()
+
+    flow = scheduler.submit("capped", [Task(f"w{i}", work) for i in range(5)], max_parallel=1)
+    flow.wait(5)
+    assert max(peak) == 1
+
+    with pytest.raises(ValueError, match="cycle"):
+        scheduler.submit(
+            "cyclic",
+            [Task("a", lambda deps: 1, deps=["b"]), Task("b", lambda deps: 1, deps=["a"])],
+        )
+
+
+def test_failed_state_commit_still_finishes_the_flow(scheduler, monkeypatch) -> None:
+    def broken_commit(batch):
+        raise OSError("disk full")
+
+    original = scheduler_module.commit_batch
+    monkeypatch.setattr(scheduler_module, "commit_batch", broken_commit)
+    flow = scheduler.submit(
+        "broken",
+        [
+            Task("a", lambda deps: 1, commit_group="writes"),
+            Task("b", lambda deps: 2, deps=["a"]),
+        ],
+    )
+    with pytest.raises(RuntimeError, match="disk full"):
+        flow.result(timeout=5)
+
+    monkeypatch.setattr(scheduler_module, "commit_batch", original)
+    assert scheduler.submit("next", [Task("a", lambda deps: 3)]).result(timeout=5) == 3
@@ -0,0 +1,97 @@
+import multiprocessing
+import time
+
+from state_store import add_permission_request, get_permission_request, load_state
+
+WORKERS = 6
+APPENDS_PER_WORKER = 50
+
+
+def _append_many(worker: int, env: dict) -> None:
+    import os
+
+    os.environ.update(env)
+    from state_store import append_activity
+
+    for index in range(APPENDS_PER_WORKER):
+        append_activity(f"worker {worker} event {index}", {"worker": worker})
+
+
+def _update_many(worker: int, env: dict, request_id: str) -> None:
+    import os
+
+    os.environ.update(env)
+    from state_store import update_permission_request
+
+    for index in range(APPENDS_PER_WORKER):
+        update_permission_request(request_id, "approved", {f"worker-{worker}-{index}": index})
+
+
+def _run_workers(env: dict, target=_append_many, args=()) -> float:
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=target, args=(worker, env, *args)) for worker in range(WORKERS)
+    ]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=120)
+        assert process.exitcode == 0
+    return time.perf_counter() - start
+
+
+def _stress(tmp_path, monkeypatch, backend: str) -> None:
+    env = {
+        "EXEGOL_STATE_DIR": str(tmp_path / "state"),
+        "EXEGOL_LOG_DIR": str(tmp_path / "logs"),
+        "EXEGOL_WORKSPACE_DIR": str(tmp_path / "workspace"),
+        "EXEGOL_STATE_BACKEND": backend,
+        # Small journal so compaction races with concurrent appends.
+        "EXEGOL_STATE_JOURNAL_MAX_BYTES": "4096",
+        "EXEGOL_RETENTION_MAX_ENTRIES": "0",
+    }
+    for key, value in env.items():
+        monkeypatch.setenv(key, value)
+
+    elapsed = _run_workers(env)
+
+    messages = [entry["message"] for entry in load_state()["activity"]]
+    expected = {
+        f"worker {worker} event {index}"
+        for worker in range(WORKERS)
+        for index in range(APPENDS_PER_WORKER)
+    }
+    assert len(messages) == len(expected)
+    assert set(messages) == expected
+    assert len(expected) / elapsed > 20
+
+
+def test_concurrent_appends_lose_no_records_json(tmp_path, monkeypatch) -> None:
+    _stress(tmp_path, monkeypatch, "json")
+
+
+def test_concurrent_appends_lose_no_records_sqlite(tmp_path, monkeypatch) -> None:
+    _stress(tmp_path, monkeypatch, "sqlite")
+
+
+def test_concurrent_updates_keep_every_field_sqlite(tmp_path, monkeypatch) -> None:
+    env = {
+        "EXEGOL_STATE_DIR": str(tmp_path / "state"),
+        "EXEGOL_LOG_DIR": str(tmp_path / "logs"),
+        "EXEGOL_WORKSPACE_DIR": str(tmp_path / "workspace"),
+        "EXEGOL_STATE_BACKEND": "sqlite",
+    }
+    for key, value in env.items():
+        monkeypatch.setenv(key, value)
+    request_id = add_permission_request("Run tests", {"action_type": "run_tests"}, {"name": "QA"})
+
+    _run_workers(env, _update_many, (request_id,))
+
+    request = get_permission_request(request_id)
+    assert request["status"] == "approved"
+    assert {
+        f"worker-{worker}-{index}"
+        for worker in range(WORKERS)
+        for index in range(APPENDS_PER_WORKER)
+    } <= set(request)
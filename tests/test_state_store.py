@@ -0,0 +1,178 @@
+import json
+
+import state_store
+from state_store import (
+    add_cursor_prompt,
+    add_interview_message,
+    add_permission_request,
+    append_activity,
+    dashboard_view,
+    enforce_retention,
+    get_permission_request,
+    list_pending_permission_requests,
+    load_archived,
+    load_state,
+    recent_activity,
+    transaction,
+    update_permission_request,
+)
+
+
+def test_append_activity_journals_without_rewriting_snapshot(tmp_path, monkeypatch) -> None:
+    state_dir = tmp_path / "state"
+    monkeypatch.setenv("EXEGOL_STATE_DIR", str(state_dir))
+    monkeypatch.setenv("EXEGOL_LOG_DIR", str(tmp_path / "logs"))
+    monkeypatch.setenv("EXEGOL_WORKSPACE_DIR", str(tmp_path / "workspace"))
+
+    append_activity("first")
+    request_id = add_permission_request(
+        title="Commit", action={"action_type": "git_commit"}, agent={"name": "Maul"}
+    )
+    update_permission_request(request_id, "approved")
+
+    assert not (state_dir / "runtime_state.json").exists()
+    journal = (state_dir / "runtime_state.journal.jsonl").read_text(encoding="utf-8")
+    assert len(journal.splitlines()) == 3
+
+    state = load_state()
+    assert [entry["message"] for entry in state["activity"]] == ["first"]
+    assert state["permission_requests"][0]["status"] == "approved"
+
+
+def test_journal_compacts_into_snapshot(tmp_path, monkeypatch) -> None:
+    state_dir = tmp_path / "state"
+    monkeypatch.setenv("EXEGOL_STATE_DIR", str(state_dir))
+    monkeypatch.setenv("EXEGOL_LOG_DIR", str(tmp_path / "logs"))
+    monkeypatch.setenv("EXEGOL_WORKSPACE_DIR", str(tmp_path / "workspace"))
+    monkeypatch.setenv("EXEGOL_STATE_JOURNAL_MAX_BYTES", "600")
+
+    for index in range(10):
+        append_activity(f"event {index}")
+
+    snapshot = json.loads((state_dir / "runtime_state.json").read_text(encoding="utf-8"))
+    assert snapshot["activity"]
+    state = load_state()
+    assert [entry["message"] for entry in state["activity"]] == [
+        f"event {index}" for index in range(10)
+    ]
+
+
+def test_sqlite_backend_imports_json_state_and_queries(tmp_path, monkeypatch) -> None:
+    state_dir = tmp_path / "state"
+    monkeypatch.setenv("EXEGOL_STATE_DIR", str(state_dir))
+    monkeypatch.setenv("EXEGOL_LOG_DIR", str(tmp_path / "logs"))
+    monkeypatch.setenv("EXEGOL_WORKSPACE_DIR", str(tmp_path / "workspace"))
+
+    append_activity("from json")
+    first_id = add_permission_request(
+        title="Run tests", action={"action_type": "run_tests"}, agent={"name": "Maul"}
+    )
+
+    monkeypatch.setenv("EXEGOL_STATE_BACKEND", "sqlite")
+    second_id = add_permission_request(
+        title="Commit", action={"action_type": "git_commit"}, agent={"name": "Maul"}
+    )
+    append_activity("from sqlite")
+    update_permission_request(first_id, "denied")
+
+    assert (state_dir / "runtime_state.db").exists()
+    assert [req["id"] for req in list_pending_permission_requests()] == [second_id]
+    assert get_permission_request(first_id)["status"] == "denied"
+    assert [entry["message"] for entry in recent_activity(1)] == ["from sqlite"]
+    assert len(load_state()["activity"]) == 2
+
+
+def test_dashboard_view_loads_json_state_once(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("EXEGOL_STATE_DIR", str(tmp_path / "state"))
+    monkeypatch.setenv("EXEGOL_LOG_DIR", str(tmp_path / "logs"))
+    monkeypatch.setenv("EXEGOL_WORKSPACE_DIR", str(tmp_path / "workspace"))
+
+    for index in range(12):
+        append_activity(f"activity {index}")
+    add_interview_message("user", "hello")
+    add_cursor_prompt("repo", "fix it")
+    pending_id = add_permission_request(
+        title="Commit", action={"action_type": "git_commit"}, agent={"name": "Maul"}
+    )
+
+    loads = []
+    load_committed = state_store._load_committed_state
+    monkeypatch.setattr(
+        state_store, "_load_committed_state", lambda: loads.append(1) or load_committed()
+    )
+    view = dashboard_view()
+
+    assert len(loads) == 1
+    assert [entry["message"] for entry in view["activity"]] == [
+        f"activity {index}" for index in range(2, 12)
+    ]
+    assert [entry["content"] for entry in view["interview"]] == ["hello"]
+    assert [entry["prompt"] for entry in view["cursor_prompts"]] == ["fix it"]
+    assert [request["id"] for request in view["pending_permissions"]] == [pending_id]
+
+    monkeypatch.setenv("EXEGOL_STATE_BACKEND", "sqlite")
+    assert dashboard_view() == view
+    assert len(loads) == 1
+
+
+def test_transaction_commits_mutations_in_one_write(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("EXEGOL_STATE_DIR", str(tmp_path / "state"))
+    monkeypatch.setenv("EXEGOL_LOG_DIR", str(tmp_path / "logs"))
+    monkeypatch.setenv("EXEGOL_WORKSPACE_DIR", str(tmp_path / "workspace"))
+
+    commits = []
+    original_commit = state_store._commit_records
+    monkeypatch.setattr(
+        state_store,
+        "_commit_records",
+        lambda records: commits.append(len(records)) or original_commit(records),
+    )
+
+    with transaction():
+        for index in range(200):
+            request_id = add_permission_request(
+                title=f"Run tests {index}",
+                action={"action_type": "run_tests"},
+                agent={"name": "Maul"},
+            )
+            append_activity(f"Permission requested {index}")
+        with transaction():
+            update_permission_request(request_id, "approved")
+        assert load_state()["permission_requests"][-1]["status"] == "approved"
+
+    assert commits == [401]
+    state = load_state()
+    assert len(state["permission_requests"]) == 200
+    assert len(state["activity"]) == 200
+
+
+def test_retention_archives_old_entries_but_keeps_pending(tmp_path, monkeypatch) -> None:
+    state_dir = tmp_path / "state"
+    monkeypatch.setenv("EXEGOL_STATE_DIR", str(state_dir))
+    monkeypatch.setenv("EXEGOL_LOG_DIR", str(tmp_path / "logs"))
+    monkeypatch.setenv("EXEGOL_WORKSPACE_DIR", str(tmp_path / "workspace"))
+    monkeypatch.setenv("EXEGOL_RETENTION_MAX_ENTRIES", "3")
+
+    for index in range(5):
+        append_activity(f"event {index}")
+    pending_id = add_permission_request(
+        title="Old request", action={"action_type": "run_tests"}, agent={"name": "Maul"}
+    )
+    for index in range(4):
+        request_id = add_permission_request(
+            title=f"Request {index}", action={"action_type": "run_tests"}, agent={"name": "Maul"}
+        )
+        update_permission_request(request_id, "approved")
+
+    assert enforce_retention() == 4
+
+    state = load_state()
+    assert [entry["message"] for entry in state["activity"]] == [
+        "event 2",
+        "event 3",
+        "event 4",
+    ]
+    assert len(state["permission_requests"]) == 3
+    assert any(request["id"] == pending_id for request in state["permission_requests"])
+    assert [entry["message"] for entry in load_archived("activity")] == ["event 0", "event 1"]
+    assert list((state_dir / "archive" / "activity").glob("*.jsonl.gz"))
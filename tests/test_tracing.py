@@ -0,0 +1,30 @@
+from agent_manager import AgentManager
+from ops_reader import query_events
+from trace_export import latest_trace_id, load_trace, to_chrome_trace, to_collapsed_stacks
+
+
+def test_audit_spans_nest_and_export(agent_workspace) -> None:
+    agent_workspace("tests:run", repos=2)
+
+    AgentManager().run_repo_test_audit()
+
+    events = query_events()
+    trace_id = latest_trace_id("repo_test_audit", events)
+    trace = load_trace(trace_id, events)
+    spans = {event["span_id"]: event for event in trace if event.get("start_ts")}
+    root = next(span for span in spans.values() if span["event_type"] == "repo_test_audit")
+    runs = [span for span in spans.values() if span["event_type"] == "workspace_run_tests"]
+
+    assert root["parent_span_id"] is None
+    assert len(runs) == 2
+    for run in runs:
+        action = spans[run["parent_span_id"]]
+        assert action["event_type"] == "workspace_execute_action"
+        assert action["parent_span_id"] == root["span_id"]
+    checks = [event for event in trace if event["event_type"] == "permission_check"]
+    assert {event["parent_span_id"] for event in checks} == {root["span_id"]}
+
+    chrome = to_chrome_trace(trace)
+    assert sum(1 for event in chrome["traceEvents"] if event["ph"] == "X") == len(spans)
+    stacks = to_collapsed_stacks(trace)
+    assert "repo_test_audit;workspace_execute_action;workspace_run_tests " in stacks
@@ -49,3 +49,20 @@ def test_cursor_prompt_adds_state_entry(tmp_path, monkeypatch) -> None:
 
     state = load_state()
     assert state["cursor_prompts"]
+
+
+def test_timed_out_run_is_recorded_in_plan(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("EXEGOL_STATE_DIR", str(tmp_path / "state"))
+    monkeypatch.setenv("EXEGOL_LOG_DIR", str(tmp_path / "logs"))
+    monkeypatch.setenv("EXEGOL_WORKSPACE_DIR", str(tmp_path / "workspace"))
+    repo_dir = tmp_path / "workspace" / "sample-repo"
+    repo_dir.mkdir(parents=True)
+
+    executor = WorkspaceExecutor()
+    executor._update_plan_with_result(
+        repo_dir, {"status": "timeout", "command": "pytest", "timeout_s": 30.0}
+    )
+
+    content = (repo_dir / "plan.md").read_text(encoding="utf-8")
+    assert "- Result: timeout" in content
+    assert "timed out after 30.0s" in content
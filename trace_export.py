@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import argparse
+import json
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ops_reader import query_events
+
+
+def _is_span(event: Dict[str, Any]) -> bool:
+    return bool(event.get("span_id")) and event.get("start_ts") is not None
+
+
+def latest_trace_id(
+    event_type: Optional[str] = None, events: Optional[List[Dict[str, Any]]] = None
+) -> Optional[str]:
+    for event in reversed(events if events is not None else query_events(event_type)):
+        if _is_span(event) and not event.get("parent_span_id"):
+            if event_type is None or event.get("event_type") == event_type:
+                return event["trace_id"]
+    return None
+
+
+def load_trace(
+    trace_id: str, events: Optional[List[Dict[str, Any]]] = None
+) -> List[Dict[str, Any]]:
+    source = events if events is not None else query_events()
+    return [event for event in source if event.get("trace_id") == trace_id]
+
+
+def to_chrome_trace(events: List[Dict[str, Any]]) -> Dict[str, Any]:
+    # Spans become complete ("X") events and plain events become instant
+    # ("i") markers; chrome://tracing and Perfetto both read this format.
+    trace_events = []
+    span_threads = {}
+    for event in events:
+        if not _is_span(event):
+            continue
+        span_threads[event["span_id"]] = (event.get("pid", 0), event.get("thread_id", 0))
+        args = {
+            key: value
+            for key, value in event.items()
+            if key not in {"event_type", "timestamp", "start_ts", "elapsed_ms", "pid", "thread_id"}
+        }
+        trace_events.append(
+            {
+                "name": event["event_type"],
+                "cat": "span",
+                "ph": "X",
+                "ts": event["start_ts"] * 1_000_000,
+                "dur": event.get("elapsed_ms", 0) * 1000,
+                "pid": event.get("pid", 0),
+                "tid": event.get("thread_id", 0),
+                "args": args,
+            }
+        )
+    for event in events:
+        if _is_span(event):
+            continue
+        pid, tid = span_threads.get(event.get("parent_span_id"), (0, 0))
+        trace_events.append(
+            {
+                "name": event.get("event_type", "event"),
+                "cat": "event",
+                "ph": "i",
+                "s": "t",
+                "ts": event.get("timestamp", 0) * 1_000_000,
+                "pid": pid,
+                "tid": tid,
+                "args": {k: v for k, v in event.items() if k not in {"event_type", "timestamp"}},
+            }
+        )
+    return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+
+def to_collapsed_stacks(events: List[Dict[str, Any]]) -> str:
+    # One "root;child;leaf <microseconds>" line per stack, weighted by self
+    # time, as consumed by flamegraph.pl and speedscope.
+    spans = {event["span_id"]: event for event in events if _is_span(event)}
+    child_time: Dict[str, float] = defaultdict(float)
+    for span in spans.values():
+        parent = span.get("parent_span_id")
+        if parent in spans:
+            child_time[parent] += span.get("elapsed_ms", 0)
+
+    weights: Dict[str, float] = defaultdict(float)
+    for span_id, span in spans.items():
+        frames = []
+        cursor: Optional[Dict[str, Any]] = span
+        while cursor is not None:
+            frames.append(cursor["event_type"])
+            cursor = spans.get(cursor.get("parent_span_id"))
+        self_ms = max(span.get("elapsed_ms", 0) - child_time[span_id], 0)
+        weights[";".join(reversed(frames))] += self_ms
+    return "".join(
+        f"{stack} {round(self_ms * 1000)}\n" for stack, self_ms in sorted(weights.items())
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Export an Exegol trace from the ops log.")
+    parser.add_argument("--trace-id", help="Trace to export (default: most recent root span).")
+    parser.add_argument("--root", help="Pick the most recent trace rooted at this event type.")
+    parser.add_argument("--format", choices=("chrome", "collapsed"), default="chrome")
+    parser.add_argument("--output", "-o", type=Path, required=True)
+    args = parser.parse_args(argv)
+
+    events = query_events()
+    trace_id = args.trace_id or latest_trace_id(args.root, events)
+    if trace_id is None:
+        raise SystemExit("No trace found in the ops log.")
+    trace = load_trace(trace_id, events)
+    if args.format == "chrome":
+        args.output.write_text(json.dumps(to_chrome_trace(trace)), encoding="utf-8")
+    else:
+        args.output.write_text(to_collapsed_stacks(trace), encoding="utf-8")
+    print(f"Wrote trace {trace_id} ({len(trace)} events) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,40 @@
 from __future__ import annotations
 
-import json
+import time
 from pathlib import Path
 from typing import Any, Dict, List
 
 import streamlit as st
 
+import approvals
+import job_queue
+import metrics
+import repo_index
+import run_cache
+from config import get_workspace_dir
 from agent_manager import AgentManager
-from config import get_log_dir
+from job_worker import ensure_workers
 from llm_router import route_prompt
-from models import ActionRequest
+from ops_reader import OpsLogTailer
+from scheduler import get_scheduler
+from sandbox import list_active_runs, request_cancel
 from state_store import (
     add_interview_message,
     append_activity,
-    load_state,
-    update_permission_request,
+    dashboard_view,
+    transaction,
 )
-from workspace_execution import WorkspaceExecutor
 
 
-def _load_ops_events() -> List[Dict[str, Any]]:
-    log_path = get_log_dir() / "ops.jsonl"
-    if not log_path.exists():
-        return []
-    events = []
-    for line in log_path.read_text(encoding="utf-8").splitlines():
-        try:
-            events.append(json.loads(line))
-        except json.JSONDecodeError:
-            continue
-    return events
+@st.cache_resource
+def _ops_tailer() -> OpsLogTailer:
+    return OpsLogTailer()
+
+
+@st.cache_resource
+def _agent_manager() -> AgentManager:
+    # One manager (and its executor) per server process instead of per rerun.
+    return AgentManager()
 
 
 def _tooltip(label: str, text: str) -> str:
@@ -53,34 +58,34 @@ def _render_component_legend() -> None:
     )
 
 
-def _render_interview(state: Dict[str, Any]) -> None:
+def _render_interview(messages: List[Dict[str, Any]]) -> None:
     st.subheader("User Interview")
-    for entry in state.get("interview", []):
+    for entry in messages:
         with st.chat_message(entry["role"]):
             st.write(entry["content"])
 
     prompt = st.chat_input("Describe the business pain point")
     if prompt:
-        add_interview_message("user", prompt)
-        decision = route_prompt(prompt, intent="interview")
-        response = f"Interview queued via {decision.provider}. Captured: {prompt}"
-        add_interview_message("assistant", response)
-        append_activity(
-            "Captured interview input",
-            {
-                "component": "Wayfinder",
-                "location": "llm_router.py",
-                "llm_used": decision.provider,
-                "provider": decision.provider,
-            },
-        )
+        with transaction():
+            add_interview_message("user", prompt)
+            decision = route_prompt(prompt, intent="interview")
+            response = f"Interview queued via {decision.provider}. Captured: {prompt}"
+            add_interview_message("assistant", response)
+            append_activity(
+                "Captured interview input",
+                {
+                    "component": "Wayfinder",
+                    "location": "llm_router.py",
+                    "llm_used": decision.provider,
+                    "provider": decision.provider,
+                },
+            )
         st.rerun()
 
 
-def _render_activity(state: Dict[str, Any]) -> None:
+def _render_activity(activities: List[Dict[str, Any]]) -> None:
     st.subheader("Activity Feed")
-    activities = list(reversed(state.get("activity", [])))[:10]
-    for activity in activities:
+    for activity in reversed(activities):
         metadata = activity.get("metadata", {})
         component = metadata.get("component", "Unknown")
         location = metadata.get("location", "Unknown")
@@ -96,17 +101,14 @@ def _render_activity(state: Dict[str, Any]) -> None:
 
 def _render_ops_dashboard() -> None:
     st.subheader("Operations Dashboard")
-    events = _load_ops_events()
-    routing = [e for e in events if e.get("event_type") == "llm_routing"]
-    latencies = [e.get("latency_ms", 0) for e in routing if e.get("latency_ms") is not None]
-    avg_latency = round(sum(latencies) / len(latencies), 2) if latencies else 0.0
+    tailer = _ops_tailer().poll()
 
     col1, col2, col3 = st.columns(3)
-    col1.metric("LLM Routes", len(routing))
-    col2.metric("Avg Routing Latency (ms)", avg_latency)
-    col3.metric("Total Events", len(events))
+    col1.metric("LLM Routes", tailer.routing_count)
+    col2.metric("Avg Routing Latency (ms)", tailer.avg_routing_latency)
+    col3.metric("Total Events", tailer.total_events)
 
-    last_route = next((e for e in reversed(routing)), None)
+    last_route = tailer.last_route
     if last_route:
         details = (
             f"Provider: {last_route.get('provider')} | "
@@ -118,73 +120,183 @@ def _render_ops_dashboard() -> None:
             unsafe_allow_html=True,
         )
 
+    latency_rows = metrics.summarize(metrics.load_snapshots())
+    if latency_rows:
+        st.caption("Latency percentiles")
+        st.dataframe(
+            latency_rows,
+            column_order=(
+                "event_type",
+                "tags",
+                "count",
+                "error_rate",
+                "p50_ms",
+                "p95_ms",
+                "p99_ms",
+            ),
+            hide_index=True,
+        )
+
     st.caption("Recent events")
-    for event in events[-5:]:
+    for event in list(tailer.recent):
         st.write(f"{event.get('event_type')} :: {event.get('timestamp')}")
 
 
-def _render_permissions(state: Dict[str, Any]) -> None:
+# Reruns only do the cheap shallow refresh; HEADs are re-read on demand, after
+# audits (record_audit) and at most this often otherwise.
+REPO_DEEP_REFRESH_SECONDS = 300
+
+
+def _render_repos() -> None:
+    entries = repo_index.list_repos(get_workspace_dir(), deep_after=REPO_DEEP_REFRESH_SECONDS)
+    if not entries:
+        return
+    st.subheader("Workspace Repos")
+    if st.button("Refresh Repos", help="Re-read every repo's HEAD"):
+        entries = repo_index.list_repos(get_workspace_dir(), deep=True)
+    st.dataframe(
+        [
+            {
+                "repo": entry["name"],
+                "head": (entry["head"] or "")[:10],
+                "last_audit": (entry["last_audit"] or {}).get("status"),
+            }
+            for entry in entries
+        ],
+        hide_index=True,
+    )
+
+
+def _render_request(request: dict) -> None:
+    st.markdown(f"**{request['title']}**")
+    st.write(f"Agent: {request['agent']['name']} ({request['agent']['role']})")
+    if request.get("reason"):
+        st.markdown(f"_Paused for approval_: {request['reason']}")
+    origin = request.get("origin", {})
+    if origin:
+        origin_line = (
+            f"{_tooltip('Origin', 'Permission was evaluated here')}: "
+            f"{origin.get('component', 'Unknown')} / {origin.get('location', 'Unknown')}"
+        )
+        st.markdown(origin_line, unsafe_allow_html=True)
+    st.code(request["action"]["description"])
+    col1, col2 = st.columns(2)
+    if col1.button("Approve", key=f"approve-{request['id']}"):
+        # Execution happens in a job_worker process; the request records
+        # the job's progress and result once a worker picks it up.
+        approvals.approve([request])
+        st.rerun()
+    if col2.button("Deny", key=f"deny-{request['id']}"):
+        approvals.deny([request])
+        st.rerun()
+
+
+def _render_batch(batch_id: str, requests: list) -> None:
+    action_types = ", ".join(sorted({request["action"]["action_type"] for request in requests}))
+    with st.expander(f"Batch {batch_id} :: {len(requests)} requests ({action_types})"):
+        query = st.text_input(
+            "Filter", key=f"filter-{batch_id}", placeholder="Repo name, action type, ..."
+        )
+        selected = [request for request in requests if approvals.matches(request, query)]
+        col1, col2 = st.columns(2)
+        if col1.button(
+            f"Approve {len(selected)}", key=f"approve-batch-{batch_id}", disabled=not selected
+        ):
+            approvals.approve(selected)
+            st.rerun()
+        if col2.button(
+            f"Deny {len(selected)}", key=f"deny-batch-{batch_id}", disabled=not selected
+        ):
+            approvals.deny(selected)
+            st.rerun()
+        for request in selected:
+            _render_request(request)
+
+
+def _render_permissions(pending: List[Dict[str, Any]]) -> None:
     st.subheader("Permission Requests")
-    executor = WorkspaceExecutor()
-    pending = [req for req in state.get("permission_requests", []) if req["status"] == "pending"]
     if not pending:
         st.write("No pending approvals.")
         return
 
-    for request in pending:
-        st.markdown(f"**{request['title']}**")
-        st.write(f"Agent: {request['agent']['name']} ({request['agent']['role']})")
-        if request.get("reason"):
-            st.markdown(f"_Paused for approval_: {request['reason']}")
-        origin = request.get("origin", {})
-        if origin:
-            origin_line = (
-                f"{_tooltip('Origin', 'Permission was evaluated here')}: "
-                f"{origin.get('component', 'Unknown')} / {origin.get('location', 'Unknown')}"
-            )
-            st.markdown(origin_line, unsafe_allow_html=True)
-        st.code(request["action"]["description"])
-        col1, col2 = st.columns(2)
-        if col1.button("Approve", key=f"approve-{request['id']}"):
-            action = ActionRequest(
-                action_type=request["action"]["action_type"],
-                description=request["action"]["description"],
-                payload=request["action"]["payload"],
-            )
-            executor.execute_action(action)
-            update_permission_request(request["id"], "approved")
-            append_activity(
-                "Permission approved and action executed",
-                {
-                    "component": "Inquisitor",
-                    "location": "permission_judge.py",
-                    "llm_used": "none",
-                },
-            )
-            st.rerun()
-        if col2.button("Deny", key=f"deny-{request['id']}"):
-            update_permission_request(request["id"], "denied")
+    for batch_id, requests in approvals.group_by_batch(pending).items():
+        if batch_id is not None and len(requests) > 1:
+            _render_batch(batch_id, requests)
+        else:
+            for request in requests:
+                _render_request(request)
+
+
+def _render_jobs() -> None:
+    jobs = job_queue.list_jobs(limit=20)
+    if not jobs:
+        return
+    # Picks up jobs left queued by a previous session whose workers are gone.
+    if any(job["status"] == job_queue.QUEUED for job in jobs):
+        ensure_workers()
+    st.subheader("Approved Actions")
+    st.dataframe(
+        [
+            {
+                "Action": job["action"]["description"],
+                "Type": job["action"]["action_type"],
+                "Status": job["status"],
+                "Worker": job["worker"] or "",
+                "Queued": time.strftime("%H:%M:%S", time.localtime(job["enqueued_at"])),
+                "Result": job["error"] or job["result"] or "",
+            }
+            for job in jobs
+        ],
+        hide_index=True,
+    )
+
+
+def _render_flows() -> None:
+    flows = get_scheduler().flows()
+    if not flows:
+        return
+    st.subheader("Flows")
+    for flow in flows:
+        progress = flow.progress()
+        settled = progress["done"] + progress["failed"] + progress["skipped"]
+        label = (
+            f"{flow.name} :: {settled}/{progress['total']} tasks"
+            f" ({progress['running']} running, {progress['failed']} failed)"
+        )
+        st.progress(settled / progress["total"] if progress["total"] else 1.0, text=label)
+
+
+def _render_active_runs() -> None:
+    runs = list_active_runs()
+    if not runs:
+        return
+    st.subheader("Running Test Suites")
+    for run in runs:
+        elapsed = time.time() - run["started_at"]
+        st.write(
+            f"{Path(run['repo_path']).name} :: `{run['command']}` via {run['runner']} "
+            f"({elapsed:.0f}s of {run['timeout_s']:.0f}s)"
+        )
+        if run["cancel_requested"]:
+            st.caption("Cancellation requested")
+        elif st.button("Cancel", key=f"cancel-{run['run_id']}"):
+            request_cancel(run["run_id"])
             append_activity(
-                "Permission denied",
-                {
-                    "component": "Inquisitor",
-                    "location": "permission_judge.py",
-                    "llm_used": "none",
-                },
+                f"Cancellation requested for tests in {Path(run['repo_path']).name}",
+                {"component": "Dark Throne", "location": "ui_dashboard.py", "llm_used": "none"},
             )
             st.rerun()
 
 
-def _render_cursor_prompts(state: Dict[str, Any]) -> None:
+def _render_cursor_prompts(prompts: List[Dict[str, Any]]) -> None:
     st.subheader("Cursor Prompts")
-    prompts = state.get("cursor_prompts", [])
     if not prompts:
         st.write("No Cursor prompts queued.")
         return
     st.caption(
         "No actions happen in Cursor unless a prompt is queued here."
     )
-    for prompt in reversed(prompts)[-10:]:
+    for prompt in reversed(prompts):
         st.markdown(f"**{Path(prompt['repo_path']).name}**")
         st.code(prompt["prompt"])
 
@@ -193,38 +305,52 @@ def main() -> None:
     st.set_page_config(page_title="Exegol - The Dark Throne", layout="wide")
     st.title("Exegol — The Dark Throne")
 
-    state = load_state()
-
-    manager = AgentManager()
-    col1, col2, col3 = st.columns(3)
+    manager = _agent_manager()
+    col1, col2, col3, col4 = st.columns(4)
     if col1.button("Run Demo Flow"):
-        manager.run_demo_flow()
-        append_activity(
-            "Demo flow triggered",
-            {"component": "Dark Throne", "location": "ui_dashboard.py", "llm_used": "none"},
-        )
+        with transaction():
+            manager.run_demo_flow()
+            append_activity(
+                "Demo flow triggered",
+                {"component": "Dark Throne", "location": "ui_dashboard.py", "llm_used": "none"},
+            )
         st.rerun()
+    incremental = col2.checkbox("Incremental", help="Only run tests affected by recent changes")
     if col2.button("Run Repo Test Audit"):
-        manager.run_repo_test_audit()
-        append_activity(
-            "Repo test audit triggered",
-            {"component": "Dark Throne", "location": "ui_dashboard.py", "llm_used": "none"},
-        )
+        with transaction():
+            manager.submit_repo_test_audit(mode="incremental" if incremental else "full")
+            append_activity(
+                "Repo test audit triggered",
+                {"component": "Dark Throne", "location": "ui_dashboard.py", "llm_used": "none"},
+            )
         st.rerun()
     if col3.button("Queue Cursor Prompts"):
-        manager.run_cursor_prompt_flow()
+        with transaction():
+            manager.submit_cursor_prompt_flow()
+            append_activity(
+                "Cursor prompt flow triggered",
+                {"component": "Dark Throne", "location": "ui_dashboard.py", "llm_used": "none"},
+            )
+        st.rerun()
+    if col4.button("Clear Test Cache"):
+        removed = run_cache.invalidate()
         append_activity(
-            "Cursor prompt flow triggered",
+            f"Test result cache cleared ({removed} entries)",
             {"component": "Dark Throne", "location": "ui_dashboard.py", "llm_used": "none"},
         )
         st.rerun()
 
+    view = dashboard_view()
     _render_component_legend()
-    _render_interview(state)
-    _render_activity(state)
+    _render_interview(view["interview"])
+    _render_activity(view["activity"])
     _render_ops_dashboard()
-    _render_permissions(state)
-    _render_cursor_prompts(state)
+    _render_repos()
+    _render_flows()
+    _render_active_runs()
+    _render_permissions(view["pending_permissions"])
+    _render_jobs()
+    _render_cursor_prompts(view["cursor_prompts"])
 
 
 if __name__ == "__main__":
@@ -1,16 +1,29 @@
 from __future__ import annotations
 
+import contextvars
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 from git import Repo
 
-from config import ensure_directories, get_sandbox_mode, get_workspace_dir
+import incremental_tests
+import repo_index
+import run_cache
+from config import (
+    ensure_directories,
+    get_commit_concurrency,
+    get_sandbox_mode,
+    get_workspace_dir,
+)
+from local_runner import run_local
 from models import ActionRequest
 from observability import log_event, timer
-from state_store import add_cursor_prompt, append_activity
+from repo_pool import get_repo_pool
+from sandbox import get_sandbox_pool
+from state_store import add_cursor_prompt, append_activity, transaction
 
 
 class WorkspaceExecutor:
@@ -18,31 +31,41 @@ class WorkspaceExecutor:
         ensure_directories()
         self.workspace_root = workspace_root or get_workspace_dir()
 
-    def ensure_repo(self, repo_name: str) -> Repo:
+    def _ensure_repo_path(self, repo_name: str) -> Path:
         repo_path = self.workspace_root / repo_name
         repo_path.mkdir(parents=True, exist_ok=True)
-        if (repo_path / ".git").exists():
-            repo = Repo(repo_path)
-        else:
+        if not (repo_path / ".git").exists():
             repo = Repo.init(repo_path)
-            repo.config_writer().set_value("user", "name", "Exegol Bot").release()
-            repo.config_writer().set_value("user", "email", "exegol@local").release()
-        return repo
+            with repo.config_writer() as writer:
+                writer.set_value("user", "name", "Exegol Bot")
+                writer.set_value("user", "email", "exegol@local")
+            repo.close()
+        return repo_path
+
+    def ensure_repo(self, repo_name: str) -> Repo:
+        # A Repo of the caller's own: pooled handles are only used under a
+        # lease, since they are shared between threads and may be evicted.
+        return Repo(self._ensure_repo_path(repo_name))
 
     def execute_action(self, action: ActionRequest) -> str:
-        if action.action_type == "git_commit":
-            return self._execute_git_commit(action)
-        if action.action_type == "run_tests":
-            return self._execute_run_tests(action)
-        if action.action_type == "cursor_prompt":
-            return self._execute_cursor_prompt(action)
-        raise ValueError(f"Unsupported action: {action.action_type}")
+        with timer("workspace_execute_action", {"action_type": action.action_type}):
+            if action.action_type == "git_commit":
+                return self._execute_git_commit(action)
+            if action.action_type == "git_commit_batch":
+                return self._execute_git_commit_batch(action)
+            if action.action_type == "run_tests":
+                return self._execute_run_tests(action)
+            if action.action_type == "cursor_prompt":
+                return self._execute_cursor_prompt(action)
+            raise ValueError(f"Unsupported action: {action.action_type}")
 
     def _execute_git_commit(self, action: ActionRequest) -> str:
         repo_name = action.payload.get("repo", "demo-repo")
         message = action.payload.get("message", "demo commit")
-        with timer("workspace_git_commit", {"repo": repo_name}):
-            repo = self.ensure_repo(repo_name)
+        repo_path = self._ensure_repo_path(repo_name)
+        with timer("workspace_git_commit", {"repo": repo_name}), get_repo_pool().lease(
+            repo_path
+        ) as repo:
             demo_file = Path(repo.working_tree_dir) / "demo.txt"
             demo_file.write_text(
                 f"Demo update at {time.time()}\n",
@@ -56,12 +79,110 @@ class WorkspaceExecutor:
             )
             return commit.hexsha
 
+    def _batch_target(self, repo_name: str, relative: str) -> Path:
+        # Batch changes come from generated payloads; keep every path inside
+        # its repo's working tree and out of .git.
+        if not repo_name or Path(repo_name).name != repo_name or repo_name in (".", ".."):
+            raise ValueError(f"Invalid repo name: {repo_name!r}")
+        path = Path(relative)
+        if not relative or path.is_absolute() or ".." in path.parts or ".git" in path.parts:
+            raise ValueError(f"Unsafe path in {repo_name}: {relative!r}")
+        repo_root = (self.workspace_root / repo_name).resolve()
+        target = (repo_root / path).resolve()
+        if not target.is_relative_to(repo_root):
+            # A symlink inside the repo pointing elsewhere.
+            raise ValueError(f"Unsafe path in {repo_name}: {relative!r}")
+        return target
+
+    def _commit_repo_changes(
+        self, repo_name: str, changes: List[Dict[str, Any]], message: str
+    ) -> str:
+        repo_path = self._ensure_repo_path(repo_name)
+        with timer("workspace_git_commit", {"repo": repo_name}), get_repo_pool().lease(
+            repo_path
+        ) as repo:
+            written, removed = [], []
+            for change in changes:
+                target = self._batch_target(repo_name, change["path"])
+                if change.get("delete"):
+                    target.unlink(missing_ok=True)
+                    removed.append(change["path"])
+                else:
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    target.write_text(change.get("content", ""), encoding="utf-8")
+                    written.append(change["path"])
+            # Staged through the git CLI: IndexFile.add chdirs the whole
+            # process into the repo, which races with the other repos'
+            # commits running in parallel threads.
+            if written:
+                repo.git.add("--", *written)
+            if removed:
+                repo.git.rm("--cached", "--quiet", "--ignore-unmatch", "--", *removed)
+            commit = repo.index.commit(message)
+        log_event(
+            "git_commit",
+            {
+                "repo": repo_name,
+                "commit": commit.hexsha,
+                "message": message,
+                "files": len(changes),
+            },
+        )
+        return commit.hexsha
+
+    def _execute_git_commit_batch(self, action: ActionRequest) -> str:
+        changes = action.payload.get("changes") or []
+        if not changes:
+            raise ValueError("git_commit_batch requires at least one change.")
+        message = action.payload.get("message", "batch commit")
+        by_repo: Dict[str, List[Dict[str, Any]]] = {}
+        for change in changes:
+            self._batch_target(change.get("repo", ""), change.get("path", ""))
+            by_repo.setdefault(change["repo"], []).append(change)
+
+        workers = max(1, min(get_commit_concurrency(), len(by_repo)))
+        with timer("workspace_git_commit_batch", {"repos": len(by_repo)}):
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="exegol-commit") as pool:
+                futures = {
+                    repo_name: pool.submit(
+                        contextvars.copy_context().run,
+                        self._commit_repo_changes,
+                        repo_name,
+                        repo_changes,
+                        message,
+                    )
+                    for repo_name, repo_changes in by_repo.items()
+                }
+            commits, errors = {}, {}
+            for repo_name, future in futures.items():
+                try:
+                    commits[repo_name] = future.result()
+                except Exception as exc:
+                    errors[repo_name] = str(exc)
+
+        log_event(
+            "git_commit_batch",
+            {"commits": commits, "errors": errors, "files": len(changes)},
+        )
+        append_activity(
+            f"Batch commit of {len(changes)} files across {len(by_repo)} repos",
+            {
+                "commits": commits,
+                "errors": errors,
+                "component": "Final Order",
+                "location": "workspace_execution.py",
+                "llm_used": "none",
+            },
+        )
+        if errors:
+            raise RuntimeError(f"Batch commit failed for: {', '.join(sorted(errors))}")
+        return ", ".join(f"{name}@{sha[:10]}" for name, sha in sorted(commits.items()))
+
     def list_repos(self) -> Tuple[Path, ...]:
-        repos = []
-        for entry in self.workspace_root.iterdir():
-            if entry.is_dir() and (entry / ".git").exists():
-                repos.append(entry)
-        return tuple(sorted(repos))
+        return tuple(
+            self.workspace_root / entry["name"]
+            for entry in repo_index.list_repos(self.workspace_root)
+        )
 
     def _run_tests_noop(self, repo_path: Path, command: str) -> Dict[str, object]:
         return {
@@ -74,32 +195,32 @@ class WorkspaceExecutor:
         }
 
     def _run_tests_docker(self, repo_path: Path, command: str) -> Dict[str, object]:
-        try:
-            import docker
-        except ImportError as exc:
-            raise RuntimeError("docker SDK not installed") from exc
-
-        client = docker.from_env()
-        image = "python:3.11-slim"
-        volumes = {str(repo_path): {"bind": "/repo", "mode": "rw"}}
-        container = client.containers.run(
-            image=image,
-            command=["bash", "-lc", command],
-            volumes=volumes,
-            working_dir="/repo",
-            detach=True,
-        )
-        result = container.wait()
-        output = container.logs().decode("utf-8", errors="replace")
-        container.remove(force=True)
-        return {
-            "status": "success" if result.get("StatusCode") == 0 else "failed",
-            "exit_code": result.get("StatusCode"),
-            "output": output,
-            "command": command,
-            "repo_path": str(repo_path),
-            "runner": "docker",
-        }
+        return get_sandbox_pool(self.workspace_root).run(repo_path, command)
+
+    def _run_tests_cached(
+        self, repo_path: Path, command: str, mode: str, use_cache: bool
+    ) -> Dict[str, object]:
+        cache_key = None
+        if mode != "noop" and use_cache:
+            cache_key = run_cache.cache_key(repo_path, command, mode)
+        cached = run_cache.lookup(cache_key) if cache_key else None
+        if cached is not None:
+            log_event(
+                "test_cache_hit",
+                {"repo_path": str(repo_path), "mode": mode, "run_id": cached.get("run_id")},
+            )
+            return {**cached, "cached": True}
+
+        with timer("workspace_run_tests", {"repo_path": str(repo_path), "mode": mode}):
+            if mode == "docker":
+                result = self._run_tests_docker(repo_path, command)
+            elif mode == "local":
+                result = run_local(repo_path, command)
+            else:
+                result = self._run_tests_noop(repo_path, command)
+        if cache_key:
+            run_cache.store(cache_key, repo_path, result)
+        return result
 
     def _update_plan_with_result(self, repo_path: Path, result: Dict[str, object]) -> None:
         plan_path = repo_path / "plan.md"
@@ -117,7 +238,18 @@ class WorkspaceExecutor:
             f"- Test command: `{command}`",
             f"- Result: {status}",
         ]
-        if status != "success":
+        if result.get("selection") == "incremental":
+            update_lines.append(
+                f"- Selection: incremental ({len(result.get('selected_tests') or [])} test files)"
+            )
+        if status == "timeout":
+            update_lines.append(
+                f"- Requirement: Investigate hung test suite "
+                f"(timed out after {result.get('timeout_s')}s)"
+            )
+        elif status == "cancelled":
+            update_lines.append("- Note: Test run was cancelled before it finished")
+        elif status != "success":
             update_lines.append("- Requirement: Investigate failing tests")
         content = content.rstrip() + "\n" + "\n".join(update_lines) + "\n"
         plan_path.write_text(content, encoding="utf-8")
@@ -130,12 +262,45 @@ class WorkspaceExecutor:
             raise FileNotFoundError(f"Repo path not found: {repo_path}")
 
         mode = get_sandbox_mode()
-        with timer("workspace_run_tests", {"repo_path": str(repo_path), "mode": mode}):
-            if mode == "docker":
-                result = self._run_tests_docker(repo_path, command)
-            else:
-                result = self._run_tests_noop(repo_path, command)
+        selection = None
+        if mode != "noop" and action.payload.get("mode", "full") == "incremental":
+            selection = incremental_tests.select_tests(repo_path, command)
+            command = selection["command"]
+            log_event(
+                "test_selection",
+                {
+                    "repo_path": str(repo_path),
+                    "selection": selection["selection"],
+                    "tests": len(selection["tests"]),
+                    "reason": selection["reason"],
+                },
+            )
+
+        if selection is not None and selection["selection"] == "incremental" and not selection["tests"]:
+            result = {
+                "status": "success",
+                "exit_code": None,
+                "output": "No tests affected by changes since the last successful audit.",
+                "command": command,
+                "repo_path": str(repo_path),
+                "runner": "none",
+            }
+        else:
+            result = self._run_tests_cached(
+                repo_path, command, mode, action.payload.get("use_cache", True)
+            )
+        if mode != "noop":
+            incremental_tests.record_run(
+                repo_path, result.get("status"), selection["head"] if selection else None
+            )
+        if selection is not None:
+            result = {
+                **result,
+                "selection": selection["selection"],
+                "selected_tests": selection["tests"],
+            }
 
+        repo_index.record_audit(self.workspace_root, repo_path, result.get("status"))
         if update_plan:
             self._update_plan_with_result(repo_path, result)
 
@@ -145,13 +310,20 @@ class WorkspaceExecutor:
                 "repo_path": str(repo_path),
                 "status": result.get("status"),
                 "runner": result.get("runner"),
+                "output_path": result.get("output_path"),
+                "cached": result.get("cached", False),
+                "selection": result.get("selection", "full"),
             },
         )
         append_activity(
-            f"Tests executed for {repo_path.name}",
+            f"Tests reused from cache for {repo_path.name}"
+            if result.get("cached")
+            else f"Tests executed for {repo_path.name}",
             {
                 "status": result.get("status"),
                 "runner": result.get("runner"),
+                "output_path": result.get("output_path"),
+                "cached": result.get("cached", False),
                 "component": "Final Order",
                 "location": "workspace_execution.py",
                 "llm_used": "none",
@@ -162,15 +334,16 @@ class WorkspaceExecutor:
     def _execute_cursor_prompt(self, action: ActionRequest) -> str:
         repo_path = action.payload.get("repo_path", "")
         prompt = action.payload.get("prompt", "")
-        add_cursor_prompt(repo_path, prompt)
-        append_activity(
-            f"Cursor prompt queued for {Path(repo_path).name}",
-            {
-                "component": "Final Order",
-                "location": "workspace_execution.py",
-                "llm_used": "cursor_instructions",
-            },
-        )
+        with transaction():
+            add_cursor_prompt(repo_path, prompt)
+            append_activity(
+                f"Cursor prompt queued for {Path(repo_path).name}",
+                {
+                    "component": "Final Order",
+                    "location": "workspace_execution.py",
+                    "llm_used": "cursor_instructions",
+                },
+            )
         return "queued"
 
     def run_in_sandbox(self, command: str) -> str: